@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+copy_sheet 基准测试
+对比逐单元格复制的旧实现与按块复制的新实现，默认使用 100k x 20 的源表。
+
+    python bench/bench_copy_sheet.py --rows 100000 --cols 20
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import openpyxl
+from openpyxl import Workbook
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from excel import excel_operator
+
+
+def legacy_copy_sheet(src_dir, src_sheetname, src_copy_row, src_copy_column,
+        dst_dir, dst_sheetname, dst_start_row, dst_start_column,
+        export_file_name="demo.xlsx"):
+    """copy_sheet 改造前的实现：完整加载源表，逐单元格 cell() 读写"""
+    nrows, src_row_start_index = excel_operator.get_src_row_info(src_copy_row)
+    ncolumns, src_column_start_index = excel_operator.get_src_column_info(src_copy_column)
+
+    wbSrc = openpyxl.load_workbook(filename = src_dir)
+    wsSrc = wbSrc[src_sheetname]
+
+    wbDst = openpyxl.load_workbook(filename = dst_dir)
+    wsDst = wbDst[dst_sheetname]
+
+    last_row = dst_start_row + nrows - 1
+    last_columns =  dst_start_column + ncolumns - 1
+    rd,cd = wsDst.max_row, wsDst.max_column
+    if rd  < last_row:
+        wsDst.insert_rows(rd + 1, last_row - rd)
+    if cd < last_columns:
+        wsDst.insert_cols(cd + 1, last_columns - cd)
+
+    i, j = src_row_start_index + 1, src_column_start_index + 1
+    for r in range(dst_start_row, last_row + 1):
+        for c in range(dst_start_column, last_columns + 1):
+            wsDst.cell(row=r, column=c).value = wsSrc.cell(row=i, column=j).value
+            j += 1
+        i += 1
+        j = src_column_start_index + 1
+
+    wbDst.save(export_file_name)
+
+
+def create_workbooks(workdir, rows, cols):
+    src = os.path.join(workdir, 'bench_src.xlsx')
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet')
+    for i in range(rows):
+        ws.append([f"r{i}c{j}" if j % 2 else i * cols + j for j in range(cols)])
+    wb.save(src)
+
+    dst = os.path.join(workdir, 'bench_dst.xlsx')
+    wb = Workbook()
+    wb.active.title = 'Sheet'
+    wb.active.append(['header'])
+    wb.save(dst)
+    return src, dst
+
+
+def timeit(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="copy_sheet 基准测试")
+    parser.add_argument('--rows', type=int, default=100000, help="源表行数 (默认: 100000)")
+    parser.add_argument('--cols', type=int, default=20, help="源表列数 (默认: 20)")
+    args = parser.parse_args()
+
+    last_col = openpyxl.utils.get_column_letter(args.cols)
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"生成 {args.rows} x {args.cols} 的源表...")
+        src, dst = create_workbooks(workdir, args.rows, args.cols)
+        out = os.path.join(workdir, 'bench_out.xlsx')
+        copy_args = (src, 'Sheet', f"1:{args.rows}", f"A:{last_col}", dst, 'Sheet', 2, 1)
+
+        legacy = timeit(legacy_copy_sheet, *copy_args, export_file_name=out)
+        print(f"legacy copy_sheet:      {legacy:8.2f}s")
+        block = timeit(excel_operator.copy_sheet, *copy_args, export_file_name=out)
+        print(f"block copy_sheet:       {block:8.2f}s  ({legacy / block:.2f}x)")
+        styled = timeit(excel_operator.copy_sheet, *copy_args, export_file_name=out, copy_styles=True)
+        print(f"copy_sheet copy_styles: {styled:8.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+excel / word 操作的基准测试
+按指定规模生成工作簿和文档, 对 excel_operator、word_operator、ExcelToWordTable、DocxContentMerger
+等模块的公开操作逐个计时, 每个操作在独立的子进程中运行并记录峰值内存(RSS), 结果可输出为 JSON 用于对比。
+
+    python bench/run_bench.py --cells 1000 100000 --paragraphs 10 1000 --json result.json
+    python bench/run_bench.py --only word --compare result.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import traceback
+import multiprocessing
+
+from openpyxl import Workbook
+from docx import Document
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from excel import excel_operator
+from word import word_operator
+from word.docx_merger import DocxContentMerger
+from word.docx_template import CompiledTemplate
+from word.excel_to_word_table import ExcelToWordTable
+from word import docx_stream
+
+try:
+    import resource
+except ImportError:
+    # Windows 没有 resource 模块, 不记录内存
+    resource = None
+
+COLUMNS = 10
+
+
+def create_workbook(path, cells):
+    rows = max(cells // COLUMNS, 1)
+    wb = Workbook(write_only=True)
+    for name in ('Sheet1', 'Sheet2'):
+        ws = wb.create_sheet(name)
+        ws.append([f"col{j}" for j in range(COLUMNS)])
+        for i in range(rows):
+            ws.append([f"r{i}c{j}" if j % 2 else i * COLUMNS + j for j in range(COLUMNS)])
+    wb.save(path)
+    return rows
+
+
+def create_document(path, paragraphs, fields=True):
+    # fields=False 时正文不含 {{ name }} / {{ id }}, 合并的目标文档只有 {{ place1 }} 一个占位符
+    doc = Document()
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            doc.add_heading(f"第{i // 10 + 1}节", 1 + (i // 10) % 2)
+        if fields:
+            doc.add_paragraph(f"段落{i} 姓名 {{{{ name }}}} 编号 {{{{ id }}}} 其它文字用来填充篇幅")
+        else:
+            doc.add_paragraph(f"段落{i} 其它文字用来填充篇幅")
+    table = doc.add_table(rows=10, cols=4)
+    for r in range(10):
+        for c in range(4):
+            table.cell(r, c).text = f"{r * 4 + c}"
+    doc.add_paragraph('{{ place1 }}')
+    doc.add_paragraph('锚点')
+    doc.save(path)
+
+
+""" one benchmark case: setup(ctx) runs untimed and returns the callable to time
+"""
+def excel_cases():
+    def case(name, setup):
+        return ('excel', name, setup)
+
+    def last(ctx):
+        return ctx['rows'] + 1
+
+    return [
+        case('read_successive_cells', lambda ctx: lambda: excel_operator.read_successive_cells(
+            ctx['xlsx'], 'Sheet1', f"2:{last(ctx)}", "A:J")),
+        case('iter_cell_texts', lambda ctx: lambda: sum(1 for _ in excel_operator.iter_cell_texts(
+            ctx['xlsx'], 'Sheet1', f"2:{last(ctx)}", "A:J"))),
+        case('iter_successive_rows', lambda ctx: lambda: sum(1 for _ in excel_operator.iter_successive_rows(
+            ctx['xlsx'], 'Sheet1', f"2:{last(ctx)}", "A,C:E"))),
+        case('iter_records', lambda ctx: lambda: sum(1 for _ in excel_operator.iter_records(ctx['xlsx'], 'Sheet1'))),
+        case('read_range_as_frame', lambda ctx: lambda: excel_operator.read_range_as_frame(
+            ctx['xlsx'], 'Sheet1', f"1:{last(ctx)}", "A:J", cache=False)),
+        case('read_range_as_array', lambda ctx: lambda: excel_operator.read_range_as_array(
+            ctx['xlsx'], 'Sheet1', f"2:{last(ctx)}", "A,C,E", cache=False)),
+        case('copy_sheet', lambda ctx: lambda: excel_operator.copy_sheet(
+            ctx['xlsx'], 'Sheet1', f"1:{last(ctx)}", "A:J", ctx['xlsx'], 'Sheet2', 1, 12, export_file_name=ctx['out_xlsx'])),
+        case('copy_sheet_styles', lambda ctx: lambda: excel_operator.copy_sheet(
+            ctx['xlsx'], 'Sheet1', f"1:{last(ctx)}", "A:J", ctx['xlsx'], 'Sheet2', 1, 12,
+            export_file_name=ctx['out_xlsx'], copy_styles=True)),
+        case('write_to_cells', lambda ctx: lambda: excel_operator.write_to_cells(
+            ctx['xlsx'], 'Sheet1', [(r, 'B', 'x') for r in range(2, last(ctx) + 1, 10)], save_to=ctx['out_xlsx'])),
+        case('write_to_cells_incremental', lambda ctx: lambda: excel_operator.write_to_cells(
+            ctx['xlsx'], 'Sheet1', [(2, 'B', 'x')], save_to=ctx['out_xlsx'], incremental=True)),
+        case('write_to_single_cell', lambda ctx: lambda: excel_operator.write_to_single_cell(
+            ctx['xlsx'], 'Sheet1', 2, 'B', 'x', save_to=ctx['out_xlsx'])),
+        case('insert_rows', lambda ctx: lambda: excel_operator.insert_rows(
+            ctx['xlsx'], 'Sheet1', 2, 5, [(2, 'A', 'new')], save_to=ctx['out_xlsx'])),
+        case('bulk_write', lambda ctx: lambda: _bulk_write(ctx)),
+        case('export_rows', lambda ctx: lambda: excel_operator.export_rows(
+            ([i] * COLUMNS for i in range(ctx['rows'])), ctx['out_xlsx'], header=[f"c{j}" for j in range(COLUMNS)])),
+        case('export_csv', lambda ctx: lambda: excel_operator.export_csv(ctx['csv'], ctx['out_xlsx'])),
+    ]
+
+
+def _bulk_write(ctx):
+    with excel_operator.bulk_write(ctx['xlsx'], 'Sheet2', save_to=ctx['out_xlsx']) as writer:
+        writer.write_block([[i] * COLUMNS for i in range(ctx['rows'])], anchor='L1')
+
+
+def word_cases():
+    def case(name, setup):
+        return ('word', name, setup)
+
+    def with_doc(func):
+        # 打开文档不计入耗时
+        def setup(ctx):
+            doc = Document(ctx['docx'])
+            return lambda: func(ctx, doc)
+        return setup
+
+    def styled(ctx, doc):
+        word_operator.register_style(doc, 'BenchStyle')
+        return word_operator.insert_paragraphs(doc, '锚点', [f"新段落{i}" for i in range(ctx['paragraphs'])],
+                                               style='BenchStyle')
+
+    return [
+        case('replace_paragraph_text', with_doc(lambda ctx, doc: word_operator.replace_paragraph_text(
+            doc, '{{ name }}', '张三', save_to=ctx['out_docx']))),
+        case('replace_table_cell_text', with_doc(lambda ctx, doc: word_operator.replace_table_cell_text(
+            doc, '17', 'x', save_to=ctx['out_docx']))),
+        case('replace_many', with_doc(lambda ctx, doc: word_operator.replace_many(
+            doc, {'{{ name }}': '张三', '{{ id }}': 42}, save_to=ctx['out_docx']))),
+        case('add_to_end', with_doc(lambda ctx, doc: [word_operator.add_to_end(doc, f"结尾{i}")
+                                                      for i in range(ctx['paragraphs'])])),
+        case('add_before_text', with_doc(lambda ctx, doc: word_operator.add_before_text(doc, '锚点', '插入'))),
+        case('replace_para', with_doc(lambda ctx, doc: word_operator.replace_para(doc, '锚点', '替换'))),
+        case('insert_paragraphs', with_doc(styled)),
+        case('extract_headings', with_doc(lambda ctx, doc: word_operator.extract_headings(doc))),
+        case('docx_stream.iter_docx', lambda ctx: lambda: sum(1 for _ in docx_stream.iter_docx(ctx['docx']))),
+        case('CompiledTemplate.render', lambda ctx: _render_setup(ctx)),
+        case('ExcelToWordTable.load_excel', lambda ctx: lambda: ExcelToWordTable(ctx['xlsx']).load_excel('Sheet1')),
+        case('ExcelToWordTable.insert_table_at_placeholder', lambda ctx: _table_setup(ctx, True)),
+        case('ExcelToWordTable.add_table_to_end', lambda ctx: _table_setup(ctx, False)),
+        case('DocxContentMerger.merge_documents', lambda ctx: lambda: DocxContentMerger().merge_documents(
+            ctx['docx'], ctx['target_docx'], ctx['out_docx'])),
+        case('DocxContentMerger.merge_documents_transplant', lambda ctx: lambda: DocxContentMerger(
+            transplant=True).merge_documents(ctx['docx'], ctx['target_docx'], ctx['out_docx'])),
+        case('DocxContentMerger.merge_many', lambda ctx: lambda: DocxContentMerger(transplant=True).merge_many(
+            {'place1': ctx['docx']}, ctx['target_docx'], ctx['out_docx'])),
+    ]
+
+
+def _render_setup(ctx):
+    template = CompiledTemplate(ctx['docx'])
+    return lambda: template.render({'name': '张三', 'id': 1}, ctx['out_docx'])
+
+
+def _table_setup(ctx, at_placeholder):
+    tool = ExcelToWordTable(ctx['xlsx'])
+    table_data = tool.load_excel('Sheet1', end_row=min(ctx['rows'], 5000))
+    tool.create_word_document(ctx['docx'])
+    if at_placeholder:
+        return lambda: tool.insert_table_at_placeholder(table_data, '{{ place1 }}')
+    return lambda: tool.add_table_to_end(table_data)
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位是 KB, macOS 是字节
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_case(setup, ctx, repeat, conn, silent=True):
+    # 被测模块会打印进度信息, 子进程中丢弃输出, 保持结果表格可读
+    if silent:
+        sys.stdout = open(os.devnull, 'w')
+    try:
+        timings = []
+        for _ in range(repeat):
+            func = setup(ctx)
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        conn.send({'seconds': min(timings), 'peak_rss_mb': peak_rss_mb(), 'error': None})
+    except Exception:
+        conn.send({'seconds': None, 'peak_rss_mb': peak_rss_mb(), 'error': traceback.format_exc(limit=3)})
+    finally:
+        conn.close()
+
+
+def measure(setup, ctx, repeat):
+    parent, child = multiprocessing.Pipe(duplex=False)
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        # 不支持 fork 时在当前进程中运行, 峰值内存是整个进程的
+        run_case(setup, ctx, repeat, child, silent=False)
+        return parent.recv()
+
+    # 每个操作在 fork 出的独立进程中运行, 峰值内存互不影响
+    process = multiprocessing.get_context('fork').Process(target=run_case, args=(setup, ctx, repeat, child))
+    process.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = {'seconds': None, 'peak_rss_mb': None, 'error': f"worker exited with {process.exitcode}"}
+    process.join()
+    return result
+
+
+def run(cells_sizes, paragraph_sizes, only=None, repeat=1, quiet=False):
+    results = []
+    groups = [g for g in ('excel', 'word') if only in (None, g)]
+    with tempfile.TemporaryDirectory() as workdir:
+        for cells in cells_sizes:
+            for paragraphs in paragraph_sizes:
+                ctx = {
+                    'xlsx': os.path.join(workdir, 'bench.xlsx'),
+                    'csv': os.path.join(workdir, 'bench.csv'),
+                    'docx': os.path.join(workdir, 'bench.docx'),
+                    'target_docx': os.path.join(workdir, 'target.docx'),
+                    'out_xlsx': os.path.join(workdir, 'out.xlsx'),
+                    'out_docx': os.path.join(workdir, 'out.docx'),
+                    'cells': cells,
+                    'paragraphs': paragraphs,
+                }
+                ctx['rows'] = create_workbook(ctx['xlsx'], cells)
+                with open(ctx['csv'], 'w', encoding='utf-8') as f:
+                    f.writelines(f"{i},{i * 2},r{i}\n" for i in range(ctx['rows']))
+                create_document(ctx['docx'], paragraphs)
+                create_document(ctx['target_docx'], paragraphs, fields=False)
+
+                cases = (excel_cases() if 'excel' in groups else []) + (word_cases() if 'word' in groups else [])
+                for group, name, setup in cases:
+                    # excel 的操作只和单元格数有关, 只在第一个段落规模下运行
+                    if group == 'excel' and paragraphs != paragraph_sizes[0]:
+                        continue
+                    size = {'cells': cells} if group == 'excel' else {'cells': cells, 'paragraphs': paragraphs}
+                    result = dict(group=group, name=name, size=size, **measure(setup, ctx, repeat))
+                    results.append(result)
+                    if not quiet:
+                        print(format_result(result))
+    return results
+
+
+def format_result(result, baseline=None):
+    size = ' '.join(f"{k}={v}" for k, v in result['size'].items())
+    label = f"{result['group']:<6}{result['name']:<48}{size:<28}"
+    if result['error']:
+        return f"{label}ERROR {result['error'].strip().splitlines()[-1]}"
+    rss = f"{result['peak_rss_mb']:8.1f}MB" if result['peak_rss_mb'] is not None else ''
+    line = f"{label}{result['seconds']:10.4f}s {rss}"
+    if baseline and baseline.get('seconds'):
+        line += f"  {result['seconds'] / baseline['seconds']:6.2f}x"
+    return line
+
+
+def result_key(result):
+    return (result['group'], result['name'], tuple(sorted(result['size'].items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="excel / word 操作的基准测试")
+    parser.add_argument('--cells', type=int, nargs='+', default=[1000, 100000], help="工作簿单元格数 (默认: 1000 100000)")
+    parser.add_argument('--paragraphs', type=int, nargs='+', default=[10, 1000], help="文档段落数 (默认: 10 1000)")
+    parser.add_argument('--only', choices=['excel', 'word'], help="只运行一组")
+    parser.add_argument('--repeat', type=int, default=1, help="每个操作重复次数, 取最短时间 (默认: 1)")
+    parser.add_argument('--json', help="把结果写入 JSON 文件")
+    parser.add_argument('--compare', help="与之前保存的 JSON 结果对比")
+    args = parser.parse_args()
+
+    results = run(args.cells, args.paragraphs, args.only, args.repeat, quiet=args.compare is not None)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = {result_key(r): r for r in json.load(f)['results']}
+        print(f"与 {args.compare} 对比 (当前耗时 / 基准耗时):")
+        for result in results:
+            print(format_result(result, baseline.get(result_key(result))))
+
+    if args.json:
+        report = {
+            'meta': {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'cells': args.cells,
+                'paragraphs': args.paragraphs,
+                'repeat': args.repeat,
+            },
+            'results': results,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.json}")
+    return 1 if any(r['error'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,150 @@
+""" run the same excel_operator recipe over many workbooks in a process pool
+  A job is (source, recipe). The recipe is either
+    - a list of steps (function_name, kwargs), each step calls
+      excel_operator.<function_name>(source, **kwargs), for example:
+      [("write_to_cells", {"sheetname": "Sheet1", "cell_values": [(1, 'A', 'x')], "save_to": "out.xlsx"})]
+      a step returning False (or None for the functions that return None on failure,
+      like write_to_cells when the save fails) fails the job
+    - or a module level function called as recipe(source), its return value is reported.
+  Recipes are sent to worker processes, so they must be picklable.
+"""
+
+import os
+import csv
+import time
+import signal
+import threading
+import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from . import excel_operator
+
+""" status is one of 'ok', 'error', 'timeout'
+"""
+JobResult = namedtuple('JobResult', ['index', 'source', 'status', 'elapsed', 'result', 'error'])
+
+# 这些函数出错时只打印异常并返回 None, 需要检查返回值
+_NONE_ON_FAILURE = {'write_to_cells', 'write_to_single_cell', 'insert_rows'}
+
+
+""" run jobs over a process pool
+  :param jobs: iterable of (source, recipe), it is consumed lazily
+  :param max_workers: the number of worker processes, default os.cpu_count()
+  :param timeout: seconds allowed for each job, None means no limit
+  :param max_in_flight: the max number of submitted but unfinished jobs, default 2 * max_workers
+  :param report_path: write the results as CSV to this path if given
+  :return: a list of JobResult in the order of jobs
+"""
+def run_batch(jobs, max_workers=None, timeout=None, max_in_flight=None, report_path=None):
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or max_workers * 2
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        jobs = enumerate(jobs)
+        exhausted = False
+        while not exhausted or pending:
+            # 限制在途任务数，避免一次性提交全部任务占用内存
+            while not exhausted and len(pending) < max_in_flight:
+                try:
+                    index, (source, recipe) = next(jobs)
+                except StopIteration:
+                    exhausted = True
+                    break
+                future = executor.submit(_run_job, source, recipe, timeout)
+                pending[future] = (index, source)
+
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, source = pending.pop(future)
+                try:
+                    status, elapsed, result, error = future.result()
+                except Exception as e:
+                    # 工作进程异常退出或结果无法序列化
+                    status, elapsed, result, error = 'error', 0.0, None, repr(e)
+                results.append(JobResult(index, source, status, elapsed, result, error))
+
+    results.sort(key=lambda r: r.index)
+    if report_path:
+        write_report(results, report_path)
+    return results
+
+
+""" write the batch results as CSV
+  :param results: list of JobResult
+  :param report_path: where to save the report
+"""
+def write_report(results, report_path):
+    with open(report_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Index', 'Source', 'Status', 'Elapsed', 'Error'])
+        for r in results:
+            writer.writerow([r.index, r.source, r.status, f"{r.elapsed:.3f}", r.error or ''])
+
+
+""" summarize the batch results, for example: {'ok': 98, 'error': 1, 'timeout': 1, 'elapsed': 12.3}
+"""
+def summarize(results):
+    summary = {'ok': 0, 'error': 0, 'timeout': 0, 'elapsed': 0.0}
+    for r in results:
+        summary[r.status] += 1
+        summary['elapsed'] += r.elapsed
+    return summary
+
+
+def _run_job(source, recipe, timeout):
+    start = time.perf_counter()
+    try:
+        result = _call_with_timeout(_apply_recipe, (source, recipe), timeout)
+        return 'ok', time.perf_counter() - start, result, None
+    except TimeoutError:
+        return 'timeout', time.perf_counter() - start, None, f"timeout after {timeout}s"
+    except Exception:
+        return 'error', time.perf_counter() - start, None, traceback.format_exc(limit=3)
+
+
+def _apply_recipe(source, recipe):
+    if callable(recipe):
+        return recipe(source)
+    for name, kwargs in recipe:
+        ret = getattr(excel_operator, name)(source, **kwargs)
+        if ret is False or (ret is None and name in _NONE_ON_FAILURE):
+            raise RuntimeError(f"step {name} failed on {source}")
+    return None
+
+
+def _call_with_timeout(func, args, timeout):
+    if timeout is None:
+        return func(*args)
+
+    if hasattr(signal, 'SIGALRM'):
+        # 任务在工作进程的主线程中执行，可以用定时器信号中断
+        def on_alarm(signum, frame):
+            raise TimeoutError()
+        previous = signal.signal(signal.SIGALRM, on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            return func(*args)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+    # Windows 没有 SIGALRM：在线程中执行，超时后立即返回，线程在后台自行结束
+    outcome = {}
+    def target():
+        try:
+            outcome['result'] = func(*args)
+        except BaseException as e:
+            outcome['error'] = e
+    worker = threading.Thread(target=target, daemon=True)
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        raise TimeoutError()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('result')
@@ -0,0 +1,156 @@
+""" A1-notation parser
+  supports "A1", "$A$1", "A1:C10", "A:C", "2:5", "Sheet1!A1:B2", "'My Sheet'!B:B",
+  lowercase letters and comma separated multi-area lists such as "A1:B2,D4:E5".
+  Parsed ranges and columns are cached, so hot loops can pass the same strings again and again.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+MAX_ROW = 1048576
+MAX_COLUMN = 16384  # XFD
+
+BASE = 26
+
+# 预先计算 1..XFD 的列字母与列号的对照表
+_column_letters = [''] * (MAX_COLUMN + 1)
+_column_indexes = {}
+
+
+def _build_column_tables():
+    for index in range(1, MAX_COLUMN + 1):
+        letters = ''
+        n = index
+        while n > 0:
+            n, remainder = divmod(n - 1, BASE)
+            letters = chr(ord('A') + remainder) + letters
+        _column_letters[index] = letters
+        _column_indexes[letters] = index
+
+
+_build_column_tables()
+
+""" one rectangular area, min_row/max_row are None for whole columns and
+  min_col/max_col are None for whole rows
+"""
+CellRange = namedtuple('CellRange', ['sheet', 'min_row', 'min_col', 'max_row', 'max_col'])
+
+_AREA_RE = re.compile(r"""
+    \s*
+    (?:(?P<sheet>'(?:[^']|'')+'|[^'!,:\s]+)!)?
+    \$?(?P<c1>[A-Za-z]{1,3})?\$?(?P<r1>\d+)?
+    (?P<end>:\$?(?P<c2>[A-Za-z]{1,3})?\$?(?P<r2>\d+)?)?
+    \s*(?:,|$)
+""", re.X)
+
+
+""" convert the column letters to the column index, for example: "A" -> 1, "ab" -> 28
+  :param letters: column letters, case insensitive
+  :return: the column index which starts from 1
+"""
+def column_index(letters):
+    try:
+        return _column_indexes[letters.upper()]
+    except KeyError:
+        raise ValueError(f"invalid column letters '{letters}'") from None
+
+
+""" convert the column index to column letters, for example: 28 -> "AB"
+  :param index: the column index which starts from 1
+  :return: column letters
+"""
+def column_letter(index):
+    if not 1 <= index <= MAX_COLUMN:
+        raise ValueError(f"column index {index} out of range 1..{MAX_COLUMN}")
+    return _column_letters[index]
+
+
+""" parse an A1-notation reference
+  :param ref: for example "Sheet1!A1:C10,E:E"
+  :return: a tuple of CellRange, one per area
+"""
+@lru_cache(maxsize=4096)
+def parse_range(ref):
+    if not isinstance(ref, str) or not ref.strip():
+        raise ValueError(f"invalid range '{ref}'")
+
+    areas = []
+    pos = 0
+    while pos < len(ref):
+        m = _AREA_RE.match(ref, pos)
+        if m is None or m.end() == pos:
+            raise ValueError(f"invalid range '{ref}'")
+        areas.append(_to_area(ref, m))
+        pos = m.end()
+    if ref.rstrip().endswith(','):
+        raise ValueError(f"invalid range '{ref}'")
+    return tuple(areas)
+
+
+def _to_area(ref, m):
+    sheet = m.group('sheet')
+    if sheet is not None and sheet.startswith("'"):
+        sheet = sheet[1:-1].replace("''", "'")
+
+    c1, r1, c2, r2 = m.group('c1', 'r1', 'c2', 'r2')
+    if m.group('end') is None:
+        c2, r2 = c1, r1
+    if (c1 is None and r1 is None) or (c1 is None) != (c2 is None) or (r1 is None) != (r2 is None):
+        raise ValueError(f"invalid range '{ref}'")
+
+    min_col = max_col = min_row = max_row = None
+    if c1 is not None:
+        min_col, max_col = sorted((column_index(c1), column_index(c2)))
+    if r1 is not None:
+        min_row, max_row = sorted((int(r1), int(r2)))
+        if min_row < 1 or max_row > MAX_ROW:
+            raise ValueError(f"row out of range 1..{MAX_ROW} in '{ref}'")
+    return CellRange(sheet, min_row, min_col, max_row, max_col)
+
+
+""" the sorted row indexes referenced by ref, for example: "1:3,5" -> (1, 2, 3, 5)
+  only the parsing is cached (parse_range), the tuple is not: "A1:A1000000" has a million entries
+  :param ref: rows in A1-notation, every area must have row bounds
+  :return: a tuple of row indexes
+"""
+def parse_rows(ref):
+    ref = str(ref)
+    rows = set()
+    for area in parse_range(ref):
+        if area.min_row is None:
+            raise ValueError(f"'{ref}' does not reference rows")
+        rows.update(range(area.min_row, area.max_row + 1))
+    return tuple(sorted(rows))
+
+
+""" the sorted column indexes referenced by ref, for example: "A,C:D" -> (1, 3, 4)
+  :param ref: columns in A1-notation, every area must have column bounds
+  :return: a tuple of column indexes
+"""
+@lru_cache(maxsize=4096)
+def parse_columns(ref):
+    columns = set()
+    for area in parse_range(ref):
+        if area.min_col is None:
+            raise ValueError(f"'{ref}' does not reference columns")
+        columns.update(range(area.min_col, area.max_col + 1))
+    return tuple(sorted(columns))
+
+
+""" the set of (row, column) referenced by ref, overlapping areas are counted once
+  the result is not cached: it has one entry per cell and "A:C" with a large max_row is millions of tuples
+  :param ref: A1-notation, may contain several non-contiguous areas
+  :param max_row: the last row used for whole columns such as "A:C"
+  :param max_col: the last column used for whole rows such as "2:5"
+  :return: a frozenset of (row, column)
+"""
+def range_cells(ref, max_row=None, max_col=None):
+    cells = set()
+    for area in parse_range(ref):
+        if (area.min_row is None and max_row is None) or (area.min_col is None and max_col is None):
+            raise ValueError(f"'{ref}' is unbounded, max_row/max_col is required")
+        min_r, max_r = (area.min_row, area.max_row) if area.min_row is not None else (1, max_row)
+        min_c, max_c = (area.min_col, area.max_col) if area.min_col is not None else (1, max_col)
+        cells.update((r, c) for r in range(min_r, max_r + 1) for c in range(min_c, max_c + 1))
+    return frozenset(cells)
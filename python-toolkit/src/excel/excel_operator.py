@@ -1,4 +1,27 @@
+import os
+import copy
+import csv
+import hashlib
+import itertools
+import weakref
 import openpyxl  
+from openpyxl.styles import Font
+
+from . import cell_range
+from . import incremental_save
+from .workbook_cache import WorkbookCache, DEFAULT_MAX_BYTES
+
+# 进程级工作簿缓存, 默认关闭, 通过 enable_workbook_cache() 开启
+_workbook_cache = None
+
+# 从文件加载的工作簿 -> 源文件信息和通过本模块修改过的工作表, 用于增量保存
+_workbook_sources = weakref.WeakKeyDictionary()
+
+default_header_style = {'font': Font(bold=True)}
+
+# read_range_as_frame / read_range_as_array 的快照目录, 为 None 时使用当前用户的缓存目录
+# (~/.cache/python-toolkit/snapshots, Windows 上为 %LOCALAPPDATA%\python-toolkit\snapshots)
+snapshot_dir = None
 
 """ copy sheet partly from src_dir to dst_dir
   :param src_dir: source excel file
@@ -11,20 +34,20 @@ import openpyxl
   :param dst_start_row: dest start row to input content
   :param dst_start_column: dest start column to input content
   :export_file_name: the file to save the result
+  :param copy_styles: also copy cell styles and the merged ranges inside the window
+  :param incremental: only re-serialize the modified sheet, see save_excel
 
   :return: None
 """
 def copy_sheet(src_dir, src_sheetname, src_copy_row, src_copy_column, 
         dst_dir, dst_sheetname, dst_start_row, dst_start_column, 
-        export_file_name="demo.xlsx"):
+        export_file_name="demo.xlsx", copy_styles=False, incremental=False):
     
-    nrows, src_row_start_index = get_src_row_info(src_copy_row)
-    ncolumns, src_column_start_index = get_src_column_info(src_copy_column)
+    src_rows = cell_range.parse_rows(src_copy_row)
+    src_columns = cell_range.parse_columns(src_copy_column)
+    nrows, ncolumns = len(src_rows), len(src_columns)
 
-    wbSrc = openpyxl.load_workbook(filename = src_dir)
-    wsSrc = wbSrc[src_sheetname]
-
-    wbDst = openpyxl.load_workbook(filename = dst_dir)
+    wbDst = _load_for_edit(dst_dir, export_file_name)
     wsDst = wbDst[dst_sheetname]
 
     last_row = dst_start_row + nrows - 1
@@ -35,15 +58,73 @@ def copy_sheet(src_dir, src_sheetname, src_copy_row, src_copy_column,
     if cd < last_columns:
         wsDst.insert_cols(cd + 1, last_columns - cd)
     
-    i, j = src_row_start_index + 1, src_column_start_index + 1
-    for r in range(dst_start_row, last_row + 1):
-        for c in range(dst_start_column, last_columns + 1):
-            wsDst.cell(row=r, column=c).value = wsSrc.cell(row=i, column=j).value
-            j += 1
-        i += 1
-        j = src_column_start_index + 1
+    if copy_styles:
+        # 样式和合并单元格只在完整模式下可读
+        wbSrc = _load_workbook(src_dir)
+        _copy_cells_with_styles(wbSrc[src_sheetname], src_rows, src_columns,
+            wsDst, dst_start_row, dst_start_column)
+    else:
+        # 源文件只读流式打开，一次性把窗口读入紧凑的缓冲区（每行一个 tuple）
+        buffer = list(_iter_selection(src_dir, src_sheetname, src_rows, src_columns))
+        _write_rows(wsDst, buffer, dst_start_row, dst_start_column)
+    _mark_dirty(dst_dir, wbDst, dst_sheetname)
+
+    _save_workbook(wbDst, export_file_name, incremental)
+
+
+def _write_rows(ws, rows, start_row, start_column):
+    # 目标位置紧跟在已有内容之后时直接 append, 省去逐个单元格的查找;
+    # _current_row 是 openpyxl 的内部属性, 没有这个属性时逐个单元格写入
+    current_row = getattr(ws, '_current_row', None)
+    if current_row is not None and start_row == current_row + 1:
+        for values in rows:
+            if start_column == 1:
+                ws.append(values)
+            else:
+                ws.append({c: v for c, v in enumerate(values, start=start_column) if v is not None})
+        return
 
-    wbDst.save(export_file_name)
+    for r, values in enumerate(rows, start=start_row):
+        for c, value in enumerate(values, start=start_column):
+            ws.cell(row=r, column=c).value = value
+
+
+def _copy_cells_with_styles(wsSrc, src_rows, src_columns, wsDst, dst_start_row, dst_start_column):
+    # 源行列号 -> 目标行列号, 不连续的行列在目标中紧凑排列
+    row_map = {r: i for i, r in enumerate(src_rows, start=dst_start_row)}
+    col_map = {c: j for j, c in enumerate(src_columns, start=dst_start_column)}
+    # 同一种源样式只在目标工作簿中注册一次, 之后直接复用样式数组
+    style_map = {}
+    for r, dst_row in row_map.items():
+        for c, dst_column in col_map.items():
+            src_cell = wsSrc.cell(row=r, column=c)
+            dst_cell = wsDst.cell(row=dst_row, column=dst_column)
+            dst_cell.value = src_cell.value
+            if src_cell.has_style:
+                _copy_cell_style(src_cell, dst_cell, style_map)
+
+    # 只复制完整落在所选行列内的合并区域
+    for merged in wsSrc.merged_cells.ranges:
+        if all(r in row_map for r in range(merged.min_row, merged.max_row + 1)) and \
+                all(c in col_map for c in range(merged.min_col, merged.max_col + 1)):
+            wsDst.merge_cells(start_row = row_map[merged.min_row], start_column = col_map[merged.min_col],
+                end_row = row_map[merged.max_row], end_column = col_map[merged.max_col])
+
+
+def _copy_cell_style(src_cell, dst_cell, style_map):
+    key = tuple(src_cell._style)
+    style = style_map.get(key)
+    if style is not None:
+        dst_cell._style = copy.copy(style)
+        return
+
+    dst_cell.font = copy.copy(src_cell.font)
+    dst_cell.fill = copy.copy(src_cell.fill)
+    dst_cell.border = copy.copy(src_cell.border)
+    dst_cell.alignment = copy.copy(src_cell.alignment)
+    dst_cell.protection = copy.copy(src_cell.protection)
+    dst_cell.number_format = src_cell.number_format
+    style_map[key] = copy.copy(dst_cell._style)
 
 """ read successive cells and combine their contents by seperator
   :param filepath: target excel file
@@ -51,46 +132,165 @@ def copy_sheet(src_dir, src_sheetname, src_copy_row, src_copy_column,
   :param rows: the target cell's rows
   :param columns: the target cell's columns
   :param seperator: use to connect each content in cells
+  :param formatter: how non-empty values are turned into text, see iter_cell_texts
   :return: the content combined by seperator
 """
-def read_successive_cells(filepath, sheetname, rows, columns, seperator = "\r\n"):
-    nrows, row_start_index = get_src_row_info(rows)
-    ncolumns, column_start_index = get_src_column_info(columns)
+def read_successive_cells(filepath, sheetname, rows, columns, seperator = "\r\n", formatter = None):
+    return seperator.join(iter_cell_texts(filepath, sheetname, rows, columns, formatter))
 
-    wb = openpyxl.load_workbook(filename = filepath)
-    ws = wb[sheetname]
-    ret = ''
-    
-    # print(row_start_index + 1, row_start_index + nrows, column_start_index + 1, column_start_index + ncolumns)
+
+""" yield the text of each non-empty cell in row-major order, so huge ranges can be
+  written out incrementally instead of being joined into one giant string
+  for example:
+    with open("out.txt", "w") as f:
+        f.writelines(text + "\n" for text in iter_cell_texts("a.xlsx", "Sheet1", "1:1000000", "A"))
+  :param formatter: None means str(value); a callable taking the value; or a dict
+                    {type: callable} such as {float: "{:.2f}".format}, other types use str
+  :return: a generator of str
+"""
+def iter_cell_texts(filepath, sheetname, rows, columns, formatter = None):
+    format_value = _make_formatter(formatter)
+    for row in iter_successive_rows(filepath, sheetname, rows, columns):
+        for value in row:
+            if value is not None:
+                yield format_value(value)
+
+
+def _make_formatter(formatter):
+    if formatter is None:
+        return str
+    if callable(formatter):
+        return formatter
+
+    formatters = dict(formatter)
+    def format_value(value):
+        func = formatters.get(type(value))
+        if func is None:
+            # 子类(例如 bool 之于 int)按注册顺序匹配
+            func = next((f for t, f in formatters.items() if isinstance(value, t)), str)
+            formatters[type(value)] = func
+        return func(value)
+    return format_value
+
+
+""" iterate the values of successive cells row by row without loading the whole workbook
+  :param filepath: target excel file
+  :param sheetname: excel's sheetname
+  :param rows: the target cell's rows, for example: "2:100" or "1,3:5"
+  :param columns: the target cell's columns, for example: "A:C" or "a,c:d"
+  :return: a generator of tuples, one tuple of values per row
+"""
+def iter_successive_rows(filepath, sheetname, rows, columns):
+    return _iter_selection(filepath, sheetname, cell_range.parse_rows(rows), cell_range.parse_columns(columns))
+
+
+""" stream the values of the selected rows and columns, which may be non-contiguous
+  :param rows: sorted row indexes
+  :param columns: sorted column indexes
+"""
+def _iter_selection(filepath, sheetname, rows, columns):
+    min_row, max_row = rows[0], rows[-1]
+    min_col, max_col = columns[0], columns[-1]
     # min_row 等参数下标都是从1开始，不是从0开始
-    for row in ws.iter_rows(min_row = row_start_index + 1, max_row = row_start_index + nrows, min_col = column_start_index + 1, max_col = column_start_index + ncolumns):  
-        for cell in row:
-            if cell.value is not None:
-                ret += cell.value + seperator
+    window = _iter_window(filepath, sheetname, min_row, max_row, min_col, max_col)
+    if max_row - min_row + 1 == len(rows) and max_col - min_col + 1 == len(columns):
+        yield from window
+        return
 
-    return ret.strip(seperator)
+    wanted_rows = set(rows)
+    offsets = [c - min_col for c in columns]
+    for r, values in enumerate(window, start=min_row):
+        if r in wanted_rows:
+            yield tuple(values[i] for i in offsets)
+
+
+""" stream the values in the window [min_row, max_row] x [min_col, max_col] of a sheet
+  The workbook is opened in read-only mode, so only the requested window is parsed and
+  parsing stops right after max_row. Rows missing in the file are yielded as None values.
+  :return: a generator of tuples, one tuple of values per row
+"""
+def _iter_window(filepath, sheetname, min_row, max_row, min_col, max_col):
+    if _workbook_cache is not None:
+        # 开启缓存时读取缓存中的工作簿, 以便看到尚未保存的修改
+        ws = _workbook_cache.get(filepath)[sheetname]
+        yield from ws.iter_rows(min_row = min_row, max_row = max_row, min_col = min_col, max_col = max_col, values_only = True)
+        return
+
+    wb = openpyxl.load_workbook(filename = filepath, read_only = True)
+    try:
+        ws = wb[sheetname]
+        count = 0
+        for row in ws.iter_rows(min_row = min_row, max_row = max_row, min_col = min_col, max_col = max_col, values_only = True):
+            count += 1
+            yield row
+        # 只读模式下, 超出工作表实际行数的部分不会返回, 这里补齐空行
+        empty_row = (None,) * (max_col - min_col + 1)
+        for _ in range(count, max_row - min_row + 1):
+            yield empty_row
+    finally:
+        # 只读模式会一直持有文件句柄, 需要显式关闭
+        wb.close()
+
+
+""" iterate the rows under a header row as dicts keyed by the header cells, for example
+  to feed a mail-merge. Columns without a header and completely empty rows are skipped.
+  :param filepath: target excel file
+  :param sheetname: excel's sheetname, the active sheet if None
+  :param header_row: the row holding the column names
+  :return: a generator of dicts
+"""
+def iter_records(filepath, sheetname=None, header_row=1):
+    if _workbook_cache is not None:
+        wb = _workbook_cache.get(filepath)
+        ws = wb[sheetname] if sheetname else wb.active
+        yield from _iter_records(ws.iter_rows(min_row = header_row, values_only = True))
+        return
+
+    wb = openpyxl.load_workbook(filename = filepath, read_only = True)
+    try:
+        ws = wb[sheetname] if sheetname else wb.active
+        yield from _iter_records(ws.iter_rows(min_row = header_row, values_only = True))
+    finally:
+        wb.close()
+
+
+def _iter_records(rows):
+    header = next(rows, None)
+    if header is None:
+        return
+    fields = [(i, str(name)) for i, name in enumerate(header) if name is not None]
+    for values in rows:
+        if all(v is None for v in values):
+            continue
+        yield {name: values[i] if i < len(values) else None for i, name in fields}
 
 
 """
     :param source: the excel file path or workbook
     :param sheetname: excel's sheetname
     :cell_values: the list of the cells to be modified, for example: [(1, 2, 'A'), (3, 4, 'B')]
+    :param incremental: only rewrite the modified sheets when saving, see save_excel
     :return: the workbook of source if succeed else None
 """
-def write_to_cells(source, sheetname, cell_values, save_to=''):
+def write_to_cells(source, sheetname, cell_values, save_to='', incremental=False):
 
-    wb = openpyxl.load_workbook(filename = source) if isinstance(source, str) else source
+    wb = _load_for_edit(source, save_to)
     ws = wb[sheetname]
 
     r,c = ws.max_row, ws.max_column
+    # 先检查全部位置再写入, 越界时工作簿(可能是缓存中的工作簿)不会被改了一半
+    cells = []
     for v in cell_values:
         row,column = v[0], excel_column_alphabet_to_num(v[1])
         if row > r or column > c:
             raise ValueError("row {0} or column {1} out of bounds".format(row, column))
+        cells.append((row, column, v[2]))
+    for row, column, value in cells:
         # 在Openpyxl中，行和列的编号都是从1开始的，而不是从0开始
-        ws.cell(row=row, column=column).value = v[2]
+        ws.cell(row=row, column=column).value = value
+    _mark_dirty(source, wb, sheetname)
    
-    return wb if save_excel(wb, save_to) == True else None
+    return wb if save_excel(wb, save_to, incremental) == True else None
 
         
 
@@ -99,10 +299,11 @@ def write_to_cells(source, sheetname, cell_values, save_to=''):
   :param sheetname: excel's sheetname
   :param row: the target cell's row
   :param column: the target cell's column
+  :param incremental: only rewrite the modified sheets when saving, see save_excel
   :return: the workbook of source if succeed else None
 """
-def write_to_single_cell(source, sheetname, row, column, content, save_to=''):
-    return write_to_cells(source, sheetname, [(row, column, content)], save_to)
+def write_to_single_cell(source, sheetname, row, column, content, save_to='', incremental=False):
+    return write_to_cells(source, sheetname, [(row, column, content)], save_to, incremental)
 
 
 """ insert rows into source excel sheet from start_row to next count row
@@ -110,34 +311,444 @@ def write_to_single_cell(source, sheetname, row, column, content, save_to=''):
   :param sheetname: excel's sheetname
   :param row: the target cell's row
   :param column: the target cell's column
+  :param incremental: only rewrite the modified sheets when saving, see save_excel
   :return: the workbook of source if succeed else None
 """
-def insert_rows(source, sheetname, start_row, count, cell_values, save_to=''):
-    wb = openpyxl.load_workbook(filename = source) if isinstance(source, str) else source
+def insert_rows(source, sheetname, start_row, count, cell_values, save_to='', incremental=False):
+    wb = _load_for_edit(source, save_to)
     ws = wb[sheetname]
     try:
         ws.insert_rows(start_row, count)
     except Exception as e:
         print(e)
+        _discard_edit(source, wb)
         return None
+    _mark_dirty(source, wb, sheetname)
     
-    return write_to_cells(wb, sheetname, cell_values, save_to)
+    try:
+        return write_to_cells(wb, sheetname, cell_values, save_to, incremental)
+    except Exception:
+        # 行已经插入, 缓存中的工作簿不能再作为文件的工作副本
+        _discard_edit(source, wb)
+        raise
+
+""" open a batched writer on a sheet, the workbook is saved only once when the with-block exits
+  for example:
+    with bulk_write("demo.xlsx", "Sheet1", save_to="out.xlsx") as writer:
+        writer.write_block([[1, 2], [3, 4]], anchor="B3")
+        writer.write_cells([(1, 'A', 'title')])
+  :param source: the excel file path or workbook
+  :param sheetname: excel's sheetname
+  :param save_to: where to save the workbook on exit, nothing is saved if it is empty
+  :param incremental: only rewrite the modified sheets when saving, see save_excel
+  :return: BulkWriter
+"""
+def bulk_write(source, sheetname, save_to='', incremental=False):
+    return BulkWriter(source, sheetname, save_to, incremental)
+
+
+class BulkWriter:
+    """
+    Batched cell writer. Unlike write_to_cells there is no bounds check and no save
+    per call: cells are written in row-major order and wb.save runs once on exit.
+    """
+
+    def __init__(self, source, sheetname, save_to='', incremental=False):
+        self.source = source
+        self.sheetname = sheetname
+        self.save_to = save_to
+        self.incremental = incremental
+        self.wb = _load_for_edit(source, save_to)
+        self.ws = self.wb[sheetname]
+        self.saved = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _mark_dirty(self.source, self.wb, self.sheetname)
+        # 出现异常时不保存, 避免写出一半的结果
+        if exc_type is None:
+            self.saved = save_excel(self.wb, self.save_to, self.incremental)
+        return False
+
+    def write_block(self, block, anchor='A1', header=False):
+        """ write a 2D block whose top-left cell is anchor
+          :param block: list of lists (or any iterable of rows), numpy 2D array or pandas DataFrame
+          :param anchor: the top-left cell, "B3" or (row, column) like (3, 'B') / (3, 2)
+          :param header: write the DataFrame column names as the first row
+          :return: the number of rows written
+        """
+        row, column = _parse_anchor(anchor)
+        ws = self.ws
+        count = 0
+        for r, values in enumerate(_iter_block_rows(block, header), start=row):
+            for c, value in enumerate(values, start=column):
+                ws.cell(row=r, column=c, value=value)
+            count += 1
+        return count
+
+    def write_cells(self, cell_values):
+        """ write many single cells
+          :param cell_values: iterable of (row, column, value), for example: [(1, 2, 'A'), (3, 'D', 'B')]
+        """
+        ws = self.ws
+        for row, column, value in cell_values:
+            ws.cell(row=row, column=excel_column_alphabet_to_num(column), value=_none_if_missing(value))
+
+
+def _parse_anchor(anchor):
+    if isinstance(anchor, str):
+        area = cell_range.parse_range(anchor)[0]
+        return area.min_row, area.min_col
+    row, column = anchor
+    return row, excel_column_alphabet_to_num(column)
+
+
+def _iter_block_rows(block, header=False):
+    if hasattr(block, 'itertuples'):
+        # pandas.DataFrame: NaN 写成空单元格
+        if header:
+            yield tuple(block.columns)
+        block = block.astype(object).where(block.notna(), None)
+        yield from block.itertuples(index=False, name=None)
+        return
+    if hasattr(block, 'tolist'):
+        # numpy.ndarray: 转成 python 原生类型, 一维数组当作一行
+        block = block.tolist()
+        if block and not isinstance(block[0], list):
+            block = [block]
+    for values in block:
+        yield [_none_if_missing(value) for value in values]
+
+
+def _none_if_missing(value):
+    # NaN / NaT 写成空单元格, 与逐个单元格写入的结果一致; NaN 和 NaT 都不等于自身
+    if value is None or isinstance(value, (str, int)):
+        return value
+    try:
+        return None if value != value else value
+    except (TypeError, ValueError):
+        return value
+
 
 '''save workbook wb to the dest_path
     :param wb: workbook to be save
     :param dest_path: where to save the workbook
+    :param incremental: if wb was loaded from an .xlsx file that is unchanged on disk, copy
+        the untouched parts of that file and only serialize the modified sheets again;
+        otherwise (or if the workbook can not be patched) fall back to a full save
     :return True if no error happend
 '''
-def save_excel(wb, dest_path):
+def save_excel(wb, dest_path, incremental=False):
     if (dest_path is not None) and len(dest_path) > 0:
         try:
-            wb.save(dest_path)
+            _save_workbook(wb, dest_path, incremental)
         except Exception as e:
             print(e)
             return False
     return True
 
 
+""" stream rows into a new workbook with constant memory (openpyxl write-only mode)
+  for example:
+    export_rows(csv.reader(f), "out.xlsx", header=next(reader), column_widths={'A': 20})
+    export_rows(pd.read_csv("big.csv", chunksize=10000), "out.xlsx", header=True)
+    export_rows(cursor, "out.xlsx", header=[d[0] for d in cursor.description])
+  :param rows: iterable of rows, or of pandas DataFrame chunks (a DB cursor or csv.reader works too)
+  :param dest_path: where to save the workbook
+  :param sheetname: the sheet's name
+  :param header: list of column names; True means the columns of the first DataFrame chunk
+  :param header_style: dict of openpyxl styles for the header cells, for example: {'font': Font(bold=True)}
+  :param column_widths: {'A': 20, 'B': 12} or [20, 12]
+  :return: the number of data rows written
+"""
+def export_rows(rows, dest_path, sheetname='Sheet1', header=None, header_style=default_header_style, column_widths=None):
+    wb = openpyxl.Workbook(write_only = True)
+    ws = wb.create_sheet(sheetname)
+
+    # 写入模式下列宽必须在写第一行之前设置
+    if column_widths:
+        if not isinstance(column_widths, dict):
+            column_widths = {cell_range.column_letter(i): w for i, w in enumerate(column_widths, start=1) if w}
+        for letters, width in column_widths.items():
+            ws.column_dimensions[letters.upper()].width = width
+
+    rows = iter(rows)
+    if header is True:
+        # DataFrame 分块使用其列名, 否则把第一行当作表头
+        first = next(rows, None)
+        if hasattr(first, 'itertuples'):
+            header = list(first.columns)
+            rows = itertools.chain([first], rows)
+        else:
+            header = first
+    if header:
+        ws.append([_styled_cell(ws, value, header_style) for value in header])
+
+    count = 0
+    for row in _iter_export_rows(rows):
+        ws.append(row)
+        count += 1
+
+    wb.save(dest_path)
+    return count
+
+
+""" stream a CSV file into a new workbook, the first line is used as the header
+  :param csv_path: the CSV file
+  :param dest_path: where to save the workbook
+  :param encoding: the CSV file's encoding
+  :return: the number of data rows written
+"""
+def export_csv(csv_path, dest_path, sheetname='Sheet1', encoding='utf-8-sig', **kwargs):
+    with open(csv_path, 'r', newline='', encoding=encoding) as f:
+        reader = csv.reader(f)
+        return export_rows(reader, dest_path, sheetname, header=next(reader, None), **kwargs)
+
+
+def _iter_export_rows(rows):
+    for item in rows:
+        if hasattr(item, 'itertuples'):
+            # pandas.DataFrame 分块, NaN 写成空单元格
+            yield from _iter_block_rows(item)
+        elif isinstance(item, dict):
+            yield {key: _none_if_missing(value) for key, value in item.items()}
+        else:
+            yield [_none_if_missing(value) for value in item]
+
+
+def _styled_cell(ws, value, style):
+    cell = openpyxl.cell.WriteOnlyCell(ws, value = value)
+    for name, item in (style or {}).items():
+        setattr(cell, name, item)
+    return cell
+
+
+""" read a sheet window into a pandas DataFrame with one typed column per sheet column
+  The window is streamed in read-only mode. Column dtypes are inferred by pandas (int64,
+  float64, datetime64, str ...) and empty cells become NaN/NaT. If pyarrow is installed
+  the result is cached as Parquet in the snapshot directory (see snapshot_dir) and reused
+  for as long as the workbook's mtime and size are unchanged; without pyarrow nothing is
+  cached, pickle is never used because loading it can run arbitrary code.
+  :param filepath: target excel file
+  :param sheetname: excel's sheetname
+  :param rows: the target cell's rows, for example: "1:10000"
+  :param columns: the target cell's columns, for example: "A:F"
+  :param header: use the first row of the window as the column names
+  :param cache: read/write the snapshot cache
+  :return: pandas.DataFrame
+"""
+def read_range_as_frame(filepath, sheetname, rows, columns, header=True, cache=True):
+    import pandas as pd
+
+    cache_path = None
+    if cache and _parquet_available():
+        cache_path = _snapshot_path(filepath, (sheetname, rows, columns, header), 'parquet')
+    if cache_path and os.path.exists(cache_path):
+        return pd.read_parquet(cache_path)
+
+    values = iter_successive_rows(filepath, sheetname, rows, columns)
+    names = None
+    if header:
+        names = [str(v) if v is not None else cell_range.column_letter(c)
+            for v, c in zip(next(values, ()), cell_range.parse_columns(columns))]
+    frame = pd.DataFrame.from_records(list(values), columns=names)
+    # 空单元格统一为 NaN
+    frame = frame.where(frame.notna(), float('nan'))
+
+    if cache_path:
+        _write_snapshot(cache_path, frame.to_parquet)
+    return frame
+
+
+""" read a sheet window into a 2D NumPy array, the window must not contain a header row
+  The array is float64 (empty cells are NaN) when every column is numeric, otherwise object.
+  Numeric arrays are cached as .npy (without pickle) like read_range_as_frame, object
+  arrays are not cached.
+  :param dtype: force the dtype of the array
+  :return: numpy.ndarray
+"""
+def read_range_as_array(filepath, sheetname, rows, columns, dtype=None, cache=True):
+    import numpy as np
+    from pandas.api.types import is_numeric_dtype
+
+    cache_path = _snapshot_path(filepath, (sheetname, rows, columns, str(dtype)), 'npy') if cache else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            return np.load(cache_path, allow_pickle=False)
+        except ValueError:
+            # 不是数值数组的快照, 不加载
+            pass
+
+    frame = read_range_as_frame(filepath, sheetname, rows, columns, header=False, cache=False)
+    if dtype is None and all(is_numeric_dtype(t) for t in frame.dtypes):
+        dtype = np.float64
+    array = frame.to_numpy(dtype=dtype if dtype is not None else object)
+
+    if cache_path and array.dtype != object:
+        _write_snapshot(cache_path, lambda path: np.save(path, array, allow_pickle=False))
+    return array
+
+
+def _parquet_available():
+    try:
+        import pyarrow
+        return True
+    except ImportError:
+        return False
+
+
+def _snapshot_dir():
+    if snapshot_dir:
+        return snapshot_dir
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'python-toolkit', 'snapshots')
+
+
+def _snapshot_path(filepath, window, ext):
+    # 开启工作簿缓存时内存中可能有未保存的修改, 磁盘快照不可信
+    if _workbook_cache is not None:
+        return None
+    st = os.stat(filepath)
+    # 快照放在当前用户自己的缓存目录中, 不写在工作簿旁边(共享目录中其他人可以放入伪造的文件)
+    path_key = hashlib.sha1(os.path.abspath(filepath).encode('utf-8')).hexdigest()[:16]
+    window_key = hashlib.sha1(repr(window).encode('utf-8')).hexdigest()[:12]
+    source_key = hashlib.sha1(f"{st.st_mtime_ns}:{st.st_size}".encode('utf-8')).hexdigest()[:12]
+    return os.path.join(_snapshot_dir(), f"{path_key}.{window_key}.{source_key}.{ext}")
+
+
+def _write_snapshot(cache_path, write):
+    dirname = os.path.dirname(cache_path)
+    try:
+        os.makedirs(dirname, mode=0o700, exist_ok=True)
+        # 删除同一窗口基于旧版本工作簿的快照
+        prefix = cache_path.rsplit('.', 2)[0] + '.'
+        for name in os.listdir(dirname):
+            path = os.path.join(dirname, name)
+            if path.startswith(prefix) and path != cache_path:
+                os.remove(path)
+        write(cache_path)
+    except Exception as e:
+        # 缓存写入失败不影响读取结果
+        print(e)
+
+
+""" enable the process-wide workbook cache used by the functions taking a file path
+  Repeated operations on the same file then parse it only once, as long as its
+  mtime and size are unchanged. The cached workbook keeps the modifications made
+  by write_to_cells/insert_rows/copy_sheet until it is flushed or evicted.
+  :param max_bytes: approximate memory budget, the least recently used workbooks are evicted beyond it
+  :param save_on_evict: save dirty workbooks back to their own path when evicted
+  :return: the WorkbookCache
+"""
+def enable_workbook_cache(max_bytes=DEFAULT_MAX_BYTES, save_on_evict=False):
+    global _workbook_cache
+    if _workbook_cache is None:
+        _workbook_cache = WorkbookCache(max_bytes, save_on_evict)
+    else:
+        _workbook_cache.max_bytes = max_bytes
+        _workbook_cache.save_on_evict = save_on_evict
+    return _workbook_cache
+
+
+""" disable the workbook cache
+  :param flush: save dirty workbooks back to their own path before dropping the cache
+"""
+def disable_workbook_cache(flush=False):
+    global _workbook_cache
+    if _workbook_cache is None:
+        return
+    if flush:
+        _workbook_cache.flush()
+    _workbook_cache = None
+
+
+""" save dirty cached workbooks back to their files
+  :param path: only flush this file if given
+"""
+def flush_workbook_cache(path=None):
+    if _workbook_cache is not None:
+        _workbook_cache.flush(path)
+
+
+def _load_workbook(source):
+    if not isinstance(source, str):
+        return source
+    if _workbook_cache is not None:
+        wb = _workbook_cache.get(source)
+    else:
+        wb = openpyxl.load_workbook(filename = source)
+    if wb not in _workbook_sources:
+        _track_source(wb, source)
+    return wb
+
+
+def _load_for_edit(source, save_to=''):
+    # 修改结果保存到其它文件时不能改动缓存中的工作簿, 否则修改会被当作 source 的修改写回
+    if not isinstance(source, str) or _workbook_cache is None or _saves_in_place(source, save_to):
+        return _load_workbook(source)
+    wb, from_memory = _workbook_cache.load_copy(source)
+    if not from_memory:
+        # 副本包含内存中未保存的修改时与磁盘上的文件不同, 不能增量保存
+        _track_source(wb, source)
+    return wb
+
+
+def _saves_in_place(source, save_to):
+    return not save_to or os.path.abspath(save_to) == os.path.abspath(source)
+
+
+def _discard_edit(source, wb):
+    if _workbook_cache is not None and isinstance(source, str):
+        _workbook_cache.discard(source, wb)
+
+
+def _mark_dirty(source, wb, sheetname):
+    if _workbook_cache is not None and isinstance(source, str):
+        _workbook_cache.mark_dirty(source, wb)
+    tracked = _workbook_sources.get(wb)
+    if tracked is not None:
+        tracked['dirty'].add(sheetname)
+
+
+def _save_workbook(wb, dest_path, incremental=False):
+    tracked = _workbook_sources.get(wb)
+    saved = False
+    if incremental and tracked is not None and _source_unchanged(tracked):
+        saved = incremental_save.save_incremental(wb, tracked['path'], dest_path, tracked['dirty'])
+    if not saved:
+        wb.save(dest_path)
+    _notify_saved(dest_path, wb)
+
+
+def _notify_saved(dest_path, wb):
+    if _workbook_cache is not None:
+        _workbook_cache.notify_saved(dest_path, wb)
+    # 保存后的文件与内存中的工作簿一致, 以它作为下次增量保存的基准
+    _track_source(wb, dest_path)
+
+
+def _track_source(wb, path):
+    path = os.path.abspath(path)
+    if not path.lower().endswith(('.xlsx', '.xlsm')):
+        _workbook_sources.pop(wb, None)
+        return
+    st = os.stat(path)
+    _workbook_sources[wb] = {'path': path, 'mtime': st.st_mtime_ns, 'size': st.st_size, 'dirty': set()}
+
+
+def _source_unchanged(tracked):
+    try:
+        st = os.stat(tracked['path'])
+    except OSError:
+        return False
+    return st.st_mtime_ns == tracked['mtime'] and st.st_size == tracked['size']
+
+
 """ parse the row info
   :param src_copy_row: which rows to be parsed.
   :return nrows: the num of rows
@@ -145,54 +756,27 @@ def save_excel(wb, dest_path):
   for example: input "1:2" would return 2,0
 """
 def get_src_row_info(src_copy_row):
-    src_copy_row_array = src_copy_row.split(":")
-    if len(src_copy_row_array) == 1:
-        return 1, int(src_copy_row_array[0]) - 1
-    src_copy_row_start = int(src_copy_row_array[0])
-    src_copy_row_end = int(src_copy_row_array[1])
-    nrows = src_copy_row_end - src_copy_row_start + 1
-    return nrows, src_copy_row_start - 1
-    
-
+    rows = cell_range.parse_rows(src_copy_row)
+    return len(rows), rows[0] - 1
 
-excel_col_alphabet_num_map = {
-    'A': 1, 'B': 2, 'C': 3, 'D': 4,
-    'E': 5, 'F': 6, 'G': 7, 'H': 8,
-    'I': 9, 'J': 10, 'K': 11, 'L': 12,
-    'M': 13, 'N': 14, 'O': 15, 'P': 16,
-    'Q': 17, 'R': 18, 'S': 19, 'T': 20,
-    'U': 21, 'V': 22, 'W': 23, 'X': 24,
-    'Y': 25, 'Z': 26,
-}
-
-BASE = 26
 
 """ parse the column info
   :param src_copy_column: which columns to be parsed.
   :return nrows: the num of columns
   :return  start: the start index of column
-  for example: input "A:C" would return 3,0
+  for example: input "A:C" would return 3,0, input "A,C:D" would return 3,0
 """
 def get_src_column_info(src_copy_column):
-    total = 0
-    start = -1
-    for part in src_copy_column.split(","):
-        src_copy_columns = part.split(":")
-        if len(src_copy_columns) == 1:
-            total += 1
-        else:
-            total += excel_column_alphabet_to_num(src_copy_columns[1]) - excel_column_alphabet_to_num(src_copy_columns[0]) + 1
-        if start == -1:
-            start = excel_column_alphabet_to_num(src_copy_columns[0]) - 1
-    return total, start
+    columns = cell_range.parse_columns(src_copy_column)
+    return len(columns), columns[0] - 1
+
+# 旧的列字母对照表和进制, 列号转换已改由 cell_range 完成, 保留这两个名字兼容外部代码
+excel_col_alphabet_num_map = {cell_range.column_letter(i): i for i in range(1, cell_range.BASE + 1)}
+BASE = cell_range.BASE
 
 def excel_column_alphabet_to_num(s):
     if isinstance(s, int):
         return s
     if not isinstance(s, str):
         raise ValueError("s is not int or str")
-
-    c = 0
-    for i in range(0, len(s)):
-        c += excel_col_alphabet_num_map[s[i]] * pow(BASE, len(s) - i - 1)
-    return c
\ No newline at end of file
+    return cell_range.column_index(s)
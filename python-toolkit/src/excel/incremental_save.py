@@ -0,0 +1,159 @@
+""" incremental save of a workbook loaded from an existing .xlsx
+  Only the worksheets modified in memory are serialized again. Every other ZIP member
+  (untouched worksheets, shared strings, theme, doc props ...) is copied from the original
+  archive with identical content, so the cost of a save no longer grows with the number of
+  sheets. openpyxl writes strings inline, so the original sharedStrings.xml stays valid for
+  the untouched sheets; styles.xml is re-serialized only if new cell styles were added.
+"""
+
+import os
+import shutil
+import tempfile
+import zipfile
+
+from openpyxl.packaging.manifest import Manifest
+from openpyxl.reader.workbook import WorkbookParser
+from openpyxl.reader.excel import _find_workbook_part
+from openpyxl.styles.stylesheet import write_stylesheet
+from openpyxl.worksheet._writer import WorksheetWriter
+from openpyxl.xml.constants import ARC_CONTENT_TYPES, SHEET_MAIN_NS
+from openpyxl.xml.functions import fromstring, tostring
+
+
+""" save wb to dest_path by patching the archive it was loaded from
+  :param wb: the workbook loaded from source_path
+  :param source_path: the original .xlsx file
+  :param dest_path: where to save, may be the same as source_path
+  :param dirty_sheets: the names of the worksheets modified since loading
+  :return: True if saved, False if the workbook can not be saved incrementally
+           (the caller should fall back to wb.save)
+"""
+def save_incremental(wb, source_path, dest_path, dirty_sheets):
+    with zipfile.ZipFile(source_path) as archive:
+        parts = _read_parts(archive)
+        if parts is None or list(parts['sheets']) != wb.sheetnames:
+            # 工作表被增删或改名, 需要完整保存
+            return False
+
+        replaced = {}
+        for name in dirty_sheets:
+            xml = _serialize_sheet(wb[name])
+            if xml is None:
+                return False
+            replaced[parts['sheets'][name]] = xml
+
+        if len(wb._cell_styles) != parts['cell_style_count']:
+            if parts['styles'] is None:
+                return False
+            replaced[parts['styles']] = tostring(write_stylesheet(wb))
+
+        dropped = set()
+        if replaced and parts['calc_chain'] is not None:
+            # 计算链可能引用已不是公式的单元格, 删掉后由 Excel 重新生成
+            dropped.add(parts['calc_chain'])
+            replaced[ARC_CONTENT_TYPES] = _drop_content_type(archive.read(ARC_CONTENT_TYPES), parts['calc_chain'])
+            replaced[parts['workbook_rels']] = _drop_relationship(archive.read(parts['workbook_rels']), parts['calc_chain_id'])
+
+        dirname = os.path.dirname(os.path.abspath(dest_path))
+        fd, tmp_path = tempfile.mkstemp(suffix='.xlsx', dir=dirname)
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as out:
+                for info in archive.infolist():
+                    if info.filename in dropped:
+                        continue
+                    new_info = _clone_info(info)
+                    if info.filename in replaced:
+                        out.writestr(new_info, replaced[info.filename])
+                    elif info.is_dir():
+                        out.writestr(new_info, b'')
+                    else:
+                        # 未修改的部件原样复制, 不做 XML 解析
+                        with archive.open(info) as src, out.open(new_info, 'w') as dst:
+                            shutil.copyfileobj(src, dst, 1024 * 1024)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    os.replace(tmp_path, dest_path)
+    return True
+
+
+def _read_parts(archive):
+    try:
+        package = Manifest.from_tree(fromstring(archive.read(ARC_CONTENT_TYPES)))
+        workbook_part = _find_workbook_part(package)
+    except (KeyError, IOError):
+        return None
+
+    parser = WorkbookParser(archive, workbook_part.PartName[1:])
+    parser.parse()
+    parts = {
+        'sheets': {},
+        'styles': None,
+        'calc_chain': None,
+        'calc_chain_id': None,
+        'workbook_rels': _rels_path(workbook_part.PartName[1:]),
+        'cell_style_count': 0,
+    }
+    for sheet, rel in parser.find_sheets():
+        parts['sheets'][sheet.name] = rel.target.lstrip('/')
+    for rel in parser.rels.values():
+        if rel.Type.endswith('/styles'):
+            parts['styles'] = rel.target.lstrip('/')
+        elif rel.Type.endswith('/calcChain'):
+            parts['calc_chain'] = rel.target.lstrip('/')
+            parts['calc_chain_id'] = rel.Id
+
+    if parts['styles'] is not None:
+        styles = fromstring(archive.read(parts['styles']))
+        cell_xfs = styles.find(f'{{{SHEET_MAIN_NS}}}cellXfs')
+        if cell_xfs is not None:
+            parts['cell_style_count'] = len(cell_xfs)
+    return parts
+
+
+def _serialize_sheet(ws):
+    # 只处理纯单元格数据的工作表, 带图片/批注/超链接等关系的交给完整保存
+    if ws.legacy_drawing is not None or ws._images or ws._charts or ws._pivots or ws.tables:
+        return None
+    if any(cell.comment is not None for cell in ws._cells.values()):
+        return None
+
+    writer = WorksheetWriter(ws)
+    try:
+        writer.write()
+        if writer._rels:
+            return None
+        with open(writer.out, 'rb') as f:
+            return f.read()
+    finally:
+        writer.cleanup()
+
+
+def _clone_info(info):
+    new_info = zipfile.ZipInfo(info.filename, info.date_time)
+    new_info.compress_type = zipfile.ZIP_DEFLATED
+    new_info.external_attr = info.external_attr
+    return new_info
+
+
+def _rels_path(part_name):
+    dirname, basename = os.path.split(part_name)
+    return f"{dirname}/_rels/{basename}.rels" if dirname else f"_rels/{basename}.rels"
+
+
+def _drop_content_type(xml, part_name):
+    tree = fromstring(xml)
+    for node in list(tree):
+        if node.get('PartName') == '/' + part_name:
+            tree.remove(node)
+    return tostring(tree)
+
+
+def _drop_relationship(xml, rel_id):
+    tree = fromstring(xml)
+    for node in list(tree):
+        if node.get('Id') == rel_id:
+            tree.remove(node)
+    return tostring(tree)
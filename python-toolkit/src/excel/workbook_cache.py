@@ -0,0 +1,187 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import openpyxl
+
+# 一个已加载单元格在内存中大约占用的字节数（Cell 对象 + 值 + 坐标索引的粗略估算）
+CELL_FOOTPRINT = 600
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class _Entry:
+    __slots__ = ('wb', 'mtime', 'size', 'nbytes', 'dirty')
+
+    def __init__(self, wb, mtime, size, nbytes):
+        self.wb = wb
+        self.mtime = mtime
+        self.size = size
+        self.nbytes = nbytes
+        self.dirty = False
+
+
+class WorkbookCache:
+    """
+    Process-wide cache of parsed workbooks keyed by absolute path.
+
+    An entry is valid as long as the file's mtime and size are unchanged, so a
+    file modified by someone else is parsed again on the next get(). Entries are
+    evicted in LRU order once the approximate memory footprint exceeds max_bytes.
+
+    The cached workbook is the working copy of the file: changes made through
+    excel_operator are kept in memory and marked dirty. Dirty workbooks are only
+    written back to their own path by flush(), or on eviction when save_on_evict
+    is True; otherwise the in-memory changes are dropped on eviction. Edits that
+    are saved to another path are made on a private copy (see load_copy) and
+    never touch the cached workbook.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, save_on_evict: bool = False):
+        self.max_bytes = max_bytes
+        self.save_on_evict = save_on_evict
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+    def get(self, path: str):
+        """return the cached workbook of path, parsing the file only if needed"""
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.mtime == st.st_mtime_ns and entry.size == st.st_size:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.wb
+                # 文件在外部被修改，缓存失效
+                if entry.dirty:
+                    print(f"警告：{key} 已在磁盘上被修改，丢弃内存中未保存的修改")
+                self._remove(key)
+
+            self.misses += 1
+            wb = openpyxl.load_workbook(filename = key)
+            entry = _Entry(wb, st.st_mtime_ns, st.st_size, _estimate_size(wb, st.st_size))
+            self._entries[key] = entry
+            self._total_bytes += entry.nbytes
+            self._shrink()
+            return wb
+
+    def load_copy(self, path: str):
+        """return (wb, from_memory): a private copy of the workbook of path
+        The copy includes the unsaved in-memory changes of a dirty entry (from_memory
+        is True), otherwise it is parsed from the file and the cache is left untouched.
+        """
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.dirty:
+                buffer = io.BytesIO()
+                entry.wb.save(buffer)
+                buffer.seek(0)
+                return openpyxl.load_workbook(buffer), True
+        return openpyxl.load_workbook(filename = key), False
+
+    def mark_dirty(self, path: str, wb=None):
+        """record that the cached workbook of path has been modified in memory
+        if wb is given, nothing is marked unless wb is the cached workbook itself
+        """
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (wb is not None and entry.wb is not wb):
+                return
+            entry.dirty = True
+            # 写入可能新增了单元格，重新估算占用
+            nbytes = _estimate_size(entry.wb, entry.size)
+            self._total_bytes += nbytes - entry.nbytes
+            entry.nbytes = nbytes
+            self._shrink()
+
+    def notify_saved(self, path: str, wb):
+        """keep the entry of path valid after wb has been saved to path"""
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.wb is not wb:
+                # 其它工作簿覆盖了该文件，下次 get() 时会因 mtime 变化而重新加载
+                return
+            st = os.stat(key)
+            entry.mtime, entry.size = st.st_mtime_ns, st.st_size
+            entry.dirty = False
+
+    def flush(self, path: str = None):
+        """save dirty workbooks back to their files, all of them if path is None"""
+        with self._lock:
+            keys = [os.path.abspath(path)] if path is not None else list(self._entries)
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry.dirty:
+                    self._save(key, entry)
+
+    def discard(self, path: str, wb=None):
+        """drop the entry of path without saving it, e.g. after a failed edit left it half-modified
+        if wb is given, the entry is only dropped when it holds wb
+        """
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (wb is not None and entry.wb is not wb):
+                return
+            if entry.dirty:
+                print(f"警告：丢弃 {key} 在内存中未保存的修改")
+            self._remove(key)
+
+    def evict(self, path: str):
+        """drop the entry of path, applying the save_on_evict policy"""
+        key = os.path.abspath(path)
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+
+    def clear(self):
+        """evict every entry, applying the save_on_evict policy"""
+        with self._lock:
+            for key in list(self._entries):
+                self._evict(key)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __contains__(self, path) -> bool:
+        return os.path.abspath(path) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _shrink(self):
+        # 至少保留最近使用的一个工作簿
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            self._evict(key)
+
+    def _evict(self, key):
+        entry = self._entries[key]
+        if entry.dirty and self.save_on_evict:
+            self._save(key, entry)
+        self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry.nbytes
+
+    def _save(self, key, entry):
+        entry.wb.save(key)
+        st = os.stat(key)
+        entry.mtime, entry.size = st.st_mtime_ns, st.st_size
+        entry.dirty = False
+
+
+def _estimate_size(wb, file_size):
+    ncells = sum(len(ws._cells) for ws in wb.worksheets if hasattr(ws, '_cells'))
+    return max(ncells * CELL_FOOTPRINT, file_size)
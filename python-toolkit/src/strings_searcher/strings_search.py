@@ -5,17 +5,210 @@
 工程字符串搜索工具
 根据配置文件中的字符串列表，在指定目录中搜索所有文本文件，
 记录每个字符串出现的文件路径和行号，输出到CSV文件。
+
+    python strings_search.py -c config.json -o search_results.csv
+    python strings_search.py index -c config.json             # 为配置中的目录建立三元组索引
+    python strings_search.py query TRADE_CODE_123 退款         # 用索引快速查找
 """
 
 import os
+import re
+import mmap
+import hashlib
+import sqlite3
 import json
 import csv
+import time
 import argparse
-from typing import List, Dict, Tuple
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Dict, Tuple
 
 # 默认忽略的目录（可被配置覆盖）
 DEFAULT_IGNORE_DIRS = {'.git', '.svn', '.hg', '__pycache__', 'node_modules', 'dist', 'build', 'venv', 'env'}
 
+# 默认按二进制文件跳过的扩展名（可在配置中用 binary_extensions 增加, text_extensions 排除）
+DEFAULT_BINARY_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.tif', '.tiff', '.psd',
+    '.mp3', '.mp4', '.avi', '.mov', '.wav', '.flac', '.ogg',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.tar', '.jar', '.war', '.whl',
+    '.exe', '.dll', '.so', '.dylib', '.a', '.lib', '.o', '.obj', '.class', '.pyc', '.pyo',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.ttf', '.otf', '.woff', '.woff2', '.eot', '.db', '.sqlite', '.bin', '.dat',
+}
+
+# 检查文件开头多少字节来判断是否为二进制文件
+SNIFF_SIZE = 8192
+# 不小于该大小的文件用 mmap 搜索, 不整个读入内存
+MMAP_THRESHOLD = 1024 * 1024
+
+_INDEX_SCHEMA = '''
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL
+);
+CREATE TABLE postings (
+    trigram INTEGER NOT NULL,
+    first_id INTEGER NOT NULL,
+    ids BLOB NOT NULL,
+    PRIMARY KEY (trigram, first_id)
+) WITHOUT ROWID;
+'''
+
+# 结果输出每写入多少条或每隔多少秒刷新一次到磁盘
+SINK_FLUSH_ROWS = 10000
+SINK_FLUSH_SECONDS = 2.0
+
+# 建立索引时每读取多少个文件把倒排表写入一次, 以及每次最多处理的字节数
+INDEX_FLUSH_FILES = 5000
+TRIGRAM_CHUNK_SIZE = 16 * 1024 * 1024
+# 候选文件少于该数量时在当前进程中校验, 不启动进程池
+QUERY_PARALLEL_THRESHOLD = 256
+
+_CACHE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha1 TEXT,
+    hits TEXT NOT NULL,
+    generation INTEGER NOT NULL
+) WITHOUT ROWID;
+'''
+
+# 每个任务包含的文件数, 以及每个工作进程最多排队的任务数
+BATCH_SIZE = 64
+MAX_PENDING_PER_WORKER = 4
+
+# 工作进程内的匹配器、二进制文件过滤器和每个文件的命中上限, 由 _init_worker 设置
+_matcher = None
+_binary_filter = None
+_max_hits_per_file = None
+
+
+class StringMatcher:
+    """
+    把所有目标字符串编译为一个正则, 一次扫描找出文本中每行包含的全部字符串
+    字符串按前缀树合并为一个分支结构的表达式(同前缀只比较一次), 放在前瞻中逐位置匹配,
+    这样每个位置得到从该处开始的最长字符串, 再补上它的前缀中同样是目标字符串的部分,
+    结果与逐行逐个字符串做 `s in line` 相同, 效果等同于 Aho–Corasick 自动机。
+    同时编译一个按 UTF-8 字节匹配的版本, 可以直接在 bytes 或 mmap 上搜索, 不需要解码。
+    """
+
+    def __init__(self, strings: List[str]):
+        # 去重并保持配置中的顺序, 空字符串没有意义
+        self.strings = list(dict.fromkeys(s for s in strings if s))
+        self._order = {s: i for i, s in enumerate(self.strings)}
+        targets = set(self.strings)
+        # 每个字符串的前缀中也是目标字符串的部分(包括自身)
+        self._prefixes = {s: [s[:n] for n in range(1, len(s) + 1) if s[:n] in targets] for s in self.strings}
+        self._byte_prefixes = {s.encode('utf-8'): prefixes for s, prefixes in self._prefixes.items()}
+        self.pattern = self.bytes_pattern = None
+        if self.strings:
+            self.pattern = re.compile('(?=(' + _trie_regex(self.strings) + '))')
+            # 每个字节当作一个 latin-1 字符构造表达式, 再编码回字节
+            keys = [k.decode('latin-1') for k in self._byte_prefixes]
+            self.bytes_pattern = re.compile(('(?=(' + _trie_regex(keys) + '))').encode('latin-1'))
+
+    def search(self, data, limit: int = None) -> List[Tuple[str, int]]:
+        """
+        在 str、bytes 或 mmap 中搜索, 找到 limit 处匹配后不再继续
+        返回列表，元素为 (匹配到的字符串, 行号), 同一行中按配置顺序排列, 每行每个字符串只记录一次
+        """
+        if self.pattern is None:
+            return []
+        if isinstance(data, str):
+            pattern, prefixes, newline = self.pattern, self._prefixes, '\n'
+        else:
+            pattern, prefixes, newline = self.bytes_pattern, self._byte_prefixes, b'\n'
+        if isinstance(data, (str, bytes)):
+            count = data.count
+        else:
+            # mmap 没有带区间的 count, 只复制两次命中之间的部分
+            def count(sub, start, end):
+                return data[start:end].count(sub)
+
+        matches = []
+        line_num, line_start = 1, 0
+        found = set()
+        for m in pattern.finditer(data):
+            pos = m.start()
+            if pos > line_start:
+                # 行号只在命中时计算: 数出上一个命中到这里的换行数
+                newlines = count(newline, line_start, pos)
+                if newlines:
+                    # 进入新的一行, 输出上一行的结果
+                    matches.extend((s, line_num) for s in sorted(found, key=self._order.get))
+                    if limit is not None and len(matches) >= limit:
+                        return matches[:limit]
+                    found.clear()
+                    line_num += newlines
+                line_start = pos
+            found.update(prefixes[m.group(1)])
+        matches.extend((s, line_num) for s in sorted(found, key=self._order.get))
+        return matches[:limit] if limit is not None else matches
+
+
+class BinaryFilter:
+    """
+    判断文件是否为二进制文件: 先看扩展名, 再看文件开头是否有 NUL 字节
+    text_extensions 中的扩展名总是当作文本搜索, 优先于 binary_extensions 和内容检查
+    """
+
+    def __init__(self, binary_extensions: Iterable[str] = (), text_extensions: Iterable[str] = ()):
+        self.text_extensions = {_normalize_extension(e) for e in text_extensions}
+        self.binary_extensions = (DEFAULT_BINARY_EXTENSIONS
+                                  | {_normalize_extension(e) for e in binary_extensions}) - self.text_extensions
+
+    def skip_by_name(self, file_path: str) -> bool:
+        """按扩展名即可确定是二进制文件, 不需要打开"""
+        return os.path.splitext(file_path)[1].lower() in self.binary_extensions
+
+    def is_binary(self, file_path: str, head: bytes) -> bool:
+        """head 为文件开头的 SNIFF_SIZE 个字节"""
+        if os.path.splitext(file_path)[1].lower() in self.text_extensions:
+            return False
+        return b'\0' in head
+
+
+def _normalize_extension(ext: str) -> str:
+    ext = ext.lower()
+    return ext if ext.startswith('.') else '.' + ext
+
+
+def _trie_regex(strings: List[str]) -> str:
+    """把字符串列表转换为按前缀树展开的正则, 较长的分支优先"""
+    trie = {}
+    for s in strings:
+        node = trie
+        for ch in s:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+    return _node_regex(trie)
+
+
+def _node_regex(node: Dict) -> str:
+    # 没有分叉的一段直接拼接, 递归深度只和分叉的层数有关
+    chain = []
+    while len(node) == 1 and '' not in node:
+        (ch, node), = node.items()
+        chain.append(re.escape(ch))
+    end = '' in node
+    branches = [re.escape(ch) + _node_regex(child) for ch, child in node.items() if ch]
+    if not branches:
+        rest = ''
+    elif len(branches) == 1:
+        rest = f'(?:{branches[0]})?' if end else branches[0]
+    else:
+        rest = '(?:' + '|'.join(branches) + ')' + ('?' if end else '')
+    return ''.join(chain) + rest
+
 
 def load_config(config_path: str) -> Dict:
     """加载JSON配置文件"""
@@ -37,33 +230,628 @@ def should_ignore_dir(dir_name: str, ignore_set: set) -> bool:
     return dir_name in ignore_set
 
 
-def search_in_file(file_path: str, strings: List[str]) -> List[Tuple[str, int]]:
+def search_in_file(file_path: str, strings: List[str], binary_filter: BinaryFilter = None) -> List[Tuple[str, int]]:
     """
     在文件中搜索所有目标字符串
+    binary_filter 不为 None 时跳过二进制文件
     返回列表，元素为 (匹配到的字符串, 行号)
     """
-    matches = []
+    return _search_file(file_path, _get_matcher(tuple(strings)), binary_filter)
+
+
+@lru_cache(maxsize=8)
+def _get_matcher(strings: Tuple[str, ...]) -> StringMatcher:
+    return StringMatcher(list(strings))
+
+
+def _search_file(file_path: str, matcher: StringMatcher, binary_filter: BinaryFilter = None) -> List[Tuple[str, int]]:
+    return _scan_file(file_path, matcher, binary_filter)[0]
+
+
+def _scan_file(file_path: str, matcher: StringMatcher, binary_filter: BinaryFilter = None,
+               hashed: bool = False, known_digest: str = None, limit: int = None):
+    """
+    返回 (命中列表, 文件信息), 文件信息为 (size, mtime_ns, sha1), 读取失败时为 None
+    hashed 为 True 时计算内容的 sha1; 与 known_digest 相同说明内容没变, 不再搜索, 命中列表为 None
+    limit 为每个文件最多记录的命中数
+    """
     try:
-        # 以只读方式打开，忽略解码错误
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for line_num, line in enumerate(f, start=1):
-                for s in strings:
-                    if s in line:
-                        matches.append((s, line_num))
-        return matches
-    except (PermissionError, OSError) as e:
+        if binary_filter is not None and binary_filter.skip_by_name(file_path):
+            return [], _file_info(os.stat(file_path), None) if hashed else None
+        # 按字节搜索 UTF-8 编码的字符串, 不解码; 整个文件一次匹配, 只为命中计算行号
+        with open(file_path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            head = f.read(SNIFF_SIZE)
+            if binary_filter is not None and binary_filter.is_binary(file_path, head):
+                return [], _file_info(st, None)
+            if len(head) < SNIFF_SIZE:
+                return _search_data(head, matcher, st, hashed, known_digest, limit)
+            if st.st_size < MMAP_THRESHOLD:
+                return _search_data(head + f.read(), matcher, st, hashed, known_digest, limit)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _search_data(data, matcher, st, hashed, known_digest, limit)
+    except (PermissionError, OSError, ValueError) as e:
         # 权限不足或无法访问时跳过
         print(f"警告：无法读取文件 {file_path} - {e}")
-        return []
+        return [], None
+
+
+def _search_data(data, matcher: StringMatcher, st: os.stat_result, hashed: bool, known_digest: str, limit: int):
+    digest = hashlib.sha1(data).hexdigest() if hashed else None
+    if digest is not None and digest == known_digest:
+        return None, _file_info(st, digest)
+    return matcher.search(data, limit), _file_info(st, digest)
+
+
+def _file_info(st: os.stat_result, digest: str):
+    return st.st_size, st.st_mtime_ns, digest
+
+
+class SearchCache:
+    """
+    跨多次运行的搜索结果缓存, 保存在一个 SQLite 文件中
+    每个文件记录 (路径, 大小, 修改时间, 内容 sha1, 命中列表); 大小和修改时间都没变的文件直接使用缓存的结果,
+    变了的文件先比较 sha1, 内容相同(只是被 touch 或重新检出)时也不再搜索。
+    key 描述搜索条件(目标字符串、二进制文件设置和每个文件的命中上限), 与缓存中的不同时清空缓存。
+    """
+
+    # 每处理多少个文件提交一次, 中途中断时已完成的部分仍然有效
+    COMMIT_INTERVAL = 1000
+
+    def __init__(self, cache_path: str, key: str):
+        self.cache_path = cache_path
+        self.stats = {'cached': 0, 'scanned': 0, 'removed': 0}
+        self._conn = sqlite3.connect(cache_path)
+        self._conn.executescript(_CACHE_SCHEMA)
+        with self._conn:
+            if self._get_meta('key') != key:
+                self._conn.execute('DELETE FROM files')
+                self._set_meta('key', key)
+            # 每次运行使用新的批次号, 运行结束时删除本次没有遇到的文件
+            self._generation = int(self._get_meta('generation') or 0) + 1
+            self._set_meta('generation', str(self._generation))
+        self._seen = []
+        self._updates = []
+
+    @staticmethod
+    def make_key(strings: List[str], binary_filter: BinaryFilter = None, max_hits_per_file: int = None) -> str:
+        """根据搜索条件生成缓存的 key"""
+        settings = {'strings': list(strings), 'version': 1, 'max_hits_per_file': max_hits_per_file}
+        if binary_filter is not None:
+            settings['binary'] = sorted(binary_filter.binary_extensions)
+            settings['text'] = sorted(binary_filter.text_extensions)
+        return hashlib.sha1(json.dumps(settings, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def lookup(self, file_path: str):
+        """返回缓存的 (size, mtime_ns, sha1, hits), 没有缓存时返回 None"""
+        row = self._conn.execute('SELECT size, mtime_ns, sha1, hits FROM files WHERE path = ?',
+                                 (os.path.abspath(file_path),)).fetchone()
+        if row is None:
+            return None
+        size, mtime_ns, digest, hits = row
+        return size, mtime_ns, digest, [tuple(hit) for hit in json.loads(hits)]
+
+    def keep(self, file_path: str):
+        """文件没有变化, 保留缓存的结果"""
+        self.stats['cached'] += 1
+        self._seen.append((self._generation, os.path.abspath(file_path)))
+        self._maybe_commit()
+
+    def store(self, file_path: str, info, hits: List[Tuple[str, int]]):
+        """保存重新搜索的结果, info 为 (size, mtime_ns, sha1)"""
+        self.stats['scanned'] += 1
+        size, mtime_ns, digest = info
+        self._updates.append((os.path.abspath(file_path), size, mtime_ns, digest,
+                              json.dumps(hits, ensure_ascii=False), self._generation))
+        self._maybe_commit()
+
+    def finish(self):
+        """完整遍历后调用(search_files 遍历完所有文件时自动调用): 写入剩余的记录, 删除已经不存在的文件"""
+        self._flush()
+        with self._conn:
+            self.stats['removed'] = self._conn.execute('DELETE FROM files WHERE generation != ?',
+                                                       (self._generation,)).rowcount
+
+    def close(self):
+        """关闭缓存文件, 未完成的运行中已处理的部分也会保存"""
+        self._flush()
+        self._conn.close()
+
+    def _maybe_commit(self):
+        if len(self._seen) + len(self._updates) >= self.COMMIT_INTERVAL:
+            self._flush()
+
+    def _flush(self):
+        with self._conn:
+            self._conn.executemany('UPDATE files SET generation = ? WHERE path = ?', self._seen)
+            self._conn.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)', self._updates)
+        self._seen = []
+        self._updates = []
+
+    def _get_meta(self, key: str):
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self._conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, value))
+
+
+def iter_files(directories: List[str], ignore_dirs: set) -> Iterator[str]:
+    """按目录顺序遍历所有文件, 跳过忽略的目录和不存在的目录"""
+    for root_dir in directories:
+        if not os.path.isdir(root_dir):
+            print(f"警告：目录不存在或不可访问，跳过 - {root_dir}")
+            continue
+
+        print(f"正在搜索目录: {root_dir}")
+        for dirpath, dirnames, filenames in os.walk(root_dir):
+            # 修改dirnames以跳过忽略的目录（原地修改影响后续遍历）
+            dirnames[:] = [d for d in dirnames if not should_ignore_dir(d, ignore_dirs)]
+            for filename in filenames:
+                yield os.path.join(dirpath, filename)
+
+
+def search_files(file_paths: Iterable[str], strings: List[str], workers: int = None,
+                 binary_filter: BinaryFilter = None, cache: SearchCache = None,
+                 max_hits_per_file: int = None) -> Iterator[Tuple[str, str, int]]:
+    """
+    在多个文件中搜索, 按 file_paths 的顺序逐个输出 (字符串, 文件路径, 行号)
+    文件按批提交到进程池, 遍历目录和搜索同时进行; 在途的批数有上限, 文件再多内存占用也不变。
+    提前停止迭代时不再提交新的文件, 未开始的任务被取消。
+    workers 为工作进程数, 默认 CPU 核数, 为 1 时在当前进程中搜索
+    binary_filter 不为 None 时跳过二进制文件
+    cache 不为 None 时只搜索新增或改变了的文件, 其余使用缓存的结果; 遍历完所有文件后删除缓存中已不存在的文件
+    max_hits_per_file 为每个文件最多记录的命中数, 达到后不再搜索该文件的其余部分
+    """
+    for file_path, hits in _scan_files(file_paths, strings, workers, binary_filter, cache, max_hits_per_file):
+        for s, line_num in hits:
+            yield s, file_path, line_num
+
+
+def _scan_files(file_paths, strings, workers, binary_filter, cache, max_hits_per_file=None):
+    """按顺序输出 (文件路径, 命中列表)"""
+    workers = workers or os.cpu_count() or 1
+    hashed = cache is not None
+    if workers == 1:
+        _init_worker(strings, binary_filter, max_hits_per_file)
+        submit = _run_now
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(strings, binary_filter, max_hits_per_file))
+        submit = executor.submit
+
+    try:
+        pending = deque()
+        for batch in _batches(file_paths, BATCH_SIZE):
+            # 每个文件为 (路径, 缓存记录, 是否需要搜索)
+            items = [(file_path,) + _check_cache(cache, file_path) for file_path in batch]
+            jobs = [(file_path, record[2] if record else None) for file_path, record, stale in items if stale]
+            pending.append((items, submit(_search_batch, jobs, hashed) if jobs else None))
+            # 按提交顺序取结果, 输出顺序与单进程相同
+            if len(pending) >= workers * MAX_PENDING_PER_WORKER:
+                yield from _collect(pending.popleft(), cache)
+        while pending:
+            yield from _collect(pending.popleft(), cache)
+        if cache is not None:
+            cache.finish()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def _check_cache(cache: SearchCache, file_path: str):
+    if cache is None:
+        return None, True
+    record = cache.lookup(file_path)
+    if record is None:
+        return None, True
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return record, True
+    return record, (st.st_size, st.st_mtime_ns) != record[:2]
+
+
+def _collect(entry, cache: SearchCache):
+    items, future = entry
+    scanned = iter(future.result() if future is not None else [])
+    for file_path, record, stale in items:
+        if not stale:
+            cache.keep(file_path)
+            yield file_path, record[3]
+            continue
+        hits, info = next(scanned)
+        if hits is None:
+            # 内容没变, 沿用缓存的命中
+            hits = record[3]
+        if cache is not None and info is not None:
+            cache.store(file_path, info, hits)
+        yield file_path, hits
+
+
+def _run_now(fn, *args) -> Future:
+    # workers 为 1 时在当前进程中立即执行, 与进程池使用同样的接口
+    future = Future()
+    future.set_result(fn(*args))
+    return future
+
+
+def _batches(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _init_worker(strings: List[str], binary_filter: BinaryFilter, max_hits_per_file: int = None):
+    global _matcher, _binary_filter, _max_hits_per_file
+    _matcher = StringMatcher(strings)
+    _binary_filter = binary_filter
+    _max_hits_per_file = max_hits_per_file
+
+
+def _search_batch(jobs: List[Tuple[str, str]], hashed: bool):
+    return [_scan_file(file_path, _matcher, _binary_filter, hashed, known_digest, _max_hits_per_file)
+            for file_path, known_digest in jobs]
+
+
+def file_trigrams(data):
+    """
+    文件内容(bytes 或 mmap)中出现的所有三字节组合, 每个编码为一个整数 b0 << 16 | b1 << 8 | b2
+    返回排好序、去重的 numpy.ndarray (uint32)
+    """
+    import numpy as np
+
+    parts = []
+    # 分块处理, 块之间重叠两个字节, 大文件也只占用固定的内存
+    for start in range(0, max(len(data) - 2, 0), TRIGRAM_CHUNK_SIZE):
+        chunk = np.frombuffer(data[start:start + TRIGRAM_CHUNK_SIZE + 2], dtype=np.uint8).astype(np.uint32)
+        parts.append(np.unique((chunk[:-2] << 16) | (chunk[1:-1] << 8) | chunk[2:]))
+    if not parts:
+        return np.empty(0, dtype=np.uint32)
+    return parts[0] if len(parts) == 1 else np.unique(np.concatenate(parts))
+
+
+def build_index(index_path: str, file_paths: Iterable[str], workers: int = None,
+                binary_filter: BinaryFilter = None) -> Dict[str, int]:
+    """
+    为文件建立三元组倒排索引: 三字节组合 -> 包含它的文件
+    先写入临时文件, 完成后替换 index_path, 建立过程中旧索引仍可查询。
+    返回 {'files': 建立索引的文件数, 'skipped': 跳过的二进制或无法读取的文件数}
+    """
+    import numpy as np
+
+    tmp_path = index_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    stats = {'files': 0, 'skipped': 0}
+    try:
+        conn.executescript(_INDEX_SCHEMA)
+        buffered = []   # [(file_id, trigrams)]
+
+        def flush():
+            if not buffered:
+                return
+            trigrams = np.concatenate([t for _, t in buffered])
+            ids = np.concatenate([np.full(len(t), file_id, dtype=np.uint32) for file_id, t in buffered])
+            # 稳定排序, 同一个三元组的文件号保持递增
+            order = np.argsort(trigrams, kind='stable')
+            trigrams, ids = trigrams[order], ids[order]
+            keys, starts = np.unique(trigrams, return_index=True)
+            ends = np.append(starts[1:], len(trigrams))
+            with conn:
+                conn.executemany('INSERT INTO postings VALUES (?, ?, ?)',
+                                 ((int(key), int(ids[start]), ids[start:end].tobytes())
+                                  for key, start, end in zip(keys, starts, ends)))
+            buffered.clear()
+
+        for file_path, trigrams in _index_files(file_paths, workers, binary_filter):
+            if trigrams is None:
+                stats['skipped'] += 1
+                continue
+            file_id = stats['files']
+            stats['files'] += 1
+            conn.execute('INSERT INTO files VALUES (?, ?)', (file_id, file_path))
+            buffered.append((file_id, np.frombuffer(trigrams, dtype=np.uint32)))
+            if len(buffered) >= INDEX_FLUSH_FILES:
+                flush()
+        flush()
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, index_path)
+    return stats
+
+
+def _index_files(file_paths, workers, binary_filter):
+    """按顺序输出 (文件路径, 三元组的字节串), 跳过的文件为 None"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker([], binary_filter)
+        submit = _run_now
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=([], binary_filter))
+        submit = executor.submit
+    try:
+        pending = deque()
+        for batch in _batches(file_paths, BATCH_SIZE):
+            pending.append(submit(_trigram_batch, batch))
+            if len(pending) >= workers * MAX_PENDING_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def _trigram_batch(file_paths: List[str]):
+    return [(file_path, _file_trigrams(file_path, _binary_filter)) for file_path in file_paths]
+
+
+def _file_trigrams(file_path: str, binary_filter: BinaryFilter):
+    try:
+        if binary_filter is not None and binary_filter.skip_by_name(file_path):
+            return None
+        with open(file_path, 'rb') as f:
+            head = f.read(SNIFF_SIZE)
+            if binary_filter is not None and binary_filter.is_binary(file_path, head):
+                return None
+            if len(head) < SNIFF_SIZE:
+                return file_trigrams(head).tobytes()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return file_trigrams(data).tobytes()
+    except (PermissionError, OSError, ValueError) as e:
+        print(f"警告：无法读取文件 {file_path} - {e}")
+        return None
+
+
+class TrigramIndex:
+    """
+    查询 build_index 建立的三元组索引
+    每个目标字符串的所有三元组都出现的文件才是候选文件, 再直接搜索候选文件确认并得到行号,
+    因此结果与完整搜索相同(建立索引之后新增的文件除外)。少于 3 个字节的字符串无法用索引缩小范围。
+    """
+
+    def __init__(self, index_path: str):
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"索引文件不存在: {index_path}")
+        self.index_path = index_path
+        self._conn = sqlite3.connect(index_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        """关闭索引文件"""
+        self._conn.close()
+
+    def candidates(self, strings: List[str]) -> List[str]:
+        """可能包含任一目标字符串的文件, 按建立索引时的顺序排列"""
+        import numpy as np
+
+        ids = np.empty(0, dtype=np.uint32)
+        for s in strings:
+            data = s.encode('utf-8')
+            if len(data) < 3:
+                return [path for path, in self._conn.execute('SELECT path FROM files ORDER BY id')]
+            # 从最短的倒排表开始求交集
+            lists = sorted((self._postings(int(t)) for t in file_trigrams(data)), key=len)
+            matched = lists[0]
+            for other in lists[1:]:
+                if not len(matched):
+                    break
+                matched = np.intersect1d(matched, other, assume_unique=True)
+            ids = np.union1d(ids, matched)
+        return self._paths(ids.tolist())
+
+    def search(self, strings: List[str], workers: int = None) -> List[Tuple[str, str, int]]:
+        """
+        查找目标字符串, 返回 (字符串, 文件路径, 行号) 的列表, 与 search_files 的输出相同
+        """
+        paths = self.candidates(strings)
+        if workers is None and len(paths) < QUERY_PARALLEL_THRESHOLD:
+            workers = 1
+        return list(search_files(paths, strings, workers))
+
+    def _postings(self, trigram: int):
+        import numpy as np
+
+        blobs = [ids for ids, in self._conn.execute(
+            'SELECT ids FROM postings WHERE trigram = ? ORDER BY first_id', (trigram,))]
+        return np.frombuffer(b''.join(blobs), dtype=np.uint32)
+
+    def _paths(self, ids: List[int]) -> List[str]:
+        paths = []
+        # SQLite 对参数个数有限制, 分批查询
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = dict(self._conn.execute(
+                f"SELECT id, path FROM files WHERE id IN ({','.join('?' * len(chunk))})", chunk))
+            paths.extend(rows[i] for i in chunk)
+        return paths
+
+
+class ResultSink(ABC):
+    """
+    搜索结果的输出, 边搜索边写入, 每 SINK_FLUSH_ROWS 条或每 SINK_FLUSH_SECONDS 秒刷新一次,
+    中途中断时已写入的结果仍然保留。子类实现 _write_rows 和 _close。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._rows = []
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def write(self, s: str, file_path: str, line_num: int):
+        """写入一条结果 (字符串, 文件路径, 行号)"""
+        self._rows.append((s, file_path, line_num))
+        self.count += 1
+        if len(self._rows) >= SINK_FLUSH_ROWS or time.monotonic() - self._last_flush >= SINK_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        """把缓冲的结果写入磁盘"""
+        if self._rows:
+            self._write_rows(self._rows)
+            self._rows = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self._close()
+
+    @abstractmethod
+    def _write_rows(self, rows: List[Tuple[str, str, int]]):
+        """把一批结果写入文件"""
+
+    @abstractmethod
+    def _close(self):
+        """关闭文件"""
+
+
+class CsvSink(ResultSink):
+    """CSV 输出, 格式与原来的 search_results.csv 相同"""
 
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(['String', 'File', 'Line'])
 
-def main():
+    def _write_rows(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class JsonLinesSink(ResultSink):
+    """JSON Lines 输出, 每行一个 {"string": ..., "file": ..., "line": ...}"""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def _write_rows(self, rows):
+        self._file.writelines(json.dumps({'string': s, 'file': file_path, 'line': line_num}, ensure_ascii=False) + '\n'
+                              for s, file_path, line_num in rows)
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class JsonSink(ResultSink):
+    """JSON 输出, 整个文件是一个 [{"string": ..., "file": ..., "line": ...}, ...] 数组, 关闭时才是完整的 JSON"""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file.write('[')
+        self._empty = True
+
+    def _write_rows(self, rows):
+        for s, file_path, line_num in rows:
+            self._file.write('\n' if self._empty else ',\n')
+            self._file.write(json.dumps({'string': s, 'file': file_path, 'line': line_num}, ensure_ascii=False))
+            self._empty = False
+        self._file.flush()
+
+    def _close(self):
+        self._file.write(']\n' if self._empty else '\n]\n')
+        self._file.close()
+
+
+class SqliteSink(ResultSink):
+    """SQLite 输出, 结果写入 results(string, file, line) 表, 每次刷新提交一次"""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        if os.path.exists(path):
+            os.remove(path)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('CREATE TABLE results (string TEXT NOT NULL, file TEXT NOT NULL, line INTEGER NOT NULL)')
+
+    def _write_rows(self, rows):
+        with self._conn:
+            self._conn.executemany('INSERT INTO results VALUES (?, ?, ?)', rows)
+
+    def _close(self):
+        self._conn.close()
+
+
+SINKS = {'csv': CsvSink, 'jsonl': JsonLinesSink, 'json': JsonSink, 'sqlite': SqliteSink}
+_SINK_EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.json': 'json', '.db': 'sqlite', '.sqlite': 'sqlite'}
+
+
+def open_sink(path: str, output_format: str = None) -> ResultSink:
+    """
+    按格式打开结果输出, output_format 为 csv / jsonl / json / sqlite, 为 None 时按扩展名判断, 无法判断时为 csv
+    """
+    if output_format is None:
+        output_format = _SINK_EXTENSIONS.get(os.path.splitext(path)[1].lower(), 'csv')
+    if output_format not in SINKS:
+        raise ValueError(f"不支持的输出格式: {output_format}")
+    return SINKS[output_format](path)
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description="搜索工程目录中的指定字符串")
-    parser.add_argument('--config', '-c', default='config.json',
-                        help="配置文件路径 (默认: config.json)")
+    _add_common_arguments(parser)
     parser.add_argument('--output', '-o', default='search_results.csv',
-                        help="输出CSV文件路径 (默认: search_results.csv)")
-    args = parser.parse_args()
+                        help="输出文件路径 (默认: search_results.csv)")
+    parser.add_argument('--format', '-f', choices=sorted(SINKS), default=None,
+                        help="输出格式 (默认按输出文件的扩展名: .csv / .jsonl / .json / .db, 其它为 csv)")
+    parser.add_argument('--max-hits-per-file', type=int, default=None,
+                        help="每个文件最多记录的匹配数, 达到后跳过该文件的其余部分")
+    parser.add_argument('--max-total-hits', type=int, default=None,
+                        help="最多记录的匹配总数, 达到后结束搜索")
+    parser.add_argument('--cache', default=None,
+                        help="结果缓存文件, 再次运行时只搜索新增或改变了的文件 (默认: 不使用缓存)")
+    parser.set_defaults(command=None)
+    subparsers = parser.add_subparsers(dest='command')
+    index_parser = subparsers.add_parser('index', help="为配置中的目录建立三元组索引")
+    _add_common_arguments(index_parser, suppress=True)
+    index_parser.add_argument('--index', default='strings_search.idx',
+                              help="索引文件路径 (默认: strings_search.idx)")
+    query_parser = subparsers.add_parser('query', help="用索引查找字符串")
+    _add_common_arguments(query_parser, suppress=True)
+    query_parser.add_argument('strings', nargs='*', help="要查找的字符串 (默认: 配置中的 strings)")
+    query_parser.add_argument('--index', default='strings_search.idx',
+                              help="索引文件路径 (默认: strings_search.idx)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'query' and args.strings:
+        # 直接给出了字符串, 不需要配置文件
+        return _run_query(args.index, args.strings, args.workers)
 
     # 加载配置
     try:
@@ -76,39 +864,78 @@ def main():
     directories = config['directories']
     # 合并忽略目录：默认忽略 + 配置中指定的额外忽略
     ignore_dirs = DEFAULT_IGNORE_DIRS.union(set(config.get('ignore_dirs', [])))
+    binary_filter = None
+    if not args.include_binary:
+        binary_filter = BinaryFilter(config.get('binary_extensions', []), config.get('text_extensions', []))
 
-    # 收集所有结果
-    results = []  # 每个元素为 (字符串, 文件路径, 行号)
+    if args.command == 'index':
+        stats = build_index(args.index, iter_files(directories, ignore_dirs), args.workers, binary_filter)
+        print(f"索引已保存到: {args.index}, 共 {stats['files']} 个文件, 跳过 {stats['skipped']} 个文件")
+        return 0
+    if args.command == 'query':
+        return _run_query(args.index, strings, args.workers)
 
-    for root_dir in directories:
-        if not os.path.isdir(root_dir):
-            print(f"警告：目录不存在或不可访问，跳过 - {root_dir}")
-            continue
+    # 边搜索边写入结果, 内存占用与结果数量无关
+    file_paths = iter_files(directories, ignore_dirs)
+    cache = None
+    if args.cache:
+        cache = SearchCache(args.cache, SearchCache.make_key(strings, binary_filter, args.max_hits_per_file))
+    try:
+        with open_sink(args.output, args.format) as sink:
+            results = search_files(file_paths, strings, args.workers, binary_filter, cache, args.max_hits_per_file)
+            try:
+                limit = args.max_total_hits
+                if limit is not None and limit <= 0:
+                    # --max-total-hits 0 不搜索也不写入任何结果
+                    print(f"已达到 {limit} 处匹配的上限, 提前结束搜索")
+                else:
+                    for s, file_path, line_num in results:
+                        sink.write(s, file_path, line_num)
+                        # 写入后立即检查上限, 不再等待下一处匹配
+                        if limit is not None and sink.count >= limit:
+                            print(f"已达到 {limit} 处匹配的上限, 提前结束搜索")
+                            break
+            finally:
+                # 提前结束时关闭生成器, 取消尚未开始的搜索任务
+                results.close()
+    except (OSError, sqlite3.Error) as e:
+        print(f"写入输出文件失败: {e}")
+        return 1
+    finally:
+        if cache is not None:
+            cache.close()
 
-        print(f"正在搜索目录: {root_dir}")
-        for dirpath, dirnames, filenames in os.walk(root_dir):
-            # 修改dirnames以跳过忽略的目录（原地修改影响后续遍历）
-            dirnames[:] = [d for d in dirnames if not should_ignore_dir(d, ignore_dirs)]
+    if cache is not None:
+        print(f"缓存: 沿用 {cache.stats['cached']} 个文件, 重新搜索 {cache.stats['scanned']} 个文件, "
+              f"删除 {cache.stats['removed']} 个文件")
+    print(f"搜索完成，结果已保存到: {args.output}")
+    print(f"共找到 {sink.count} 处匹配。")
+    return 0
 
-            for filename in filenames:
-                file_path = os.path.join(dirpath, filename)
-                # 可选：根据扩展名过滤（默认不过滤，全部尝试）
-                matches = search_in_file(file_path, strings)
-                for s, line_num in matches:
-                    results.append((s, file_path, line_num))
 
-    # 写入CSV文件
+def _add_common_arguments(parser: argparse.ArgumentParser, suppress: bool = False):
+    # 公共选项既可以写在子命令前也可以写在子命令后; 子命令中的默认值为 SUPPRESS, 不覆盖前面给出的值
+    def value(default):
+        return argparse.SUPPRESS if suppress else default
+
+    parser.add_argument('--config', '-c', default=value('config.json'),
+                        help="配置文件路径 (默认: config.json)")
+    parser.add_argument('--workers', '-j', type=int, default=value(None),
+                        help="搜索进程数 (默认: CPU 核数, 1 表示不使用多进程)")
+    parser.add_argument('--include-binary', action='store_true', default=value(False),
+                        help="也搜索二进制文件 (默认按扩展名和文件开头的内容跳过)")
+
+
+def _run_query(index_path: str, strings: List[str], workers: int = None) -> int:
     try:
-        with open(args.output, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.writer(f)
-            writer.writerow(['String', 'File', 'Line'])
-            writer.writerows(results)
-        print(f"搜索完成，结果已保存到: {args.output}")
-        print(f"共找到 {len(results)} 处匹配。")
-    except Exception as e:
-        print(f"写入输出文件失败: {e}")
+        with TrigramIndex(index_path) as index:
+            results = index.search(strings, workers)
+    except FileNotFoundError as e:
+        print(e)
         return 1
-
+    for s, file_path, line_num in results:
+        print(f"{file_path}:{line_num}: {s}")
+    print(f"共找到 {len(results)} 处匹配。")
     return 0
 
 
@@ -0,0 +1,268 @@
+import os
+import re
+import hashlib
+import sqlite3
+import zipfile
+import argparse
+from collections import namedtuple
+from typing import List, Optional
+
+from lxml import etree
+
+from .docx_stream import iter_docx
+
+
+SearchHit = namedtuple('SearchHit', ['path', 'paragraph', 'heading', 'text'])
+
+# 英文、数字按单词切分, 中日韩文字按单字切分; 查询时再用原文做子串校验
+_TOKEN = re.compile(r'[0-9a-z_]+|[぀-ヿ㐀-䶿一-鿿가-힯]')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paragraphs (
+    doc_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    is_heading INTEGER NOT NULL,
+    heading TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (doc_id, idx)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id, idx)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+'''
+
+
+def tokenize(text: str) -> List[str]:
+    """把文字切分为索引词, 不区分大小写"""
+    return _TOKEN.findall(text.lower())
+
+
+class DocxIndex:
+    """
+    docx 文档集合的全文倒排索引
+    索引保存在一个 SQLite 文件中: 词 -> (文档, 段落序号), 同时保存每个段落的文字和所在的标题路径
+    (如 "1 概述 > 1.2 范围"), 查询时只读索引, 不打开任何 docx。
+    update() 按文件的 mtime/大小判断是否变化, 变化时再比较内容的 sha1, 只重新索引内容真正改变的文档。
+
+    用法:
+        with DocxIndex('reports.idx') as index:
+            index.update('reports/')
+            hits = index.search('合同 金额', heading='付款')
+
+    命令行(在 src 目录下):
+        python -m word.docx_index index reports/ --index reports.idx
+        python -m word.docx_index query 合同 金额 --index reports.idx --heading 付款
+    """
+
+    def __init__(self, index_path: str):
+        """
+        打开或创建索引
+
+        参数:
+        - index_path: 索引文件路径
+        """
+        self.index_path = index_path
+        self._conn = sqlite3.connect(index_path)
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        """关闭索引文件"""
+        self._conn.close()
+
+    def update(self, root: str) -> dict:
+        """
+        增量更新索引, 与 root 目录下的 .docx 文件保持一致, 索引中其它目录的文档不受影响
+        无法读取的文档(损坏、加密或正在写入)跳过并记录在 failed 中, 它之前的索引保持不变, 下次 update 时重试
+
+        参数:
+        - root: 文档目录, 递归查找 .docx 文件(忽略 Word 的 ~$ 临时文件)
+
+        返回:
+        - dict: {'added': n, 'updated': n, 'removed': n, 'unchanged': n, 'failed': [(文档路径, 错误信息)]}
+        """
+        stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'failed': []}
+        known = {path: (doc_id, mtime, size, sha1) for doc_id, path, mtime, size, sha1
+                 in self._conn.execute('SELECT id, path, mtime_ns, size, sha1 FROM docs')}
+        # 同一个索引可以包含多个目录, 只删除 root 目录下已不存在的文档
+        prefix = os.path.join(os.path.abspath(root), '')
+        seen = set()
+        for path in self._iter_files(root):
+            seen.add(path)
+            try:
+                stats[self._update_document(path, known.get(path))] += 1
+            except (OSError, zipfile.BadZipFile, KeyError, etree.XMLSyntaxError) as e:
+                stats['failed'].append((path, f"{type(e).__name__}: {e}"))
+
+        with self._conn:
+            for path, record in known.items():
+                if path not in seen and path.startswith(prefix):
+                    self._remove(record[0])
+                    self._conn.execute('DELETE FROM docs WHERE id = ?', (record[0],))
+                    stats['removed'] += 1
+        return stats
+
+    def _update_document(self, path: str, record) -> str:
+        """更新一个文档的索引, 返回 'added' / 'updated' / 'unchanged'; 出错时整个事务回滚"""
+        st = os.stat(path)
+        if record is not None and record[1] == st.st_mtime_ns and record[2] == st.st_size:
+            return 'unchanged'
+
+        sha1 = self._file_hash(path)
+        with self._conn:
+            if record is not None and record[3] == sha1:
+                # 只是被重新保存或 touch 过, 内容没变
+                self._conn.execute('UPDATE docs SET mtime_ns = ?, size = ? WHERE id = ?',
+                                   (st.st_mtime_ns, st.st_size, record[0]))
+                return 'unchanged'
+            if record is not None:
+                self._remove(record[0])
+                self._conn.execute('UPDATE docs SET mtime_ns = ?, size = ?, sha1 = ? WHERE id = ?',
+                                   (st.st_mtime_ns, st.st_size, sha1, record[0]))
+                doc_id = record[0]
+            else:
+                doc_id = self._conn.execute('INSERT INTO docs (path, mtime_ns, size, sha1) VALUES (?, ?, ?, ?)',
+                                            (path, st.st_mtime_ns, st.st_size, sha1)).lastrowid
+            self._index_document(doc_id, path)
+        return 'updated' if record is not None else 'added'
+
+    def search(self, query: str, heading: Optional[str] = None,
+               headings_only: bool = False, limit: Optional[int] = 100) -> List[SearchHit]:
+        """
+        查询同时包含 query 中所有词的段落
+
+        参数:
+        - query: 以空白分隔的多个词, 每个词都要出现在段落中(不区分大小写); 查找基于索引词:
+          英文和数字按完整单词匹配(amount 不能用 amo 查到), 中日韩文字按单字匹配,
+          由多个单词或字组成的词(如 "total amount"、"合同金额")还要求在段落中连续出现
+        - heading: 只返回标题路径中包含该文字的段落
+        - headings_only: 只在标题中查找
+        - limit: 最多返回的结果数, None 表示不限
+
+        返回:
+        - List[SearchHit]: (文档路径, 段落序号, 标题路径, 段落文字), 按文档路径和段落顺序排列
+        """
+        words = [w.lower() for w in query.split()]
+        terms = sorted({t for w in words for t in tokenize(w)})
+        if not terms:
+            return []
+
+        placeholders = ','.join('?' * len(terms))
+        sql = f'''
+            SELECT d.path, p.idx, p.heading, p.text
+            FROM (SELECT doc_id, idx FROM postings WHERE term IN ({placeholders})
+                  GROUP BY doc_id, idx HAVING COUNT(*) = ?) AS m
+            JOIN paragraphs p ON p.doc_id = m.doc_id AND p.idx = m.idx
+            JOIN docs d ON d.id = m.doc_id
+        '''
+        params = terms + [len(terms)]
+        if headings_only:
+            sql += ' WHERE p.is_heading = 1'
+        sql += ' ORDER BY d.path, p.idx'
+
+        hits = []
+        for path, idx, heading_path, text in self._conn.execute(sql, params):
+            lowered = text.lower()
+            # 倒排表只保证每个词都出现, 这里校验完整的词和词组
+            if not all(w in lowered for w in words):
+                continue
+            if heading is not None and heading.lower() not in heading_path.lower():
+                continue
+            hits.append(SearchHit(path, idx, heading_path, text))
+            if limit is not None and len(hits) >= limit:
+                break
+        return hits
+
+    def documents(self) -> List[str]:
+        """已索引的文档路径"""
+        return [path for path, in self._conn.execute('SELECT path FROM docs ORDER BY path')]
+
+    def _index_document(self, doc_id: int, path: str):
+        headings = []   # [(level, 'number title')]
+        paragraphs = []
+        postings = set()
+        for idx, item in enumerate(iter_docx(path)):
+            text = item['text']
+            if item['type'] == 'heading':
+                while headings and headings[-1][0] >= item['level']:
+                    headings.pop()
+                headings.append((item['level'], f"{item['number']} {text}"))
+            heading_path = ' > '.join(title for _, title in headings)
+            if not text.strip():
+                continue
+            paragraphs.append((doc_id, idx, int(item['type'] == 'heading'), heading_path, text))
+            postings.update((term, doc_id, idx) for term in tokenize(text))
+
+        self._conn.executemany('INSERT INTO paragraphs VALUES (?, ?, ?, ?, ?)', paragraphs)
+        self._conn.executemany('INSERT INTO postings VALUES (?, ?, ?)', postings)
+
+    def _remove(self, doc_id: int):
+        self._conn.execute('DELETE FROM postings WHERE doc_id = ?', (doc_id,))
+        self._conn.execute('DELETE FROM paragraphs WHERE doc_id = ?', (doc_id,))
+
+    @staticmethod
+    def _iter_files(root: str):
+        for dirpath, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                if filename.lower().endswith('.docx') and not filename.startswith('~$'):
+                    yield os.path.abspath(os.path.join(dirpath, filename))
+
+    @staticmethod
+    def _file_hash(path: str) -> str:
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(block)
+        return h.hexdigest()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='docx 文档全文索引')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    index_parser = subparsers.add_parser('index', help='建立或增量更新索引')
+    index_parser.add_argument('root', help='文档目录')
+    index_parser.add_argument('--index', default='docx.idx', help='索引文件路径 (默认: docx.idx)')
+
+    query_parser = subparsers.add_parser('query', help='查询索引')
+    query_parser.add_argument('terms', nargs='+', help='要查找的词')
+    query_parser.add_argument('--index', default='docx.idx', help='索引文件路径 (默认: docx.idx)')
+    query_parser.add_argument('--heading', help='只返回该标题下的段落')
+    query_parser.add_argument('--headings-only', action='store_true', help='只在标题中查找')
+    query_parser.add_argument('--limit', type=int, default=100, help='最多返回的结果数 (默认: 100)')
+
+    args = parser.parse_args(argv)
+    with DocxIndex(args.index) as index:
+        if args.command == 'index':
+            stats = index.update(args.root)
+            for path, error in stats['failed']:
+                print(f"跳过无法读取的文档 {path}: {error}")
+            print(f"新增 {stats['added']}, 更新 {stats['updated']}, 删除 {stats['removed']}, 未变化 {stats['unchanged']}, "
+                  f"失败 {len(stats['failed'])}")
+        else:
+            hits = index.search(' '.join(args.terms), heading=args.heading,
+                                headings_only=args.headings_only, limit=args.limit)
+            for hit in hits:
+                print(f"{hit.path} [{hit.paragraph}] {hit.heading}\n    {hit.text}")
+            print(f"共 {len(hits)} 条结果")
+
+
+if __name__ == '__main__':
+    main()
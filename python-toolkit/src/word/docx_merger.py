@@ -1,8 +1,24 @@
 from docx import Document
+from docx.table import Table
+from docx.opc.constants import RELATIONSHIP_TYPE as RT, CONTENT_TYPE as CT
+from docx.opc.packuri import PackURI
+from docx.oxml import parse_xml, OxmlElement
+from docx.oxml.ns import qn, nsdecls
+from docx.parts.numbering import NumberingPart
 import re
+import io
 import copy
 import os
-from typing import List, Tuple, Optional
+import itertools
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Optional
+
+
+# transplant 模式下提取的内容: 源文档 body 中的原始 XML 元素及其所属文档
+_SourceElement = namedtuple('_SourceElement', ['element', 'doc'])
+
+_R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
 
 
 class DocxContentMerger:
@@ -12,14 +28,19 @@ class DocxContentMerger:
     占位符格式：{{ placeholder_name }}
     """
     
-    def __init__(self, placeholder_format: str = r'\{\{\s*(\w+)\s*\}\}'):
+    def __init__(self, placeholder_format: str = r'\{\{\s*(\w+)\s*\}\}', transplant: bool = False):
         """
         初始化文档合并器
         
         参数:
         - placeholder_format: 占位符的正则表达式模式
+        - transplant: 为 True 时按文档顺序直接移植源文档 body 的 XML 元素(段落、表格等),
+          每个元素只深拷贝一次, 并把引用到的样式、编号和图片等关系一并带到目标文档;
+          否则为每个段落/表格重建一个临时文档(只保留基本格式)
         """
         self.placeholder_pattern = placeholder_format
+        self.transplant = transplant
+        self._imported = {}
     
     def extract_all_content(self, file_path: str) -> List[Tuple[str, any]]:
         """
@@ -38,6 +59,9 @@ class DocxContentMerger:
             source_doc = Document(file_path)
             content_elements = []
             
+            if self.transplant:
+                return self._extract_elements(source_doc)
+            
             # 按顺序读取所有段落
             for para in source_doc.paragraphs:
                 if para.text.strip():  # 只添加非空段落
@@ -52,6 +76,194 @@ class DocxContentMerger:
         except Exception as e:
             raise Exception(f"读取文档失败: {e}")
     
+    def _extract_elements(self, source_doc: Document) -> List[Tuple[str, _SourceElement]]:
+        """按文档顺序取出源文档 body 的子元素, 不做复制; 跳过节属性和没有任何内容的空段落"""
+        content_elements = []
+        for element in source_doc.element.body.iterchildren():
+            if element.tag == qn('w:sectPr'):
+                continue
+            if element.tag == qn('w:p'):
+                if not ''.join(element.itertext()).strip() and not element.xpath('.//w:drawing | .//w:pict | .//w:object'):
+                    continue
+                content_elements.append(('paragraph', _SourceElement(element, source_doc)))
+            elif element.tag == qn('w:tbl'):
+                content_elements.append(('table', _SourceElement(element, source_doc)))
+            else:
+                content_elements.append(('element', _SourceElement(element, source_doc)))
+        return content_elements
+    
+    def _transplant(self, item: _SourceElement, target_doc: Document):
+        """
+        深拷贝一个源元素, 并把它引用的样式、编号定义和关系(图片、超链接等)导入目标文档
+        
+        参数:
+        - item: extract_all_content 在 transplant 模式下返回的内容
+        - target_doc: 目标文档对象
+        
+        返回:
+        - 可以直接插入目标文档的 XML 元素
+        """
+        new_element = copy.deepcopy(item.element)
+        if item.doc is target_doc:
+            return new_element
+        
+        key = (id(item.doc), id(target_doc))
+        state = self._imported.get(key)
+        if state is None:
+            state = self._imported[key] = {'nums': {}, 'abstracts': {}, 'rels': {}, 'parts': {}}
+        
+        styles = self._import_styles(new_element, item.doc, target_doc)
+        for element in [new_element] + styles:
+            self._import_numbering(element, item.doc, target_doc, state)
+        self._import_relationships(new_element, item.doc, target_doc, state)
+        return new_element
+    
+    def _import_styles(self, element, source_doc: Document, target_doc: Document) -> list:
+        """复制目标文档中不存在的样式(包括 basedOn/next/link 引用的样式), 目标文档已有的同名样式优先"""
+        target_styles = target_doc.styles.element
+        existing = {s.get(qn('w:styleId')) for s in target_styles.iterchildren(qn('w:style'))}
+        pending = [v for v in element.xpath('.//w:pStyle/@w:val | .//w:rStyle/@w:val | .//w:tblStyle/@w:val')
+                   if v not in existing]
+        if not pending:
+            return []
+        
+        source_styles = {s.get(qn('w:styleId')): s for s in source_doc.styles.element.iterchildren(qn('w:style'))}
+        imported = []
+        while pending:
+            style_id = pending.pop()
+            if style_id in existing or style_id not in source_styles:
+                continue
+            new_style = copy.deepcopy(source_styles[style_id])
+            target_styles.append(new_style)
+            existing.add(style_id)
+            imported.append(new_style)
+            pending.extend(new_style.xpath('./w:basedOn/@w:val | ./w:next/@w:val | ./w:link/@w:val'))
+        return imported
+    
+    def _import_numbering(self, element, source_doc: Document, target_doc: Document, state: dict):
+        """
+        把元素引用的编号定义复制到目标文档, 并改写为新的 numId, 避免和目标文档已有的列表混在一起;
+        源文档中找不到编号定义(没有 numbering.xml 或 num/abstractNum 缺失)时去掉 numPr, 按普通段落处理
+        """
+        nodes = [n for n in element.xpath('.//w:numPr/w:numId') if n.get(qn('w:val')) != '0']
+        if not nodes:
+            return
+        
+        try:
+            source_numbering = source_doc.part.part_related_by(RT.NUMBERING).element
+        except KeyError:
+            source_numbering = None
+        for node in nodes:
+            num_id = node.get(qn('w:val'))
+            if num_id not in state['nums']:
+                state['nums'][num_id] = self._copy_num(num_id, source_numbering, target_doc, state)
+            if state['nums'][num_id] is None:
+                num_pr = node.getparent()
+                num_pr.getparent().remove(num_pr)
+            else:
+                node.set(qn('w:val'), state['nums'][num_id])
+    
+    def _copy_num(self, num_id: str, source_numbering, target_doc: Document, state: dict) -> Optional[str]:
+        """复制一个 num 及其 abstractNum, 返回目标文档中的新 numId, 源文档中定义不完整时返回 None"""
+        if source_numbering is None:
+            return None
+        num = source_numbering.find(f"{qn('w:num')}[@{qn('w:numId')}='{num_id}']")
+        if num is None or num.find(qn('w:abstractNumId')) is None:
+            return None
+        abstract_id = num.find(qn('w:abstractNumId')).get(qn('w:val'))
+        abstract = None
+        if abstract_id not in state['abstracts']:
+            abstract = source_numbering.find(f"{qn('w:abstractNum')}[@{qn('w:abstractNumId')}='{abstract_id}']")
+            if abstract is None:
+                return None
+        
+        target_numbering = self._numbering_element(target_doc)
+        if abstract is not None:
+            new_abstract = copy.deepcopy(abstract)
+            new_abstract_id = str(self._next_id(target_numbering, 'w:abstractNum', 'w:abstractNumId'))
+            new_abstract.set(qn('w:abstractNumId'), new_abstract_id)
+            # nsid 相同时 Word 会把两个列表当成同一个, 让 Word 重新生成
+            for nsid in new_abstract.findall(qn('w:nsid')):
+                new_abstract.remove(nsid)
+            first_num = target_numbering.find(qn('w:num'))
+            if first_num is not None:
+                first_num.addprevious(new_abstract)
+            else:
+                target_numbering.append(new_abstract)
+            state['abstracts'][abstract_id] = new_abstract_id
+        new_num = copy.deepcopy(num)
+        new_num_id = str(self._next_id(target_numbering, 'w:num', 'w:numId'))
+        new_num.set(qn('w:numId'), new_num_id)
+        new_num.find(qn('w:abstractNumId')).set(qn('w:val'), state['abstracts'][abstract_id])
+        target_numbering.append(new_num)
+        return new_num_id
+    
+    def _numbering_element(self, doc: Document):
+        try:
+            return doc.part.part_related_by(RT.NUMBERING).element
+        except KeyError:
+            # python-docx 不能新建编号部件, 这里手动创建一个空的 numbering.xml
+            part = NumberingPart(PackURI('/word/numbering.xml'), CT.WML_NUMBERING,
+                                 parse_xml(f'<w:numbering {nsdecls("w")}/>'), doc.part.package)
+            doc.part.relate_to(part, RT.NUMBERING)
+            return part.element
+    
+    @staticmethod
+    def _next_id(numbering, tag: str, attr: str) -> int:
+        ids = [int(e.get(qn(attr))) for e in numbering.iterchildren(qn(tag)) if e.get(qn(attr), '').isdigit()]
+        return max(ids, default=0) + 1
+    
+    def _import_relationships(self, element, source_doc: Document, target_doc: Document, state: dict):
+        """把元素中 r:embed / r:id 等属性引用的关系在目标文档中重建, 并改写为新的 rId"""
+        source_part, target_part = source_doc.part, target_doc.part
+        for node in element.iter():
+            if not isinstance(node.tag, str):
+                # 注释、处理指令
+                continue
+            for attr, r_id in node.attrib.items():
+                if not attr.startswith(f'{{{_R_NS}}}'):
+                    continue
+                if r_id not in state['rels']:
+                    rel = source_part.rels.get(r_id)
+                    if rel is None:
+                        continue
+                    if rel.is_external:
+                        new_id = target_part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+                    elif rel.reltype == RT.IMAGE:
+                        # 图片按内容去重, 并在目标包中分配新的部件名
+                        new_id, _ = target_part.get_or_add_image(io.BytesIO(rel.target_part.blob))
+                    else:
+                        new_id = target_part.relate_to(self._copy_part(rel.target_part, target_doc, state), rel.reltype)
+                    state['rels'][r_id] = new_id
+                node.set(attr, state['rels'][r_id])
+    
+    def _copy_part(self, part, target_doc: Document, state: dict):
+        """
+        复制图表、嵌入对象等其它部件(连同它们自己引用的部件)到目标包, 部件名冲突时改用下一个可用的名字;
+        源文档的部件保持不变, 合并后源文档仍然可以继续使用
+        """
+        copied = state['parts'].get(part.partname)
+        if copied is not None:
+            return copied
+        
+        package = target_doc.part.package
+        # 已复制但还没有关联到目标文档的部件不在 iter_parts 中, 一并算作已占用
+        used = {p.partname for p in package.iter_parts()} | {p.partname for p in state['parts'].values()}
+        partname = part.partname
+        if partname in used:
+            base, ext = os.path.splitext(partname)
+            template = base.rstrip('0123456789') + '%d' + ext
+            partname = next(template % n for n in itertools.count(1) if template % n not in used)
+        new_part = type(part).load(PackURI(partname), part.content_type, part.blob, package)
+        state['parts'][part.partname] = new_part
+        # 保持原来的 rId, 部件 XML 中的引用不需要改写
+        for rel in part.rels.values():
+            if rel.is_external:
+                new_part.load_rel(rel.reltype, rel.target_ref, rel.rId, is_external=True)
+            else:
+                new_part.load_rel(rel.reltype, self._copy_part(rel.target_part, target_doc, state), rel.rId)
+        return new_part
+    
     def _copy_paragraph(self, source_para) -> Document:
         """
         深度复制段落及其格式
@@ -219,7 +431,11 @@ class DocxContentMerger:
             
             # 在占位符位置插入源内容
             for content_type, content_doc in source_content:
-                if content_type == 'paragraph':
+                if isinstance(content_doc, _SourceElement):
+                    p_parent.insert(p_index, self._transplant(content_doc, doc))
+                    p_index += 1
+                    
+                elif content_type == 'paragraph':
                     # 复制段落
                     source_para = content_doc.paragraphs[0]
                     
@@ -268,35 +484,53 @@ class DocxContentMerger:
             placeholder = placeholder_info['placeholder']
             placeholder_text = f"{{{{ {placeholder} }}}}"
             
-            # 获取单元格
-            cell = cell_para._element.getparent().getparent()  # tc -> tr -> tbl
-            
-            # 清空单元格内容
-            for elem in cell.iterchildren():
-                if elem.tag.endswith('p'):  # 段落元素
-                    cell.remove(elem)
+            # 只替换占位符所在的段落, 单元格中的其它段落保留 (w:p -> w:tc)
+            p = cell_para._element
+            if placeholder_text not in cell_para.text:
+                return False
+            cell = next(p.iterancestors(qn('w:tc')), None)
+            if cell is None:
+                print(f"表格单元格替换失败: 占位符 {placeholder_text} 所在的段落已不在表格单元格中")
+                return False
+            p_index = cell.index(p)
             
-            # 在单元格中插入源内容
+            # 在占位符段落的位置插入源内容, 单元格中只插入段落
+            new_elements = []
             for content_type, content_doc in source_content:
-                if content_type == 'paragraph':
+                if isinstance(content_doc, _SourceElement):
+                    if content_type == 'paragraph':
+                        new_elements.append(self._transplant(content_doc, doc))
+                    elif content_type == 'table':
+                        # 与复制模式一致, 表格按行转成段落
+                        for row in Table(content_doc.element, None).rows:
+                            row_text = ' | '.join([c.text.strip() for c in row.cells if c.text.strip()])
+                            if row_text:
+                                new_elements.append(self._text_paragraph(row_text))
+                    
+                elif content_type == 'paragraph':
                     # 获取源段落
                     source_para = content_doc.paragraphs[0]
                     
                     # 复制段落元素到单元格
-                    new_p = copy.deepcopy(source_para._element)
-                    cell.append(new_p)
+                    new_elements.append(copy.deepcopy(source_para._element))
                     
                 elif content_type == 'table':
                     # 在单元格中不能直接插入表格，用段落代替
                     if content_doc.tables:
                         source_table = content_doc.tables[0]
                         for row in source_table.rows:
-                            row_text = ' | '.join([cell.text.strip() for cell in row.cells if cell.text.strip()])
+                            row_text = ' | '.join([c.text.strip() for c in row.cells if c.text.strip()])
                             if row_text:
                                 # 在单元格中添加一个段落
-                                new_para = Document().add_paragraph(row_text)
-                                new_p = copy.deepcopy(new_para._element)
-                                cell.append(new_p)
+                                new_elements.append(self._text_paragraph(row_text))
+            
+            for new_element in new_elements:
+                cell.insert(p_index, new_element)
+                p_index += 1
+            cell.remove(p)
+            # 单元格至少要有一个段落, 否则 Word 认为文档已损坏
+            if cell.find(qn('w:p')) is None:
+                cell.append(parse_xml(f'<w:p {nsdecls("w")}/>'))
             
             return True
             
@@ -304,6 +538,15 @@ class DocxContentMerger:
             print(f"表格单元格替换失败: {e}")
             return False
     
+    @staticmethod
+    def _text_paragraph(text: str):
+        """直接生成只含一段文字的 w:p, 不为每行新建 Document; 换行和制表符转换为 w:br / w:tab"""
+        p = OxmlElement('w:p')
+        run = OxmlElement('w:r')
+        run.text = text
+        p.append(run)
+        return p
+    
     def merge_documents(self, source_file: str, target_file: str, 
                        output_file: Optional[str] = None) -> str:
         """
@@ -330,6 +573,8 @@ class DocxContentMerger:
         print(f"目标文档: {target_file}")
         
         try:
+            self._imported = {}
+            
             # 1. 提取源文档内容
             print("正在读取源文档内容...")
             source_content = self.extract_all_content(source_file)
@@ -345,8 +590,16 @@ class DocxContentMerger:
             if not all_placeholders:
                 print("警告: 未找到任何占位符，将在文档末尾添加源文档内容")
                 # 在文档末尾添加源内容
+                body = target_doc.element.body
                 for content_type, content_doc in source_content:
-                    if content_type == 'paragraph':
+                    if isinstance(content_doc, _SourceElement):
+                        # 插入到最后的节属性之前
+                        new_element = self._transplant(content_doc, target_doc)
+                        if body.sectPr is not None:
+                            body.sectPr.addprevious(new_element)
+                        else:
+                            body.append(new_element)
+                    elif content_type == 'paragraph':
                         # 添加段落
                         source_para = content_doc.paragraphs[0]
                         new_para = target_doc.add_paragraph()
@@ -388,6 +641,78 @@ class DocxContentMerger:
         except Exception as e:
             raise Exception(f"文档合并失败: {e}")
     
+    def merge_many(self, sources: Dict[str, str], target_file: str,
+                   output_file: Optional[str] = None, max_workers: Optional[int] = None) -> str:
+        """
+        一次合并多个源文档：每个占位符替换为各自源文档的内容
+        每个源文档只读取一次(多个线程并行读取), 目标文档只扫描一次占位符、只保存一次。
+        同一段落中有多个占位符时, 按出现顺序依次插入各自的内容。
+        
+        参数:
+        - sources: {占位符名称: 源文档路径}, 如 {'place1': 'a.docx', 'place2': 'b.docx'}
+        - target_file: 目标文档路径
+        - output_file: 输出文件路径，默认为'merged_document.docx'
+        - max_workers: 读取源文档的线程数
+        
+        返回:
+        - str: 输出文件路径
+        """
+        if output_file is None:
+            output_file = 'merged_document.docx'
+        
+        for file_path in list(sources.values()) + [target_file]:
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(f"文件不存在: {file_path}")
+        
+        self._imported = {}
+        
+        # 1. 并行读取源文档, 同一个文件只读取一次
+        paths = list(dict.fromkeys(sources.values()))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            contents = dict(zip(paths, executor.map(self.extract_all_content, paths)))
+        print(f"读取了 {len(paths)} 个源文档")
+        
+        # 2. 一次扫描目标文档中的所有占位符, 按所在段落分组
+        target_doc = Document(target_file)
+        positions = self.find_placeholder_positions(target_doc)
+        groups = {}
+        seen = set()
+        for placeholder_info in positions['paragraphs'] + positions['tables']:
+            if placeholder_info['placeholder'] not in sources:
+                continue
+            # 合并单元格在 row.cells 中按网格列重复出现, 同一段落中的同一占位符也只插入一次
+            element = placeholder_info['paragraph']._element
+            if (element, placeholder_info['placeholder']) in seen:
+                continue
+            seen.add((element, placeholder_info['placeholder']))
+            key = id(element)
+            if key in groups:
+                groups[key][1].extend(contents[sources[placeholder_info['placeholder']]])
+            else:
+                groups[key] = (placeholder_info, list(contents[sources[placeholder_info['placeholder']]]))
+        
+        # 3. 从后往前替换, 避免索引变化
+        ordered = sorted(groups.values(), key=lambda g: (
+            g[0].get('paragraph_idx', -1),
+            g[0].get('table_idx', -1),
+            g[0].get('row_idx', -1),
+            g[0].get('cell_idx', -1)
+        ), reverse=True)
+        replaced_count = 0
+        for placeholder_info, source_content in ordered:
+            if 'paragraph_idx' in placeholder_info:
+                replaced = self.replace_in_paragraph(target_doc, placeholder_info, source_content)
+            else:
+                replaced = self.replace_in_table_cell(target_doc, placeholder_info, source_content)
+            if replaced:
+                replaced_count += 1
+        print(f"成功替换 {replaced_count} 处占位符")
+        
+        # 4. 只保存一次
+        target_doc.save(output_file)
+        print(f"文档合并完成，已保存为: {output_file}")
+        return output_file
+    
     def _copy_paragraph_to_doc(self, source_para, target_doc, target_para):
         """复制段落内容到目标文档的段落"""
         # 清空目标段落
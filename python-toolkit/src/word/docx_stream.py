@@ -0,0 +1,168 @@
+'''
+流式读取 docx 的文字内容
+直接从 ZIP 中打开 word/document.xml, 用 iterparse 边解析边输出, 处理完的元素立即清除,
+不构建 python-docx 的对象模型, 读取几百页的文档时内存占用基本不变。
+'''
+
+import re
+import zipfile
+from lxml import etree
+from docx.styles import BabelFish
+
+_W = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+_P, _TBL, _TR, _TC = f'{{{_W}}}p', f'{{{_W}}}tbl', f'{{{_W}}}tr', f'{{{_W}}}tc'
+_T, _TAB, _BR = f'{{{_W}}}t', f'{{{_W}}}tab', f'{{{_W}}}br'
+_VAL = f'{{{_W}}}val'
+
+_HEADING_NAME = re.compile(r'^heading (\d)$', re.I)
+
+# outlineLvl 为 9 表示正文
+_BODY_LEVEL = 9
+
+
+'''按文档顺序输出段落、标题和表格单元格
+   :param path: the docx file
+   :param include_tables: also yield the table cells
+   :return: a generator of dicts:
+     {'type': 'heading', 'level': 2, 'number': '3.1', 'style': 'Heading 2', 'text': '...'}
+     {'type': 'paragraph', 'style': 'Normal', 'text': '...'}
+     {'type': 'cell', 'table': 0, 'row': 1, 'column': 2, 'text': '...'}  多个段落用换行连接
+   标题的 number 是按标题层级计算的大纲编号, 例如第 3 个一级标题下第 1 个二级标题下的第 2 个三级标题为 3.1.2
+   表格中的段落只作为单元格输出, table 为顶层表格在文档中的序号, 嵌套表格的单元格合并到外层单元格中
+'''
+def iter_docx(path, include_tables=True):
+    with zipfile.ZipFile(path) as archive:
+        styles = _read_styles(archive)
+        counters = [0] * _BODY_LEVEL
+        cells = []          # 正在读取的单元格中已读到的段落文字, 每层表格一个
+        table_index = -1
+        row = column = -1
+        positions = []      # 外层表格的 (row, column)
+        with archive.open('word/document.xml') as f:
+            for event, elem in etree.iterparse(f, events=('start', 'end'), tag=(_P, _TBL, _TR, _TC)):
+                tag = elem.tag
+                if event == 'start':
+                    if tag == _TBL:
+                        if len(cells) == 0:
+                            table_index += 1
+                        positions.append((row, column))
+                        row = -1
+                    elif tag == _TR:
+                        row += 1
+                        column = -1
+                    elif tag == _TC:
+                        column += 1
+                        cells.append([])
+                    continue
+
+                if tag == _P:
+                    text = _paragraph_text(elem)
+                    if cells:
+                        cells[-1].append(text)
+                    else:
+                        item = _paragraph_item(elem, text, styles, counters)
+                        if item is not None:
+                            yield item
+                elif tag == _TC:
+                    text = '\n'.join(cells.pop())
+                    if cells:
+                        # 嵌套表格的内容归入外层单元格
+                        cells[-1].append(text)
+                    elif include_tables:
+                        yield {'type': 'cell', 'table': table_index, 'row': row, 'column': column, 'text': text}
+                elif tag == _TBL:
+                    row, column = positions.pop()
+
+                # 单元格中的段落只清空内容, 其余元素处理完后连同之前的兄弟元素一起删除
+                if tag != _P or not cells:
+                    _release(elem)
+                else:
+                    elem.clear(keep_tail=True)
+
+
+'''流式提取标题, 带大纲编号
+   :param path: the docx file
+   :return: a generator of {"level": style name, "number": "3.1.2", "content": text}, like word_operator.extract_headings
+'''
+def iter_headings(path):
+    for item in iter_docx(path, include_tables=False):
+        if item['type'] == 'heading':
+            yield {'level': item['style'], 'number': item['number'], 'content': item['text']}
+
+
+def _read_styles(archive):
+    try:
+        root = etree.fromstring(archive.read('word/styles.xml'))
+    except KeyError:
+        return {}
+
+    raw = {}
+    for style in root.iterchildren(f'{{{_W}}}style'):
+        name = style.find(f'{{{_W}}}name')
+        based_on = style.find(f'{{{_W}}}basedOn')
+        outline = style.find(f'{{{_W}}}pPr/{{{_W}}}outlineLvl')
+        raw[style.get(f'{{{_W}}}styleId')] = (
+            BabelFish.internal2ui(name.get(_VAL)) if name is not None else None,
+            int(outline.get(_VAL)) if outline is not None else None,
+            based_on.get(_VAL) if based_on is not None else None,
+        )
+
+    styles = {}
+    for style_id, (name, outline, based_on) in raw.items():
+        # 大纲级别沿 basedOn 继承, 都没有时按内置标题样式的名称推断
+        seen = {style_id}
+        while outline is None and based_on in raw and based_on not in seen:
+            seen.add(based_on)
+            outline, based_on = raw[based_on][1], raw[based_on][2]
+        if outline is None and name is not None:
+            m = _HEADING_NAME.match(name)
+            outline = int(m.group(1)) - 1 if m else None
+        styles[style_id] = (name, outline)
+    return styles
+
+
+def _paragraph_text(p):
+    parts = []
+    for node in p.iter(_T, _TAB, _BR):
+        if node.tag == _T:
+            parts.append(node.text or '')
+        elif node.tag == _TAB:
+            parts.append('\t')
+        else:
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def _paragraph_item(p, text, styles, counters):
+    ppr = p.find(f'{{{_W}}}pPr')
+    style_id = outline = None
+    if ppr is not None:
+        style = ppr.find(f'{{{_W}}}pStyle')
+        style_id = style.get(_VAL) if style is not None else None
+        level = ppr.find(f'{{{_W}}}outlineLvl')
+        outline = int(level.get(_VAL)) if level is not None else None
+    name, style_outline = styles.get(style_id, (None, None))
+    if outline is None:
+        outline = style_outline
+    name = name or 'Normal'
+
+    if outline is None or not 0 <= outline < _BODY_LEVEL:
+        return {'type': 'paragraph', 'style': name, 'text': text}
+
+    text = text.strip()
+    if not text:
+        return None
+    counters[outline] += 1
+    for i in range(outline + 1, _BODY_LEVEL):
+        counters[i] = 0
+    number = '.'.join(str(n) for n in counters[:outline + 1])
+    return {'type': 'heading', 'level': outline + 1, 'number': number, 'style': name, 'text': text}
+
+
+def _release(elem):
+    elem.clear(keep_tail=True)
+    # 删除已处理的兄弟元素, 避免根元素下累积大量空元素
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
@@ -0,0 +1,138 @@
+from docx import Document
+from docx.oxml.ns import qn
+import re
+import io
+import copy
+import os
+import threading
+from collections import namedtuple
+from typing import Dict, List
+
+from .word_operator import _iter_story_parts, _paragraph_text_nodes, _splice_text_nodes
+
+
+# 一个包含占位符的段落: 段落相对部件根元素的路径、段落内各 w:t 的路径、占位符在段落文字中的区间
+_Field = namedtuple('_Field', ['path', 'text_paths', 'spans'])
+
+
+class CompiledTemplate:
+    """
+    预编译的 Word 模板
+    模板只解析一次, 记录每个占位符所在段落的 XML 元素路径以及它在各 run 文字中的偏移量。
+    每次渲染时深拷贝缓存的 XML 树, 只修改记录下来的位置, 不再重新扫描整篇文档。
+    占位符格式：{{ placeholder_name }}
+
+    用法:
+        template = CompiledTemplate('template.docx')
+        template.render({'name': '张三', 'table1': table}, 'out.docx')
+    """
+
+    def __init__(self, template_file: str, placeholder_format: str = r'\{\{\s*(\w+)\s*\}\}'):
+        """
+        解析模板并建立占位符索引
+
+        参数:
+        - template_file: 模板文档路径
+        - placeholder_format: 占位符的正则表达式模式, 第一个分组为占位符名称
+        """
+        if not os.path.exists(template_file):
+            raise FileNotFoundError(f"文件不存在: {template_file}")
+
+        self.template_file = template_file
+        self.placeholder_pattern = re.compile(placeholder_format)
+        self._doc = Document(template_file)
+        self._lock = threading.Lock()
+        self._fields = {}
+        for part in _iter_story_parts(self._doc):
+            fields = self._index_part(part.element)
+            if fields:
+                self._fields[part] = fields
+
+    @property
+    def placeholders(self) -> List[str]:
+        """模板中出现的所有占位符名称"""
+        names = set()
+        for fields in self._fields.values():
+            for field in fields:
+                names.update(name for _, _, name in field.spans)
+        return sorted(names)
+
+    def render(self, values: Dict[str, object], output_file=None):
+        """
+        用 values 填充模板并保存
+
+        参数:
+        - values: {占位符名称: 内容}。普通值按 str() 替换占位符文字, 保留所在 run 的格式;
+          python-docx 的 Table / Paragraph 等块级对象会替换占位符所在的整个段落。
+          未提供的占位符保持原样。
+        - output_file: 输出文件路径或可写的文件对象, 为 None 时返回 docx 的字节内容
+
+        返回:
+        - 输出文件路径/文件对象, 或 bytes
+        """
+        rendered = {}
+        for part, fields in self._fields.items():
+            root = copy.deepcopy(part.element)
+            # 先定位所有段落再修改, 替换块级内容不会影响其它段落的路径
+            targets = [(self._resolve(root, field.path), field) for field in fields]
+            for p, field in targets:
+                self._patch_paragraph(p, field, values)
+            rendered[part] = root
+
+        stream = io.BytesIO() if output_file is None else output_file
+        with self._lock:
+            # 临时把渲染结果挂到缓存的文档部件上保存, 其余部件(图片、样式等)原样写出
+            originals = {part: part._element for part in rendered}
+            try:
+                for part, root in rendered.items():
+                    part._element = root
+                self._doc.save(stream)
+            finally:
+                for part, element in originals.items():
+                    part._element = element
+
+        return stream.getvalue() if output_file is None else output_file
+
+    def _index_part(self, root) -> List[_Field]:
+        fields = []
+        for p in root.iter(qn('w:p')):
+            nodes = _paragraph_text_nodes(p)
+            if len(nodes) == 0:
+                continue
+            spans = [(m.start(), m.end(), m.group(1) if m.groups() else m.group())
+                     for m in self.placeholder_pattern.finditer(''.join(t.text or '' for t in nodes))]
+            if spans:
+                fields.append(_Field(self._path(root, p), [self._path(p, t) for t in nodes], spans))
+        return fields
+
+    def _patch_paragraph(self, p, field: _Field, values: Dict[str, object]):
+        for _, _, name in field.spans:
+            block = values.get(name)
+            if hasattr(block, '_element'):
+                new_element = copy.deepcopy(block._element)
+                parent = p.getparent()
+                parent.replace(p, new_element)
+                if parent.tag == qn('w:tc') and new_element.getnext() is None:
+                    # 单元格必须以段落结尾
+                    new_element.addnext(p.makeelement(qn('w:p')))
+                return
+
+        nodes = [self._resolve(p, path) for path in field.text_paths]
+        spans = [(start, end, str(values[name])) for start, end, name in field.spans if name in values]
+        _splice_text_nodes(nodes, spans)
+
+    @staticmethod
+    def _path(root, element) -> tuple:
+        path = []
+        while element is not root:
+            parent = element.getparent()
+            path.append(parent.index(element))
+            element = parent
+        return tuple(reversed(path))
+
+    @staticmethod
+    def _resolve(root, path: tuple):
+        element = root
+        for index in path:
+            element = element[index]
+        return element
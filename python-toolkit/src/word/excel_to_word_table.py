@@ -6,8 +6,17 @@ from docx import Document
 from docx.table import Table, _Cell
 from docx.oxml.ns import qn
 from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from xml.sax.saxutils import escape
 import re
 
+# 每厘米对应的 twip 数（Word 中 1 twip = 1/20 磅）
+TWIPS_PER_CM = 567
+
+# XML 1.0 不允许的控制字符
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_BREAKS = re.compile('([\n\t])')
+
 
 class ExcelToWordTable:
     """
@@ -132,22 +141,8 @@ class ExcelToWordTable:
         for paragraph in self.word_doc.paragraphs:
             if placeholder in paragraph.text:
                 found = True
-                # 创建表格
-                rows = len(table_data)
-                cols = len(table_data[0]) if rows > 0 else 0
-                
-                # 在段落前插入表格
-                table = self.word_doc.add_table(rows=rows, cols=cols, style=table_style)
-                
-                # 填充表格数据
-                for i, row_data in enumerate(table_data):
-                    for j, cell_data in enumerate(row_data):
-                        cell = table.cell(i, j)
-                        cell.text = str(cell_data)
-                
-                # 自动调整列宽
-                if auto_adjust_columns:
-                    self._auto_adjust_column_width(table)
+                # 一次性生成整个表格
+                table = self._build_table(table_data, auto_adjust_columns, table_style)
                 
                 # 替换占位符
                 paragraph.text = paragraph.text.replace(placeholder, "")
@@ -166,25 +161,6 @@ class ExcelToWordTable:
             print(f"未找到占位符 '{placeholder}'，表格将添加到文档末尾")
             self.add_table_to_end(table_data, auto_adjust_columns, table_style)
     
-    def _auto_adjust_column_width(self, table: Table):
-        """自动调整列宽"""
-        # 获取每列的最大宽度
-        col_widths = [0] * len(table.columns)
-        
-        for i, row in enumerate(table.rows):
-            for j, cell in enumerate(row.cells):
-                # 计算文本长度（简单估算）
-                text_length = len(cell.text)
-                if text_length > col_widths[j]:
-                    col_widths[j] = text_length
-        
-        # 设置列宽（这里使用相对单位）
-        for j, width in enumerate(col_widths):
-            # 转换为厘米（简单估算）
-            width_cm = min(width * 0.3, 8)  # 最大8cm
-            for cell in table.columns[j].cells:
-                cell.width = width_cm
-    
     def add_table_to_end(self, table_data: list, 
                         auto_adjust_columns: bool = True,
                         table_style: Optional[str] = "Table Grid"):
@@ -199,21 +175,76 @@ class ExcelToWordTable:
         if not table_data:
             return
         
-        rows = len(table_data)
-        cols = len(table_data[0]) if rows > 0 else 0
+        table = self._build_table(table_data, auto_adjust_columns, table_style)
+        # 添加到文档末尾（sectPr 之前）
+        self.word_doc._body._element._insert_tbl(table._tbl)
+    
+    def _build_table(self, table_data: list,
+                     auto_adjust_columns: bool = True,
+                     table_style: Optional[str] = "Table Grid") -> Table:
+        """
+        直接生成整个表格的 w:tbl XML 并一次解析，不逐个调用 table.cell()
+        生成单元格 XML 的同时统计每列最长文本，按每个字符 0.3cm、每列最多 8cm 估算列宽
         
-        # 添加表格
-        table = self.word_doc.add_table(rows=rows, cols=cols, style=table_style)
+        Args:
+            table_data: 表格数据（二维列表），列数以最长的一行为准，较短的行用空单元格补齐
+            auto_adjust_columns: 是否自动调整列宽，否则各列平分页面宽度
+            table_style: 表格样式
         
-        # 填充数据
-        for i, row_data in enumerate(table_data):
-            for j, cell_data in enumerate(row_data):
-                cell = table.cell(i, j)
-                cell.text = str(cell_data)
+        Returns:
+            Table: 尚未插入文档的表格
+        """
+        # 所有行都为空时仍生成一列空单元格，w:tbl 至少要有一列
+        cols = max(1, max(len(row_data) for row_data in table_data))
+        col_lengths = [0] * cols
+        rows_xml = []
+        for row_data in table_data:
+            cells_xml = []
+            for j in range(cols):
+                text = str(row_data[j]) if j < len(row_data) else ""
+                if len(text) > col_lengths[j]:
+                    col_lengths[j] = len(text)
+                cells_xml.append(self._cell_xml(text))
+            rows_xml.append('<w:tr>' + ''.join(cells_xml) + '</w:tr>')
         
-        # 自动调整列宽
         if auto_adjust_columns:
-            self._auto_adjust_column_width(table)
+            widths = [int(min(max(length, 1) * 0.3, 8) * TWIPS_PER_CM) for length in col_lengths]
+        else:
+            widths = [int(self.word_doc._block_width.twips / cols)] * cols
+        grid_xml = ''.join(f'<w:gridCol w:w="{w}"/>' for w in widths)
+        
+        tbl = parse_xml(
+            f'<w:tbl {nsdecls("w")}>'
+            '<w:tblPr><w:tblW w:type="auto" w:w="0"/>'
+            '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0"'
+            ' w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>'
+            f'<w:tblGrid>{grid_xml}</w:tblGrid>'
+            + ''.join(rows_xml) +
+            '</w:tbl>'
+        )
+        table = Table(tbl, self.word_doc._body)
+        if table_style:
+            table.style = table_style
+        return table
+    
+    @staticmethod
+    def _cell_xml(text: str) -> str:
+        """单元格的 XML，和 cell.text 一样把换行和制表符转换为 w:br / w:tab"""
+        if not text:
+            return '<w:tc><w:p/></w:tc>'
+        text = escape(_INVALID_XML_CHARS.sub('', text)).replace('\r\n', '\n').replace('\r', '\n')
+        parts = []
+        for piece in _BREAKS.split(text):
+            if piece == '\n':
+                parts.append('<w:br/>')
+            elif piece == '\t':
+                parts.append('<w:tab/>')
+            elif piece.strip() != piece:
+                # 只在需要时加 xml:space, 带 xml 命名空间属性的元素移入文档时代价很高
+                parts.append(f'<w:t xml:space="preserve">{piece}</w:t>')
+            elif piece:
+                parts.append(f'<w:t>{piece}</w:t>')
+        return '<w:tc><w:p><w:r>' + ''.join(parts) + '</w:r></w:p></w:tc>'
     
     def replace_multiple_placeholders(self, placeholder_data_dict: Dict[str, list],
                                      auto_adjust_columns: bool = True,
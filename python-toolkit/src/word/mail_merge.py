@@ -0,0 +1,158 @@
+'''
+邮件合并: 用一个模板和一张数据表批量生成文档
+模板在每个工作进程中只编译一次(CompiledTemplate), 数据行按需读取并以有限的在途任务数提交到进程池,
+吞吐量随 CPU 核数增长。完成的文档记录到检查点文件, 中断后用同一个检查点重新运行会跳过已生成的文档。
+'''
+
+import os
+import csv
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from .docx_template import CompiledTemplate
+
+''' status is one of 'ok', 'error', 'skipped'
+'''
+MergeResult = namedtuple('MergeResult', ['index', 'output', 'status', 'elapsed', 'error'])
+
+# 工作进程内的模板, 由 _init_worker 设置
+_template = None
+
+
+'''批量生成文档
+   :param template_file: the word template, placeholders like {{ name }}
+   :param rows: an iterable of dicts, or a .csv / .xlsx file whose first row holds the placeholder names
+   :param output_pattern: the output file name, formatted with the row and its index,
+                          for example: "out/contract_{index}_{name}.docx", {index} is always the row index
+   :param sheetname: the sheet to read when rows is an excel file, the active sheet if None
+   :param max_workers: the number of worker processes, default os.cpu_count()
+   :param max_in_flight: the max number of submitted but unfinished documents, default 2 * max_workers
+   :param checkpoint: a file recording the finished documents, finished rows are skipped on rerun
+   :param report_path: write the results as CSV to this path if given
+   :param placeholder_format: the placeholder regex, see CompiledTemplate
+   :return: a list of MergeResult in the order of rows
+'''
+def mail_merge(template_file, rows, output_pattern, sheetname=None, max_workers=None, max_in_flight=None,
+               checkpoint=None, report_path=None, placeholder_format=r'\{\{\s*(\w+)\s*\}\}'):
+    if not os.path.exists(template_file):
+        raise FileNotFoundError(f"文件不存在: {template_file}")
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or max_workers * 2
+
+    finished = _read_checkpoint(checkpoint)
+    checkpoint_file = open(checkpoint, 'a', newline='', encoding='utf-8') if checkpoint else None
+    results = []
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(template_file, placeholder_format)) as executor:
+            pending = {}
+            jobs = enumerate(load_rows(rows, sheetname))
+            exhausted = False
+            while not exhausted or pending:
+                # 限制在途任务数，数据行按需读取
+                while not exhausted and len(pending) < max_in_flight:
+                    try:
+                        index, row = next(jobs)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    try:
+                        # 数据行中的 index 列被行号覆盖
+                        output = output_pattern.format_map({**row, 'index': index})
+                    except (KeyError, IndexError, ValueError, TypeError) as e:
+                        results.append(MergeResult(index, None, 'error', 0.0, f"bad output pattern: {e!r}"))
+                        continue
+                    if finished.get(index) == output and os.path.exists(output):
+                        results.append(MergeResult(index, output, 'skipped', 0.0, None))
+                        continue
+                    future = executor.submit(_render, row, output)
+                    pending[future] = (index, output)
+
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, output = pending.pop(future)
+                    try:
+                        status, elapsed, error = future.result()
+                    except Exception as e:
+                        # 工作进程异常退出
+                        status, elapsed, error = 'error', 0.0, repr(e)
+                    results.append(MergeResult(index, output, status, elapsed, error))
+                    if status == 'ok' and checkpoint_file is not None:
+                        csv.writer(checkpoint_file).writerow([index, output])
+                        checkpoint_file.flush()
+    finally:
+        if checkpoint_file is not None:
+            checkpoint_file.close()
+
+    results.sort(key=lambda r: r.index)
+    if report_path:
+        write_report(results, report_path)
+    return results
+
+
+'''read the data rows of a mail-merge
+   :param rows: an iterable of dicts, or a .csv / .xlsx / .xlsm file
+   :param sheetname: the sheet to read when rows is an excel file
+   :return: an iterator of dicts
+'''
+def load_rows(rows, sheetname=None):
+    if not isinstance(rows, str):
+        return iter(rows)
+    ext = os.path.splitext(rows)[1].lower()
+    if ext == '.csv':
+        return _iter_csv(rows)
+    if ext in ('.xlsx', '.xlsm'):
+        # excel 是与 word 并列的顶层包, 不能相对导入; 只在读取 excel 数据时才导入,
+        # 工作进程和 csv/dict 数据不依赖它
+        from excel import excel_operator
+        return excel_operator.iter_records(rows, sheetname)
+    raise ValueError(f"不支持的数据文件: {rows}")
+
+
+'''write the mail-merge results as CSV
+   :param results: list of MergeResult
+   :param report_path: where to save the report
+'''
+def write_report(results, report_path):
+    with open(report_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Index', 'Output', 'Status', 'Elapsed', 'Error'])
+        for r in results:
+            writer.writerow([r.index, r.output or '', r.status, f"{r.elapsed:.3f}", r.error or ''])
+
+
+def _iter_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.DictReader(f)
+
+
+def _read_checkpoint(checkpoint):
+    finished = {}
+    if checkpoint and os.path.exists(checkpoint):
+        with open(checkpoint, newline='', encoding='utf-8') as f:
+            for record in csv.reader(f):
+                if len(record) == 2 and record[0].isdigit():
+                    finished[int(record[0])] = record[1]
+    return finished
+
+
+def _init_worker(template_file, placeholder_format):
+    global _template
+    _template = CompiledTemplate(template_file, placeholder_format)
+
+
+def _render(row, output):
+    start = time.perf_counter()
+    try:
+        dirname = os.path.dirname(output)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        values = {k: '' if v is None else v for k, v in row.items()}
+        _template.render(values, output)
+        return 'ok', time.perf_counter() - start, None
+    except Exception:
+        return 'error', time.perf_counter() - start, traceback.format_exc(limit=3)
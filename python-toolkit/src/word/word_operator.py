@@ -4,7 +4,16 @@ from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
 from docx.shared import RGBColor, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from xml.sax.saxutils import escape
+
+import re
+import weakref
+from bisect import bisect_right
+from functools import lru_cache
 from enum import Enum  
 
 # https://python-docx.readthedocs.io/en/latest/#
@@ -77,6 +86,94 @@ def replace_table_cell_text(doc, keyword, content, save_to= ''):
 
 
 
+'''一次遍历替换多个关键字
+正文(含嵌套表格、文本框)、页眉和页脚中的每个段落只扫描一次, 所有关键字编译成一个正则交替式同时匹配。
+替换按 w:t 文本节点进行: 关键字被拆分到多个 run 中时, 替换内容写入关键字起始的 run,
+其余 run 只删除属于关键字的那部分文字, 不会像 replace_paragraph_text 那样合并 run 而丢失格式。
+同一位置有多个关键字可匹配时取最长的一个。
+
+:param doc: the word document to open
+:param mapping: {keyword: content}, content is converted by str()
+:param save_to: indicates where to save the doc, it is saved even if nothing is replaced
+:return RETUENED_STATUS, NOT_CHANGED if no keyword is found
+'''
+def replace_many(doc, mapping, save_to= ''):
+    keywords = tuple(k for k in mapping if k)
+    count = 0
+    if len(keywords) > 0:
+        matcher = _compile_keywords(keywords)
+        replacements = {k: str(v) for k, v in mapping.items()}
+        for part in _iter_story_parts(doc):
+            for p in part.element.iter(qn('w:p')):
+                count += _replace_in_paragraph(p, matcher, replacements)
+
+    # 与 add_before_text 一致, 没有替换任何内容时也保存到 save_to
+    ret = save(doc, save_to)
+    if count == 0 and ret == RETUENED_STATUS.SUCCESS.value:
+        return RETUENED_STATUS.NOT_CHANGED.value
+    return ret
+
+
+@lru_cache(maxsize=64)
+def _compile_keywords(keywords):
+    # 长的关键字在前, 使交替式在同一位置优先匹配最长的关键字
+    ordered = sorted(set(keywords), key=len, reverse=True)
+    return re.compile('|'.join(map(re.escape, ordered)))
+
+
+def _iter_story_parts(doc):
+    yield doc.part
+    # 每个页眉/页脚部件只处理一次, 不会为链接到上一节的页眉创建新的定义
+    for rel in doc.part.rels.values():
+        if not rel.is_external and rel.reltype in (RT.HEADER, RT.FOOTER):
+            yield rel.target_part
+
+
+def _replace_in_paragraph(p, matcher, replacements):
+    nodes = _paragraph_text_nodes(p)
+    if len(nodes) == 0:
+        return 0
+    spans = [(m.start(), m.end(), replacements[m.group()])
+             for m in matcher.finditer(''.join(t.text or '' for t in nodes))]
+    _splice_text_nodes(nodes, spans)
+    return len(spans)
+
+
+def _paragraph_text_nodes(p):
+    # 只取本段落自己的文字, 文本框中的段落会在 iter 时单独处理
+    return p.xpath('./w:r/w:t | ./w:hyperlink/w:r/w:t | ./w:ins/w:r/w:t | ./w:smartTag/w:r/w:t')
+
+
+def _splice_text_nodes(nodes, spans):
+    """用 spans [(start, end, text)] 替换 nodes 拼接后文字中的对应区间, spans 按 start 升序且互不重叠"""
+    if len(spans) == 0:
+        return
+    texts = [t.text or '' for t in nodes]
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text)
+
+    # 从后往前替换, 前面节点的偏移量保持不变
+    for start, end, content in reversed(spans):
+        first = bisect_right(starts, start) - 1
+        last = bisect_right(starts, end - 1) - 1
+        head = texts[first][:start - starts[first]]
+        if first == last:
+            texts[first] = head + content + texts[first][end - starts[first]:]
+        else:
+            texts[first] = head + content
+            for i in range(first + 1, last):
+                texts[i] = ''
+            texts[last] = texts[last][end - starts[last]:]
+
+    for t, text in zip(nodes, texts):
+        if t.text != text:
+            t.text = text
+            t.set('{http://www.w3.org/XML/1998/namespace}space', 'preserve')
+
+
 default_styles = {'font': {'name': '宋体', 'color': RGBColor(0,0,0), 'bold': False, 'underline': False, 'size': Pt(12)},
 'paragraph_format': {'alignment': WD_ALIGN_PARAGRAPH.LEFT, 'left_indent': Pt(2)}}
 
@@ -100,10 +197,11 @@ def set_font_styles(para, styles):
    :param font: the content's font style
    :param underline: if content with underline
    :param save_to: indicates where to save the modified doc
+   :param styles: a styles dict like default_styles, or the name of a style added by register_style
 '''
 def add_to_end(doc, content, save_to= '', styles=default_styles):
     para = doc.add_paragraph().add_run(content)
-    set_font_styles(para, styles)
+    _apply_styles(doc, para, styles)
     if (save_to is not None) and len(save_to) > 0:
         try:
             doc.save(save_to)
@@ -120,6 +218,7 @@ def add_to_end(doc, content, save_to= '', styles=default_styles):
    :param stop: when found the first keyword then break if stop = True
    :param save_to: indicates where to save the modified doc
    :param styles: a dict accroding to the reference: https://python-docx.readthedocs.io/en/latest/api/style.html#docx.styles.style.ParagraphStyle
+                  or the name of a style added by register_style
    :return RETUENED_STATUS
 '''
 def add_before_text(doc, keyword, content, stop = True, save_to= '', styles = default_styles):
@@ -128,7 +227,7 @@ def add_before_text(doc, keyword, content, stop = True, save_to= '', styles = de
         if para.text == keyword:
             newPara = para.insert_paragraph_before().add_run(content)
             ret = RETUENED_STATUS.SUCCESS.value
-            set_font_styles(newPara, styles) 
+            _apply_styles(doc, newPara, styles)
             if stop:
                 break
     
@@ -142,6 +241,113 @@ def add_before_text(doc, keyword, content, stop = True, save_to= '', styles = de
     return ret
 
 
+# 已注册的样式 {document part: {name: (style_id, style_type)}}
+_registered_styles = weakref.WeakKeyDictionary()
+
+
+'''register a named style in the document's styles part once, so that runs and paragraphs
+   only reference it by id instead of setting the font properties one by one
+   :param doc: the word document
+   :param name: the style name, an existing style with this name is reused as is
+   :param styles: a dict like default_styles, 'paragraph_format' is applied to paragraph styles only
+   :param style_type: WD_STYLE_TYPE.PARAGRAPH or WD_STYLE_TYPE.CHARACTER
+   :return the style id
+'''
+def register_style(doc, name, styles=default_styles, style_type=WD_STYLE_TYPE.PARAGRAPH):
+    registered = _registered_styles.setdefault(doc.part, {})
+    if name in registered:
+        return registered[name][0]
+
+    try:
+        style = doc.styles[name]
+    except KeyError:
+        style = doc.styles.add_style(name, style_type)
+        set_font_styles(style, styles)
+        if style_type == WD_STYLE_TYPE.PARAGRAPH:
+            for key, value in (styles.get('paragraph_format') or {}).items():
+                setattr(style.paragraph_format, key, value)
+    registered[name] = (style.style_id, style.type)
+    return style.style_id
+
+
+'''insert many paragraphs before or after the paragraph whose text equals keyword in one XML splice
+   :param doc: the word document to open
+   :param keyword: the anchor paragraph's text
+   :param paragraphs: a list of str, or (text, style_name) tuples; style names must be registered by register_style
+   :param style: the style name used by paragraphs without their own style
+   :param before: insert before the anchor if True, otherwise after it
+   :param stop: only use the first anchor if True
+   :param save_to: indicates where to save the modified doc
+   :return RETUENED_STATUS
+'''
+def insert_paragraphs(doc, keyword, paragraphs, style=None, before=True, stop=True, save_to= ''):
+    anchors = [para._p for para in doc.paragraphs if para.text == keyword]
+    if len(anchors) == 0:
+        return RETUENED_STATUS.NOT_CHANGED.value
+    if stop:
+        anchors = anchors[:1]
+
+    body = []
+    for item in paragraphs:
+        text, name = (item, style) if isinstance(item, str) else item
+        body.append(_paragraph_xml(text, *_style_ref(doc, name)))
+    xml = f'<w:body {nsdecls("w")}>' + ''.join(body) + '</w:body>'
+
+    for anchor in anchors:
+        # 所有段落一次生成、一次解析
+        elements = list(parse_xml(xml))
+        if before:
+            for element in elements:
+                anchor.addprevious(element)
+        else:
+            for element in reversed(elements):
+                anchor.addnext(element)
+
+    return save(doc, save_to)
+
+
+def _apply_styles(doc, run, styles):
+    if not isinstance(styles, str):
+        set_font_styles(run, styles)
+        return
+    style_id, style_type = _style_ref(doc, styles)
+    if style_type == WD_STYLE_TYPE.CHARACTER:
+        run._r.get_or_add_rPr().style = style_id
+    else:
+        run._parent._p.style = style_id
+
+
+def _style_ref(doc, name):
+    if name is None:
+        return None, None
+    registered = _registered_styles.get(doc.part, {})
+    if name not in registered:
+        raise ValueError(f"style '{name}' is not registered, call register_style first")
+    return registered[name]
+
+
+def _paragraph_xml(text, style_id, style_type):
+    ppr = rpr = ''
+    if style_type == WD_STYLE_TYPE.CHARACTER:
+        rpr = f'<w:rPr><w:rStyle w:val="{escape(style_id)}"/></w:rPr>'
+    elif style_id is not None:
+        ppr = f'<w:pPr><w:pStyle w:val="{escape(style_id)}"/></w:pPr>'
+    if not text:
+        return f'<w:p>{ppr}</w:p>'
+
+    parts = []
+    for piece in re.split('([\n\t])', escape(text)):
+        if piece == '\n':
+            parts.append('<w:br/>')
+        elif piece == '\t':
+            parts.append('<w:tab/>')
+        elif piece.strip() != piece:
+            parts.append(f'<w:t xml:space="preserve">{piece}</w:t>')
+        elif piece:
+            parts.append(f'<w:t>{piece}</w:t>')
+    return f'<w:p>{ppr}<w:r>{rpr}' + ''.join(parts) + '</w:r></w:p>'
+
+
 '''replace paragraph's content which content is equal to text
    :param doc: the word document to open
    :param keyword: the content to be insert before keyword
@@ -184,7 +390,7 @@ def save(doc, save_to= ''):
 
 '''获取Heading内容
 比如“3.1.2. 测试内容”  提取到“测试内容”
-目前标号'3.1.2'还获取不到。
+目前标号'3.1.2'还获取不到, 需要标号时可以用 docx_stream.iter_headings 流式读取。
 '''
 def extract_headings(doc):
     headings = []
@@ -0,0 +1,45 @@
+import sys 
+sys.path.append('../src')
+from excel import batch_runner
+from excel import excel_operator
+from openpyxl import Workbook
+import time
+import os
+
+def slow_recipe(source):
+    time.sleep(5)
+
+def count_rows(source):
+    return len(list(excel_operator.iter_successive_rows(source, "Sheet", "1:3", "A")))
+
+def test_run_batch():
+    files = ["test_batch{0}.xlsx".format(i) for i in range(4)]
+    outputs = ["test_batch_out{0}.xlsx".format(i) for i in range(4)]
+    for f in files:
+        wb = Workbook()
+        wb.active.append(["a", "b"])
+        wb.save(f)
+
+    jobs = [(f, [("write_to_cells", {"sheetname": "Sheet", "cell_values": [(1, 'B', f)], "save_to": out})])
+        for f, out in zip(files, outputs)]
+    jobs.append((files[0], [("write_to_cells", {"sheetname": "NoSuchSheet", "cell_values": []})]))
+    jobs.append((files[0], count_rows))
+    jobs.append((files[0], slow_recipe))
+    # 保存失败(目录不存在)的任务报告为错误
+    jobs.append((files[1], [("write_to_cells", {"sheetname": "Sheet", "cell_values": [(1, 'A', 'x')],
+        "save_to": os.path.join("no_such_dir", "out.xlsx")})]))
+    try:
+        results = batch_runner.run_batch(jobs, max_workers=2, timeout=1, max_in_flight=2, report_path="test_batch_report.csv")
+        assert [r.index for r in results] == list(range(len(jobs)))
+        assert [r.status for r in results] == ['ok'] * 4 + ['error', 'ok', 'timeout', 'error']
+        assert results[5].result == 3
+        assert "NoSuchSheet" in results[4].error
+        assert "write_to_cells failed" in results[7].error
+        assert batch_runner.summarize(results)['ok'] == 5
+        for f, out in zip(files, outputs):
+            assert excel_operator.read_successive_cells(out, "Sheet", "1", "B") == f
+        assert os.path.exists("test_batch_report.csv")
+    finally:
+        for f in files + outputs + ["test_batch_report.csv"]:
+            if os.path.exists(f):
+                os.remove(f)
@@ -0,0 +1,44 @@
+import sys 
+sys.path.append('../src')
+import config
+from excel import excel_operator
+import numpy as np
+import pandas as pd
+import os
+
+def test_bulk_write():
+    current_file_dir = os.path.dirname(os.path.abspath(__file__))
+    filepath = os.path.join(current_file_dir, config.template_dir, "demo.xlsx")
+    sheetname = 'Sheet1'
+    try:
+        with excel_operator.bulk_write(filepath, sheetname, save_to="test.xlsx") as writer:
+            writer.write_block([["x1", "y1"], ["x2", "y2"]], anchor="d3")
+            writer.write_cells([(5, 'D', "cat")])
+            # 退出 with 之前不会保存
+            assert not os.path.exists("test.xlsx")
+        assert writer.saved
+        assert excel_operator.read_successive_cells("test.xlsx", sheetname, "3:5", "D:E", "&&") == "x1&&y1&&x2&&y2&&cat"
+    finally:
+        os.remove("test.xlsx")
+
+def test_bulk_write_numpy_and_dataframe():
+    current_file_dir = os.path.dirname(os.path.abspath(__file__))
+    filepath = os.path.join(current_file_dir, config.template_dir, "demo.xlsx")
+    sheetname = 'Sheet1'
+    df = pd.DataFrame({"name": ["a", "b"], "score": [1.5, None]})
+    try:
+        with excel_operator.bulk_write(filepath, sheetname, save_to="test.xlsx") as writer:
+            assert writer.write_block(np.arange(6).reshape(2, 3), anchor=(10, 'A')) == 2
+            assert writer.write_block(df, anchor=(20, 1), header=True) == 3
+            # numpy 数组、列表和单个单元格中的 NaN / NaT 写成空单元格
+            writer.write_block(np.array([[1.0, np.nan]]), anchor="A30")
+            writer.write_block([[float("nan"), pd.NaT, "x"]], anchor="A31")
+            writer.write_cells([(32, 'A', np.float64("nan"))])
+        rows = list(excel_operator.iter_successive_rows("test.xlsx", sheetname, "10:11", "A:C"))
+        assert rows == [(0, 1, 2), (3, 4, 5)]
+        rows = list(excel_operator.iter_successive_rows("test.xlsx", sheetname, "20:22", "A:B"))
+        assert rows == [("name", "score"), ("a", 1.5), ("b", None)]
+        rows = list(excel_operator.iter_successive_rows("test.xlsx", sheetname, "30:32", "A:C"))
+        assert rows == [(1, None, None), (None, None, "x"), (None, None, None)]
+    finally:
+        os.remove("test.xlsx")
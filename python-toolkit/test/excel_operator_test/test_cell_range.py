@@ -0,0 +1,60 @@
+import sys 
+sys.path.append('../src')
+from excel import cell_range
+from excel import excel_operator
+from openpyxl import Workbook
+import pytest
+import os
+
+def test_column_index():
+    assert cell_range.column_index("A") == 1
+    assert cell_range.column_index("ab") == 28
+    assert cell_range.column_index("XFD") == 16384
+    assert cell_range.column_letter(729) == "ABA"
+    with pytest.raises(ValueError):
+        cell_range.column_index("XFE")
+    with pytest.raises(ValueError):
+        cell_range.column_letter(0)
+
+def test_parse_range():
+    assert cell_range.parse_range("A1:C10") == (cell_range.CellRange(None, 1, 1, 10, 3),)
+    assert cell_range.parse_range("Sheet1!a:c") == (cell_range.CellRange("Sheet1", None, 1, None, 3),)
+    assert cell_range.parse_range("'My ''x'' Sheet'!$B$2") == (cell_range.CellRange("My 'x' Sheet", 2, 2, 2, 2),)
+    assert cell_range.parse_range("2:5, D4:B1") == (
+        cell_range.CellRange(None, 2, None, 5, None),
+        cell_range.CellRange(None, 1, 2, 4, 4),
+    )
+    for ref in ["", "A1:C", "A1,", "A1:B2:C3", "1A"]:
+        with pytest.raises(ValueError):
+            cell_range.parse_range(ref)
+
+def test_parse_rows_and_columns():
+    assert cell_range.parse_rows("1:3,5") == (1, 2, 3, 5)
+    assert cell_range.parse_rows(3) == (3,)
+    assert cell_range.parse_columns("A,c:D,B") == (1, 2, 3, 4)
+    assert cell_range.parse_columns("A,C:D") == (1, 3, 4)
+    assert excel_operator.get_src_column_info("A,C:D") == (3, 0)
+
+def test_range_cells():
+    assert cell_range.range_cells("A1:B2,B2:C2") == frozenset({(1, 1), (1, 2), (2, 1), (2, 2), (2, 3)})
+    assert cell_range.range_cells("B:B", max_row=2) == frozenset({(1, 2), (2, 2)})
+    with pytest.raises(ValueError):
+        cell_range.range_cells("B:B")
+
+def test_read_non_contiguous_columns():
+    wb = Workbook()
+    ws = wb.active
+    for i in range(1, 6):
+        ws.append(["r{0}c{1}".format(i, j) for j in range(1, 6)])
+    wb.save("test.xlsx")
+    try:
+        rows = list(excel_operator.iter_successive_rows("test.xlsx", "Sheet", "1,3", "a,C:D"))
+        assert rows == [("r1c1", "r1c3", "r1c4"), ("r3c1", "r3c3", "r3c4")]
+        assert excel_operator.read_successive_cells("test.xlsx", "Sheet", "2", "B,E", ",") == "r2c2,r2c5"
+    finally:
+        os.remove("test.xlsx")
+
+def test_legacy_aliases():
+    assert excel_operator.excel_col_alphabet_num_map['A'] == 1
+    assert excel_operator.excel_col_alphabet_num_map['Z'] == 26
+    assert excel_operator.BASE == 26
@@ -0,0 +1,75 @@
+import sys 
+sys.path.append('../src')
+from excel import excel_operator
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font, PatternFill
+import os
+from types import SimpleNamespace
+
+def create_src(filepath):
+    wb = Workbook()
+    ws = wb.active
+    for i in range(1, 21):
+        ws.append(["r{0}c{1}".format(i, j) for j in range(1, 6)])
+    ws["B2"].font = Font(bold=True)
+    ws["C2"].fill = PatternFill("solid", fgColor="FFFF00")
+    ws["D3"].font = Font(bold=True)
+    ws.merge_cells("B4:C5")
+    wb.save(filepath)
+
+def create_dst(filepath):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["head1", "head2"])
+    wb.save(filepath)
+
+def test_copy_sheet_append():
+    create_src("test_src.xlsx")
+    create_dst("test_dst.xlsx")
+    try:
+        # 目标起始行紧跟已有内容, 走 append 快速路径
+        excel_operator.copy_sheet("test_src.xlsx", "Sheet", "2:11", "B:D",
+            "test_dst.xlsx", "Sheet", 2, 1, export_file_name="test_out.xlsx")
+        rows = list(excel_operator.iter_successive_rows("test_out.xlsx", "Sheet", "1:11", "A:C"))
+        assert rows[0] == ("head1", "head2", None)
+        assert rows[1] == ("r2c2", "r2c3", "r2c4")
+        assert rows[10] == ("r11c2", "r11c3", "r11c4")
+
+        # 目标列不是第一列
+        excel_operator.copy_sheet("test_src.xlsx", "Sheet", "1:2", "A",
+            "test_dst.xlsx", "Sheet", 2, 3, export_file_name="test_out.xlsx")
+        rows = list(excel_operator.iter_successive_rows("test_out.xlsx", "Sheet", "2:3", "A:C"))
+        assert rows == [(None, None, "r1c1"), (None, None, "r2c1")]
+    finally:
+        for f in ["test_src.xlsx", "test_dst.xlsx", "test_out.xlsx"]:
+            os.remove(f)
+
+class PlainSheet:
+    # 只有 cell() 的工作表, 没有 openpyxl 的内部属性 _current_row
+    def __init__(self):
+        self.cells = {}
+
+    def cell(self, row, column):
+        return self.cells.setdefault((row, column), SimpleNamespace(value=None))
+
+def test_write_rows_without_current_row():
+    ws = PlainSheet()
+    excel_operator._write_rows(ws, [("a", "b"), ("c", None)], 2, 3)
+    assert {k: c.value for k, c in ws.cells.items()} == {(2, 3): "a", (2, 4): "b", (3, 3): "c", (3, 4): None}
+
+def test_copy_sheet_with_styles():
+    create_src("test_src.xlsx")
+    create_dst("test_dst.xlsx")
+    try:
+        excel_operator.copy_sheet("test_src.xlsx", "Sheet", "2:5", "B:D",
+            "test_dst.xlsx", "Sheet", 3, 2, export_file_name="test_out.xlsx", copy_styles=True)
+        ws = load_workbook("test_out.xlsx")["Sheet"]
+        assert ws["B3"].value == "r2c2"
+        assert ws["B3"].font.bold
+        assert ws["C3"].fill.fgColor.rgb == "00FFFF00"
+        assert ws["D4"].font.bold
+        assert not ws["B4"].font.bold
+        assert [str(r) for r in ws.merged_cells.ranges] == ["B5:C6"]
+    finally:
+        for f in ["test_src.xlsx", "test_dst.xlsx", "test_out.xlsx"]:
+            os.remove(f)
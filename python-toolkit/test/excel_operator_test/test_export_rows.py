@@ -0,0 +1,57 @@
+import sys 
+sys.path.append('../src')
+from excel import excel_operator
+from openpyxl import load_workbook
+import pandas as pd
+import sqlite3
+import csv
+import os
+
+def test_export_rows_generator():
+    rows = ((i, "name{0}".format(i)) for i in range(1, 1001))
+    try:
+        count = excel_operator.export_rows(rows, "test_export.xlsx", header=["ID", "Name"], column_widths={'b': 30})
+        assert count == 1000
+        ws = load_workbook("test_export.xlsx")["Sheet1"]
+        assert ws["A1"].value == "ID" and ws["A1"].font.bold
+        assert ws["B1001"].value == "name1000"
+        assert ws.column_dimensions['B'].width == 30
+    finally:
+        os.remove("test_export.xlsx")
+
+def test_export_rows_dataframe_chunks_and_cursor():
+    chunks = (pd.DataFrame({"x": [i, i + 1], "y": [None, "v"]}) for i in range(0, 6, 2))
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.execute("select 1 as a, 'b' as b union all select 2, 'c'")
+    try:
+        assert excel_operator.export_rows(chunks, "test_export.xlsx", header=True, column_widths=[8, 12]) == 6
+        rows = list(excel_operator.iter_successive_rows("test_export.xlsx", "Sheet1", "1:3", "A:B"))
+        assert rows == [("x", "y"), (0, None), (1, "v")]
+
+        assert excel_operator.export_rows(cursor, "test_export.xlsx", header=[d[0] for d in cursor.description]) == 2
+        rows = list(excel_operator.iter_successive_rows("test_export.xlsx", "Sheet1", "1:3", "A:B"))
+        assert rows == [("a", "b"), (1, "b"), (2, "c")]
+    finally:
+        conn.close()
+        os.remove("test_export.xlsx")
+
+def test_export_rows_nan():
+    rows = [[1, float("nan")], (pd.NaT, "v")]
+    try:
+        assert excel_operator.export_rows(rows, "test_export.xlsx") == 2
+        rows = list(excel_operator.iter_successive_rows("test_export.xlsx", "Sheet1", "1:2", "A:B"))
+        assert rows == [(1, None), (None, "v")]
+    finally:
+        os.remove("test_export.xlsx")
+
+def test_export_csv():
+    with open("test_export.csv", "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["城市", "球队"])
+        writer.writerow(["米兰", "AC米兰"])
+    try:
+        assert excel_operator.export_csv("test_export.csv", "test_export.xlsx", sheetname="Teams") == 1
+        assert excel_operator.read_successive_cells("test_export.xlsx", "Teams", "1:2", "A:B", ",") == "城市,球队,米兰,AC米兰"
+    finally:
+        os.remove("test_export.csv")
+        os.remove("test_export.xlsx")
@@ -0,0 +1,51 @@
+import sys 
+sys.path.append('../src')
+import config
+from excel import excel_operator
+import openpyxl
+import zipfile
+import os
+
+def _members(path):
+    with zipfile.ZipFile(path) as archive:
+        return {info.filename: archive.read(info) for info in archive.infolist()}
+
+def test_incremental_save_keeps_untouched_parts():
+    current_file_dir = os.path.dirname(os.path.abspath(__file__))
+    filepath = os.path.join(current_file_dir, config.template_dir, "testsrc.xlsx")
+    try:
+        wb = excel_operator.write_to_single_cell(filepath, "Sheet2", 2, 'B', "changed", save_to="test.xlsx", incremental=True)
+        assert wb is not None
+
+        before, after = _members(filepath), _members("test.xlsx")
+        assert before.keys() == after.keys()
+        changed = [name for name in before if before[name] != after[name]]
+        # 只有被修改的工作表重新生成
+        assert changed == ["xl/worksheets/sheet2.xml"]
+
+        wbResult = openpyxl.load_workbook("test.xlsx")
+        assert wbResult["Sheet2"]["B2"].value == "changed"
+        wbOrigin = openpyxl.load_workbook(filepath)
+        for row_result, row_origin in zip(wbResult["Sheet1"].iter_rows(values_only=True),
+                wbOrigin["Sheet1"].iter_rows(values_only=True)):
+            assert row_result == row_origin
+
+        # 保存后的文件成为下一次增量保存的基准
+        assert excel_operator.write_to_single_cell(wb, "Sheet1", 1, 'A', "again", save_to="test.xlsx", incremental=True) is wb
+        assert openpyxl.load_workbook("test.xlsx")["Sheet1"]["A1"].value == "again"
+        assert openpyxl.load_workbook("test.xlsx")["Sheet2"]["B2"].value == "changed"
+    finally:
+        os.remove("test.xlsx")
+
+def test_incremental_save_falls_back_to_full_save():
+    current_file_dir = os.path.dirname(os.path.abspath(__file__))
+    filepath = os.path.join(current_file_dir, config.template_dir, "testsrc.xlsx")
+    try:
+        wb = openpyxl.load_workbook(filepath)
+        wb.create_sheet("New")
+        wb["New"]["A1"] = "x"
+        # 未经 excel_operator 加载的工作簿没有基准文件, 直接完整保存
+        assert excel_operator.save_excel(wb, "test.xlsx", incremental=True)
+        assert openpyxl.load_workbook("test.xlsx").sheetnames == ["Sheet1", "Sheet2", "New"]
+    finally:
+        os.remove("test.xlsx")
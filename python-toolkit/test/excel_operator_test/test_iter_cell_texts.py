@@ -0,0 +1,35 @@
+import sys 
+sys.path.append('../src')
+from excel import excel_operator
+from openpyxl import Workbook
+import datetime
+import os
+
+def create_workbook(filepath):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["\nhead", 1, 2.5])
+    ws.append([None, True, datetime.date(2024, 1, 2)])
+    ws.append(["tail\n", None, None])
+    wb.save(filepath)
+
+def test_read_successive_cells_non_string():
+    create_workbook("test_texts.xlsx")
+    try:
+        # 非字符串单元格不再报错, 首尾的换行属于内容, 不会被去掉
+        assert excel_operator.read_successive_cells("test_texts.xlsx", "Sheet", "1:3", "A:C", "|") == \
+            "\nhead|1|2.5|True|2024-01-02 00:00:00|tail\n"
+        assert excel_operator.read_successive_cells("test_texts.xlsx", "Sheet", "1:3", "A:C", "\n") == \
+            "\nhead\n1\n2.5\nTrue\n2024-01-02 00:00:00\ntail\n"
+    finally:
+        os.remove("test_texts.xlsx")
+
+def test_iter_cell_texts_formatter():
+    create_workbook("test_texts.xlsx")
+    try:
+        formatter = {bool: lambda v: "Y" if v else "N", int: "{:03d}".format, datetime.datetime: lambda d: d.strftime("%Y/%m/%d")}
+        texts = list(excel_operator.iter_cell_texts("test_texts.xlsx", "Sheet", "1:2", "B:C", formatter))
+        assert texts == ["001", "2.5", "Y", "2024/01/02"]
+        assert excel_operator.read_successive_cells("test_texts.xlsx", "Sheet", "1", "A:B", ",", formatter=repr) == "'\\nhead',1"
+    finally:
+        os.remove("test_texts.xlsx")
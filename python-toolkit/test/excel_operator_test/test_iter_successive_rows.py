@@ -0,0 +1,28 @@
+import sys 
+sys.path.append('../src')
+import config
+from excel import excel_operator
+from openpyxl import Workbook
+import os
+
+def test_iter_successive_rows():
+    current_file_dir = os.path.dirname(os.path.abspath(__file__))
+    filepath = os.path.join(current_file_dir, config.template_dir, config.project_completion_status_cfg["src_file"])
+    sheetname = config.project_completion_status_cfg['src_sheetname']
+    rows = list(excel_operator.iter_successive_rows(filepath, sheetname, "2:3", "B"))
+    assert rows == [('AC米兰',), ('国际米兰',)]
+
+def test_iter_successive_rows_window():
+    wb = Workbook()
+    ws = wb.active
+    for i in range(1, 1001):
+        ws.append([i, "name{0}".format(i), i * 2])
+    wb.save("test.xlsx")
+    try:
+        rows = list(excel_operator.iter_successive_rows("test.xlsx", "Sheet", "10:12", "B:C"))
+        assert rows == [("name10", 20), ("name11", 22), ("name12", 24)]
+        # 超出实际行数的部分用 None 补齐
+        rows = list(excel_operator.iter_successive_rows("test.xlsx", "Sheet", "1000:1001", "A"))
+        assert rows == [(1000,), (None,)]
+    finally:
+        os.remove("test.xlsx")
@@ -0,0 +1,79 @@
+import sys 
+sys.path.append('../src')
+from excel import excel_operator
+from openpyxl import Workbook
+import numpy as np
+import datetime
+import glob
+import os
+import pytest
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(monkeypatch, tmp_path):
+    # 快照写到临时目录, 测试结束后恢复模块的 snapshot_dir
+    monkeypatch.setattr(excel_operator, "snapshot_dir", str(tmp_path / "snapshots"))
+
+def snapshots():
+    return glob.glob(os.path.join(excel_operator.snapshot_dir, "*"))
+
+def parquet_available():
+    try:
+        import pyarrow
+        return True
+    except ImportError:
+        return False
+
+def create_workbook(filepath):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["id", "score", "name", "date"])
+    ws.append([1, 1.5, "a", datetime.datetime(2024, 1, 1)])
+    ws.append([2, None, None, None])
+    ws.append([3, 3.5, "c", datetime.datetime(2024, 1, 3)])
+    wb.save(filepath)
+
+def remove_files():
+    os.remove("test_frame.xlsx")
+
+def test_read_range_as_frame():
+    create_workbook("test_frame.xlsx")
+    try:
+        frame = excel_operator.read_range_as_frame("test_frame.xlsx", "Sheet", "1:4", "A:D")
+        assert list(frame.columns) == ["id", "score", "name", "date"]
+        assert frame["id"].dtype == np.int64
+        assert frame["score"].dtype == np.float64
+        assert np.isnan(frame["score"][1])
+        assert frame["name"].isna()[1]
+        assert np.issubdtype(frame["date"].dtype, np.datetime64)
+        # 没有 pyarrow 时不缓存, 不退回到 pickle
+        assert len(snapshots()) == (1 if parquet_available() else 0)
+        assert not glob.glob(".test_frame.xlsx.*")
+
+        # 第二次读取命中缓存
+        cached = excel_operator.read_range_as_frame("test_frame.xlsx", "Sheet", "1:4", "A:D")
+        assert cached.equals(frame)
+    finally:
+        remove_files()
+
+def test_read_range_as_array():
+    create_workbook("test_frame.xlsx")
+    try:
+        array = excel_operator.read_range_as_array("test_frame.xlsx", "Sheet", "2:4", "A:B")
+        assert array.dtype == np.float64
+        assert array.shape == (3, 2)
+        assert np.isnan(array[1, 1])
+        assert len(snapshots()) == 1
+        # object 数组不缓存
+        assert excel_operator.read_range_as_array("test_frame.xlsx", "Sheet", "2:4", "A,C").dtype == object
+        assert len(snapshots()) == 1
+        assert excel_operator.read_range_as_array("test_frame.xlsx", "Sheet", "2:4", "A:B")[0, 0] == 1
+
+        # 工作簿变化后快照失效并被替换
+        excel_operator.write_to_cells("test_frame.xlsx", "Sheet", [(2, 'A', 10)], save_to="test_frame.xlsx")
+        st = os.stat("test_frame.xlsx")
+        os.utime("test_frame.xlsx", ns=(st.st_atime_ns, st.st_mtime_ns + 1000000))
+        array = excel_operator.read_range_as_array("test_frame.xlsx", "Sheet", "2:4", "A:B")
+        assert array[0, 0] == 10
+        assert len(snapshots()) == 1
+    finally:
+        remove_files()
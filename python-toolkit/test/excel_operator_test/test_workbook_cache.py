@@ -0,0 +1,107 @@
+import sys 
+sys.path.append('../src')
+from excel import excel_operator
+from openpyxl import Workbook
+import os
+
+def create_workbook(filepath, value):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['name', 'value'])
+    ws.append(['a', value])
+    wb.save(filepath)
+
+def test_workbook_cache_hit():
+    create_workbook("test_cache.xlsx", "1")
+    cache = excel_operator.enable_workbook_cache()
+    try:
+        assert excel_operator.read_successive_cells("test_cache.xlsx", "Sheet", "2", "B") == "1"
+        excel_operator.write_to_cells("test_cache.xlsx", "Sheet", [(2, 'B', "2")])
+        # 修改保留在缓存中, 文件只解析一次
+        assert excel_operator.read_successive_cells("test_cache.xlsx", "Sheet", "2", "B") == "2"
+        assert cache.misses == 1
+        assert cache.hits == 2
+    finally:
+        excel_operator.disable_workbook_cache()
+    # 未 flush 的修改不会写回文件
+    try:
+        assert excel_operator.read_successive_cells("test_cache.xlsx", "Sheet", "2", "B") == "1"
+    finally:
+        os.remove("test_cache.xlsx")
+
+def test_workbook_cache_invalidation():
+    create_workbook("test_cache.xlsx", "1")
+    cache = excel_operator.enable_workbook_cache()
+    try:
+        assert excel_operator.read_successive_cells("test_cache.xlsx", "Sheet", "2", "B") == "1"
+        create_workbook("test_cache.xlsx", "changed")
+        st = os.stat("test_cache.xlsx")
+        os.utime("test_cache.xlsx", ns=(st.st_atime_ns, st.st_mtime_ns + 1000000))
+        assert excel_operator.read_successive_cells("test_cache.xlsx", "Sheet", "2", "B") == "changed"
+        assert cache.misses == 2
+    finally:
+        excel_operator.disable_workbook_cache()
+        os.remove("test_cache.xlsx")
+
+def test_workbook_cache_save_on_evict():
+    create_workbook("test_cache1.xlsx", "1")
+    create_workbook("test_cache2.xlsx", "1")
+    cache = excel_operator.enable_workbook_cache(max_bytes=1, save_on_evict=True)
+    try:
+        excel_operator.write_to_cells("test_cache1.xlsx", "Sheet", [(2, 'B', "evicted")])
+        assert "test_cache1.xlsx" in cache
+        # 超出内存预算, 最久未使用的工作簿被淘汰并写回文件
+        excel_operator.write_to_cells("test_cache2.xlsx", "Sheet", [(2, 'B', "flushed")])
+        assert "test_cache1.xlsx" not in cache
+        excel_operator.flush_workbook_cache()
+    finally:
+        excel_operator.disable_workbook_cache()
+    try:
+        assert excel_operator.read_successive_cells("test_cache1.xlsx", "Sheet", "2", "B") == "evicted"
+        assert excel_operator.read_successive_cells("test_cache2.xlsx", "Sheet", "2", "B") == "flushed"
+    finally:
+        os.remove("test_cache1.xlsx")
+        os.remove("test_cache2.xlsx")
+
+def test_workbook_cache_save_to_other_file():
+    create_workbook("test_cache_src.xlsx", "orig")
+    with open("test_cache_src.xlsx", "rb") as f:
+        original = f.read()
+    cache = excel_operator.enable_workbook_cache(max_bytes=1, save_on_evict=True)
+    try:
+        assert excel_operator.read_successive_cells("test_cache_src.xlsx", "Sheet", "2", "B") == "orig"
+        excel_operator.write_to_cells("test_cache_src.xlsx", "Sheet", [(2, 'B', "changed")], save_to="test_cache_out.xlsx")
+        excel_operator.insert_rows("test_cache_src.xlsx", "Sheet", 2, 1, [(2, 'A', "new")], save_to="test_cache_out2.xlsx")
+        excel_operator.copy_sheet("test_cache_out.xlsx", "Sheet", "2", "B", "test_cache_src.xlsx", "Sheet", 3, 1,
+            export_file_name="test_cache_out3.xlsx")
+        # 保存到其它文件的修改不影响缓存中的 source
+        assert excel_operator.read_successive_cells("test_cache_src.xlsx", "Sheet", "2", "B") == "orig"
+        assert excel_operator.read_successive_cells("test_cache_out.xlsx", "Sheet", "2", "B") == "changed"
+        assert excel_operator.read_successive_cells("test_cache_out2.xlsx", "Sheet", "2", "A") == "new"
+        assert excel_operator.read_successive_cells("test_cache_out3.xlsx", "Sheet", "3", "A") == "changed"
+        excel_operator.flush_workbook_cache()
+        with open("test_cache_src.xlsx", "rb") as f:
+            assert f.read() == original
+
+        # 越界的写入不会改动缓存中的工作簿
+        try:
+            excel_operator.write_to_cells("test_cache_src.xlsx", "Sheet", [(1, 'A', "x"), (100, 'A', "y")])
+        except ValueError:
+            pass
+        assert excel_operator.read_successive_cells("test_cache_src.xlsx", "Sheet", "1", "A") == "name"
+
+        # 未保存的修改会带到保存到其它文件的副本中
+        excel_operator.write_to_cells("test_cache_src.xlsx", "Sheet", [(1, 'A', "title")])
+        excel_operator.write_to_cells("test_cache_src.xlsx", "Sheet", [(2, 'B', "copy")], save_to="test_cache_out.xlsx")
+        assert excel_operator.read_successive_cells("test_cache_out.xlsx", "Sheet", "1:2", "A:B", ",") == "title,value,a,copy"
+        assert excel_operator.read_successive_cells("test_cache_src.xlsx", "Sheet", "2", "B") == "orig"
+        excel_operator.write_to_cells("test_cache_src.xlsx", "Sheet", [(1, 'A', "name")])
+        excel_operator.flush_workbook_cache()
+    finally:
+        excel_operator.disable_workbook_cache()
+    try:
+        assert excel_operator.read_successive_cells("test_cache_src.xlsx", "Sheet", "1:2", "A:B", ",") == "name,value,a,orig"
+    finally:
+        for name in ("test_cache_src.xlsx", "test_cache_out.xlsx", "test_cache_out2.xlsx", "test_cache_out3.xlsx"):
+            if os.path.exists(name):
+                os.remove(name)
@@ -0,0 +1,207 @@
+import sys,os
+sys.path.append('../src')
+from strings_searcher.strings_search import StringMatcher, BinaryFilter, SearchCache, TrigramIndex, open_sink, search_in_file, search_files, iter_files, main
+from strings_searcher import strings_search
+import csv
+import json
+import shutil
+import mmap
+import time
+import sqlite3
+
+def _naive(text, strings):
+    return [(s, n) for n, line in enumerate(text.split('\n'), start=1) for s in strings if s in line]
+
+def test_matcher_same_as_line_scan():
+    strings = ['PAY', 'PAYMENT', 'MENT', '退款', 'a.b', 'x|y']
+    text = 'xxPAYMENT yy\nno\n\nMENT a.b 退款 PAY axb\nx|y PAYMEN\nPAYPAY'
+    assert StringMatcher(strings).search(text) == _naive(text, strings)
+    assert StringMatcher([]).search(text) == []
+    assert StringMatcher(strings).search(text, limit=3) == _naive(text, strings)[:3]
+    # 按 UTF-8 字节搜索结果相同
+    assert StringMatcher(strings).search(text.encode('utf-8')) == _naive(text, strings)
+
+def _make_tree():
+    os.makedirs('search_tree/sub', exist_ok=True)
+    os.makedirs('search_tree/node_modules', exist_ok=True)
+    for i in range(200):
+        with open(f'search_tree/sub/f{i:03}.txt', 'w', encoding='utf-8') as f:
+            f.write(f'line1\nTRADE_CODE_{i}\n退款 {i}\n')
+    with open('search_tree/node_modules/skip.txt', 'w', encoding='utf-8') as f:
+        f.write('退款\n')
+
+def test_search_files_parallel_in_order():
+    _make_tree()
+    try:
+        strings = ['TRADE_CODE_1', '退款']
+        files = list(iter_files(['search_tree'], {'node_modules'}))
+        assert len(files) == 200
+        serial = list(search_files(files, strings, workers=1))
+        assert list(search_files(files, strings, workers=3)) == serial
+        # TRADE_CODE_1 出现在 f001, f010-f019, f100-f199 中
+        assert len(serial) == 111 + 200
+        assert [r[1] for r in serial] == sorted((r[1] for r in serial), key=files.index)
+        assert search_in_file('search_tree/sub/f012.txt', strings) == [('TRADE_CODE_1', 2), ('退款', 3)]
+    finally:
+        shutil.rmtree('search_tree')
+
+def test_main_writes_csv():
+    _make_tree()
+    with open('search_config.json', 'w', encoding='utf-8') as f:
+        json.dump({'strings': ['TRADE_CODE_199'], 'directories': ['search_tree']}, f)
+    try:
+        assert main(['-c', 'search_config.json', '-o', 'search_out.csv', '-j', '2']) == 0
+        with open('search_out.csv', encoding='utf-8-sig') as f:
+            rows = list(csv.reader(f))
+        assert rows == [['String', 'File', 'Line'], ['TRADE_CODE_199', os.path.join('search_tree', 'sub', 'f199.txt'), '2']]
+    finally:
+        shutil.rmtree('search_tree')
+        os.remove('search_config.json')
+        if os.path.exists('search_out.csv'):
+            os.remove('search_out.csv')
+
+def test_binary_and_mmap():
+    os.makedirs('binary_tree', exist_ok=True)
+    try:
+        with open('binary_tree/data.bin', 'wb') as f:
+            f.write('退款'.encode('utf-8'))
+        with open('binary_tree/blob.unknown', 'wb') as f:
+            f.write('退款'.encode('utf-8') + b'\x00')
+        with open('binary_tree/image.svg', 'wb') as f:
+            f.write('退款'.encode('utf-8') + b'\x00')
+        # 大文件用 mmap 搜索, 行号只为命中计算
+        with open('binary_tree/big.txt', 'w', encoding='utf-8', newline='\n') as f:
+            f.write('x' * 100 + '\n')
+            f.write(('填充内容\n' * 200000) + '尾部 退款 TRADE\n')
+        binary_filter = BinaryFilter(text_extensions=['svg'])
+        assert search_in_file('binary_tree/data.bin', ['退款'], binary_filter) == []
+        assert search_in_file('binary_tree/blob.unknown', ['退款'], binary_filter) == []
+        assert search_in_file('binary_tree/blob.unknown', ['退款']) == [('退款', 1)]
+        assert search_in_file('binary_tree/image.svg', ['退款'], binary_filter) == [('退款', 1)]
+        assert search_in_file('binary_tree/big.txt', ['TRADE', '退款'], binary_filter) == [('TRADE', 200002), ('退款', 200002)]
+        with open('binary_tree/big.txt', 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            assert StringMatcher(['填充']).search(data)[-1] == ('填充', 200001)
+    finally:
+        shutil.rmtree('binary_tree')
+
+def test_search_cache():
+    _make_tree()
+    strings = ['TRADE_CODE_1', '退款']
+    key = SearchCache.make_key(strings)
+
+    def run(key=key, workers=1):
+        with SearchCache('search_cache.db', key) as cache:
+            results = list(search_files(iter_files(['search_tree'], set()), strings, workers, cache=cache))
+        return sorted(results), cache.stats
+
+    try:
+        expected = sorted(search_files(iter_files(['search_tree'], set()), strings, 1))
+        assert run() == (expected, {'cached': 0, 'scanned': 201, 'removed': 0})
+        assert run(workers=2) == (expected, {'cached': 201, 'scanned': 0, 'removed': 0})
+
+        # 修改、touch、删除、新增
+        with open('search_tree/sub/f000.txt', 'w', encoding='utf-8') as f:
+            f.write('TRADE_CODE_1\n')
+        os.utime('search_tree/sub/f001.txt', ns=(time.time_ns(), time.time_ns() + 10**9))
+        os.remove('search_tree/sub/f002.txt')
+        with open('search_tree/new.txt', 'w', encoding='utf-8') as f:
+            f.write('\n退款\n')
+        results, stats = run(workers=2)
+        assert stats == {'cached': 198, 'scanned': 3, 'removed': 1}
+        assert results == sorted(search_files(iter_files(['search_tree'], set()), strings, 1))
+        assert ('TRADE_CODE_1', os.path.join('search_tree', 'sub', 'f000.txt'), 1) in results
+
+        # 目标字符串改变时缓存失效
+        assert run(key=SearchCache.make_key(['退款']))[1]['cached'] == 0
+    finally:
+        shutil.rmtree('search_tree')
+        if os.path.exists('search_cache.db'):
+            os.remove('search_cache.db')
+
+def test_trigram_index(capsys):
+    _make_tree()
+    with open('search_tree/sub/image.png', 'wb') as f:
+        f.write('TRADE_CODE_150'.encode('utf-8'))
+    with open('search_config.json', 'w', encoding='utf-8') as f:
+        json.dump({'strings': ['退款'], 'directories': ['search_tree'], 'ignore_dirs': ['node_modules']}, f)
+    try:
+        assert main(['index', '-c', 'search_config.json', '--index', 'search_test.idx', '-j', '2']) == 0
+        files = list(iter_files(['search_tree'], {'node_modules'}))
+        with TrigramIndex('search_test.idx') as index:
+            assert index.candidates(['TRADE_CODE_150']) == [os.path.join('search_tree', 'sub', 'f150.txt')]
+            assert len(index.candidates(['TRADE_CODE_15'])) == 11
+            assert index.candidates(['不存在的字符串']) == []
+            # 少于 3 个字节的字符串不能缩小范围
+            assert len(index.candidates(['T'])) == 200
+            for strings in (['TRADE_CODE_15', '退款'], ['E_CODE_1'], ['退']):
+                assert sorted(index.search(strings)) == sorted(search_files(files, strings, 1, BinaryFilter()))
+
+        capsys.readouterr()
+        assert main(['query', 'TRADE_CODE_150', '--index', 'search_test.idx']) == 0
+        out = capsys.readouterr().out
+        assert f"{os.path.join('search_tree', 'sub', 'f150.txt')}:2: TRADE_CODE_150" in out
+        assert 'image.png' not in out
+    finally:
+        shutil.rmtree('search_tree')
+        os.remove('search_config.json')
+        if os.path.exists('search_test.idx'):
+            os.remove('search_test.idx')
+
+def test_sinks_and_limits(monkeypatch):
+    _make_tree()
+    with open('search_config.json', 'w', encoding='utf-8') as f:
+        json.dump({'strings': ['TRADE_CODE_1', '退款'], 'directories': ['search_tree']}, f)
+    try:
+        for name in ('search_out.csv', 'search_out.jsonl', 'search_out.json', 'search_out.db'):
+            with open_sink(name) as sink:
+                sink.write('退款', 'a.txt', 3)
+                sink.write('TRADE', 'b.txt', 1)
+        with open('search_out.csv', encoding='utf-8-sig') as f:
+            assert list(csv.reader(f)) == [['String', 'File', 'Line'], ['退款', 'a.txt', '3'], ['TRADE', 'b.txt', '1']]
+        with open('search_out.jsonl', encoding='utf-8') as f:
+            assert [json.loads(line) for line in f][0] == {'string': '退款', 'file': 'a.txt', 'line': 3}
+        with open('search_out.json', encoding='utf-8') as f:
+            assert json.load(f) == [{'string': '退款', 'file': 'a.txt', 'line': 3}, {'string': 'TRADE', 'file': 'b.txt', 'line': 1}]
+        with open_sink('search_out.json'):
+            pass
+        with open('search_out.json', encoding='utf-8') as f:
+            assert json.load(f) == []
+        conn = sqlite3.connect('search_out.db')
+        assert conn.execute('SELECT string, file, line FROM results').fetchall() == [('退款', 'a.txt', 3), ('TRADE', 'b.txt', 1)]
+        conn.close()
+
+        # 每个文件只记录第一处匹配
+        assert main(['-c', 'search_config.json', '-o', 'search_out.jsonl', '-j', '2', '--max-hits-per-file', '1']) == 0
+        with open('search_out.jsonl', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        assert len(rows) == 200 and all(r['line'] == (2 if 'TRADE' in r['string'] else 3) for r in rows)
+
+        assert main(['-c', 'search_config.json', '-o', 'search_out.csv', '-j', '1', '--cache', 'search_cache.db']) == 0
+        assert main(['-c', 'search_config.json', '-o', 'search_out.db', '-j', '2', '--max-total-hits', '5',
+                     '--cache', 'search_cache.db']) == 0
+        conn = sqlite3.connect('search_out.db')
+        assert conn.execute('SELECT COUNT(*) FROM results').fetchone() == (5,)
+        conn.close()
+        # 达到上限后立即停止, 不再遍历其余文件(只有 f000 包含 TRADE_CODE_0)
+        with open('search_config_one.json', 'w', encoding='utf-8') as f:
+            json.dump({'strings': ['TRADE_CODE_0'], 'directories': ['search_tree']}, f)
+        monkeypatch.setattr(strings_search, 'BATCH_SIZE', 8)
+        assert main(['-c', 'search_config_one.json', '-o', 'search_out.csv', '-j', '1', '--max-total-hits', '1',
+                     '--cache', 'search_cache_one.db']) == 0
+        conn = sqlite3.connect('search_cache_one.db')
+        assert conn.execute('SELECT COUNT(*) FROM files').fetchone()[0] < 200
+        conn.close()
+        # 上限为 0 时不写入任何结果
+        assert main(['-c', 'search_config.json', '-o', 'search_out.csv', '-j', '2', '--max-total-hits', '0']) == 0
+        with open('search_out.csv', encoding='utf-8-sig') as f:
+            assert list(csv.reader(f)) == [['String', 'File', 'Line']]
+        # 提前结束时不删除缓存中尚未遍历到的文件
+        conn = sqlite3.connect('search_cache.db')
+        assert conn.execute('SELECT COUNT(*) FROM files').fetchone() == (200,)
+        conn.close()
+    finally:
+        shutil.rmtree('search_tree')
+        for name in ('search_config.json', 'search_config_one.json', 'search_out.csv', 'search_out.jsonl',
+                     'search_out.json', 'search_out.db', 'search_cache.db', 'search_cache_one.db'):
+            if os.path.exists(name):
+                os.remove(name)
@@ -0,0 +1,73 @@
+import sys,os
+sys.path.append('../src')
+from docx import Document
+from word.docx_index import DocxIndex, main
+import shutil
+import time
+import zipfile
+
+def _report(path, title, body):
+    doc = Document()
+    doc.add_heading(title, 1)
+    doc.add_heading('付款方式', 2)
+    doc.add_paragraph(body)
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = 'Total Amount 100'
+    doc.save(path)
+
+def test_docx_index():
+    os.makedirs('index_docs/sub', exist_ok=True)
+    _report('index_docs/a.docx', '合同A', '合同金额为一百万元')
+    _report('index_docs/sub/b.docx', '合同B', '本合同不涉及金额')
+    try:
+        with DocxIndex('index_test.idx') as index:
+            assert index.update('index_docs') == {'added': 2, 'updated': 0, 'removed': 0, 'unchanged': 0, 'failed': []}
+
+            hits = index.search('合同金额')
+            assert [os.path.basename(h.path) for h in hits] == ['a.docx']
+            assert hits[0].heading == '1 合同A > 1.1 付款方式'
+            assert hits[0].text == '合同金额为一百万元'
+            assert len(index.search('合同 金额')) == 2
+            assert len(index.search('total amount')) == 2
+            assert [h.text for h in index.search('付款', headings_only=True)] == ['付款方式', '付款方式']
+            assert index.search('金额', heading='合同B')[0].text == '本合同不涉及金额'
+            assert index.search('不存在的词') == []
+
+            # 内容没变只更新 mtime, 内容改变才重新索引
+            os.utime('index_docs/a.docx', ns=(time.time_ns(), time.time_ns() + 10**9))
+            assert index.update('index_docs')['unchanged'] == 2
+            _report('index_docs/sub/b.docx', '合同B', '补充条款')
+            os.remove('index_docs/a.docx')
+            assert index.update('index_docs') == {'added': 0, 'updated': 1, 'removed': 1, 'unchanged': 0, 'failed': []}
+            assert index.search('合同金额') == []
+            assert len(index.search('补充条款')) == 1
+
+            # 损坏或加密的文档跳过, 其它文档照常索引, 已有的索引保持不变
+            with open('index_docs/broken.docx', 'wb') as f:
+                f.write(b'not a zip file')
+            with zipfile.ZipFile('index_docs/empty.docx', 'w') as z:
+                z.writestr('[Content_Types].xml', '<Types/>')
+            with open('index_docs/sub/b.docx', 'wb') as f:
+                f.write(b'\xd0\xcf\x11\xe0 encrypted')
+            _report('index_docs/c.docx', '合同C', '新的合同')
+            stats = index.update('index_docs')
+            assert (stats['added'], stats['updated'], stats['unchanged']) == (1, 0, 0)
+            assert sorted(os.path.basename(path) for path, _ in stats['failed']) == ['b.docx', 'broken.docx', 'empty.docx']
+            assert len(index.search('补充条款')) == 1
+            assert len(index.search('新的合同')) == 1
+
+            # 同一个索引中的另一个目录, 更新时互不删除
+            os.makedirs('index_docs_other', exist_ok=True)
+            _report('index_docs_other/d.docx', '合同D', '其它目录')
+            assert index.update('index_docs_other')['added'] == 1
+            assert index.update('index_docs')['removed'] == 0
+            assert len(index.search('其它目录')) == 1 and len(index.search('新的合同')) == 1
+            # 前缀相同的目录不算在 root 下
+            assert index.update('index_docs_other')['removed'] == 0
+            assert len(index.search('新的合同')) == 1
+
+        main(['query', '补充', '--index', 'index_test.idx'])
+    finally:
+        shutil.rmtree('index_docs', ignore_errors=True)
+        shutil.rmtree('index_docs_other', ignore_errors=True)
+        if os.path.exists('index_test.idx'):
+            os.remove('index_test.idx')
@@ -0,0 +1,38 @@
+import sys,os
+sys.path.append('../src')
+from docx import Document
+from word import docx_stream
+
+def test_iter_headings():
+    current_file_dir = os.path.dirname(os.path.abspath(__file__))
+    headings = list(docx_stream.iter_headings(os.path.join(current_file_dir, 'data', 'heading_test.docx')))
+    assert [(h['level'], h['number'], h['content']) for h in headings] == [
+        ('Heading 1', '1', '标题1'), ('Heading 2', '1.1', '标题2'), ('Heading 3', '1.1.1', '标题3')]
+
+def test_iter_docx():
+    doc = Document()
+    doc.add_heading('一', 1)
+    doc.add_heading('一.一', 2)
+    doc.add_paragraph('正文')
+    doc.add_heading('二', 1)
+    doc.add_heading('二.一', 2)
+    doc.add_heading('二.二', 2)
+    doc.add_heading('二.二.一', 3)
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = 'a'
+    table.cell(1, 1).text = 'b'
+    table.cell(1, 1).add_paragraph('c')
+    table.cell(1, 0).add_table(rows=1, cols=1).cell(0, 0).text = 'nested'
+    doc.add_paragraph('结尾')
+    doc.save('stream.docx')
+    try:
+        items = list(docx_stream.iter_docx('stream.docx'))
+        headings = [(i['number'], i['text']) for i in items if i['type'] == 'heading']
+        assert headings == [('1', '一'), ('1.1', '一.一'), ('2', '二'), ('2.1', '二.一'), ('2.2', '二.二'), ('2.2.1', '二.二.一')]
+        assert [i['text'] for i in items if i['type'] == 'paragraph'] == ['正文', '结尾']
+        cells = {(i['table'], i['row'], i['column']): i['text'] for i in items if i['type'] == 'cell'}
+        assert cells == {(0, 0, 0): 'a', (0, 0, 1): '', (0, 1, 0): '\nnested\n', (0, 1, 1): 'b\nc'}
+        assert items[-1] == {'type': 'paragraph', 'style': 'Normal', 'text': '结尾'}
+        assert not any(i['type'] == 'cell' for i in docx_stream.iter_docx('stream.docx', include_tables=False))
+    finally:
+        os.remove('stream.docx')
@@ -0,0 +1,43 @@
+import sys
+sys.path.append('../src')
+from word.docx_template import CompiledTemplate
+from docx import Document
+import io
+import os
+
+def test_compiled_template_render():
+    doc = Document()
+    doc.add_heading('标题', 1)
+    p = doc.add_paragraph()
+    p.add_run('姓名: {{ na')
+    p.add_run('me }}').bold = True
+    p.add_run(', 编号 {{id}}')
+    doc.add_paragraph('{{ table1 }}')
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = '金额 {{amount}}'
+    doc.sections[0].header.paragraphs[0].text = '{{ company }}'
+    doc.save('template.docx')
+    try:
+        template = CompiledTemplate('template.docx')
+        assert template.placeholders == ['amount', 'company', 'id', 'name', 'table1']
+
+        data = Document().add_table(rows=2, cols=2)
+        data.cell(1, 1).text = 'x'
+        for i, name in enumerate(['张三', '李四']):
+            blob = template.render({'name': name, 'id': i, 'amount': '100', 'company': 'ACME', 'table1': data})
+            result = Document(io.BytesIO(blob))
+            assert result.paragraphs[1].text == f'姓名: {name}, 编号 {i}'
+            assert result.paragraphs[1].runs[1].text == ''
+            assert len(result.tables) == 2
+            assert result.tables[0].cell(1, 1).text == 'x'
+            assert result.tables[1].cell(0, 0).text == '金额 100'
+            assert result.sections[0].header.paragraphs[0].text == 'ACME'
+
+        # 未提供的占位符保持原样, 模板本身不被修改
+        assert template.render({'id': 7}, 'out.docx') == 'out.docx'
+        result = Document('out.docx')
+        assert result.paragraphs[1].text == '姓名: {{ name }}, 编号 7'
+        assert result.paragraphs[2].text == '{{ table1 }}'
+    finally:
+        for file in ['template.docx', 'out.docx']:
+            if os.path.exists(file):
+                os.remove(file)
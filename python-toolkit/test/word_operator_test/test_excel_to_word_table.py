@@ -132,3 +132,43 @@ def test_excel_to_word_table():
     print("示例完成！")
     print("\n也可以使用命令行模式:")
     print("python excel_to_word.py data/sample.xlsx --template templates/template.docx --output output/result.docx")
+
+
+def test_build_large_table():
+    doc = Document()
+    doc.add_paragraph('{{ big }}')
+    doc.add_paragraph('表格结束')
+    doc.save("big_template.docx")
+    try:
+        tool = ExcelToWordTable("big_template.docx")
+        tool.create_word_document(template_path="big_template.docx")
+        table_data = [[f"{i}-{j}" for j in range(8)] for i in range(5000)]
+        table_data[0][0] = "a\tb\nc <&>"
+        tool.insert_table_at_placeholder(table_data, placeholder="{{ big }}")
+        tool.save_word_document("big_result.docx")
+
+        result = Document("big_result.docx")
+        assert [p.text for p in result.paragraphs] == ['表格结束']
+        table = result.tables[0]
+        assert len(table.rows) == 5000 and len(table.columns) == 8
+        assert table.cell(0, 0).text == "a\tb\nc <&>"
+        assert table.cell(4999, 7).text == "4999-7"
+        assert table.style.name == "Table Grid"
+    finally:
+        for file in ["big_template.docx", "big_result.docx"]:
+            if os.path.exists(file):
+                os.remove(file)
+
+def test_build_table_ragged_rows():
+    Workbook().save("ragged.xlsx")
+    try:
+        tool = ExcelToWordTable("ragged.xlsx")
+        tool.create_word_document()
+        # 第一行为空, 列数以最长的一行为准
+        table = tool._build_table([[], ["a", "b", "c"], ["d"]], auto_adjust_columns=False)
+        assert len(table.columns) == 3
+        assert [[c.text for c in row.cells] for row in table.rows] == [["", "", ""], ["a", "b", "c"], ["d", "", ""]]
+        table = tool._build_table([[], []], auto_adjust_columns=False)
+        assert len(table.columns) == 1 and len(table.rows) == 2
+    finally:
+        os.remove("ragged.xlsx")
@@ -0,0 +1,46 @@
+import sys
+sys.path.append('../src')
+from word import word_operator
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.shared import Pt
+import os
+
+def test_register_style_and_insert_paragraphs():
+    doc = Document()
+    doc.add_paragraph('开头')
+    doc.add_paragraph('锚点')
+    doc.add_paragraph('结尾')
+
+    styles = dict(word_operator.default_styles)
+    styles['font'] = dict(styles['font'], bold=True, size=Pt(14))
+    style_id = word_operator.register_style(doc, 'BatchBody', styles)
+    # 重复注册不会新增样式
+    count = len(doc.styles)
+    assert word_operator.register_style(doc, 'BatchBody', styles) == style_id
+    assert len(doc.styles) == count
+    word_operator.register_style(doc, 'BatchEmphasis', styles, WD_STYLE_TYPE.CHARACTER)
+
+    paragraphs = ['第{0}段'.format(i) for i in range(1000)] + [(' 强调\t内容', 'BatchEmphasis')]
+    ret = word_operator.insert_paragraphs(doc, '锚点', paragraphs, style='BatchBody', save_to="text.docx")
+    assert ret == 0
+    assert word_operator.insert_paragraphs(doc, '不存在', ['x']) == word_operator.RETUENED_STATUS.NOT_CHANGED.value
+    assert word_operator.insert_paragraphs(doc, '锚点', ['之后'], before=False) == 0
+
+    result = Document("text.docx")
+    os.remove("text.docx")
+    texts = [p.text for p in result.paragraphs]
+    assert texts[:3] == ['开头', '第0段', '第1段']
+    assert texts[-3:] == [' 强调\t内容', '锚点', '结尾']
+    assert result.paragraphs[1].style.name == 'BatchBody'
+    assert result.paragraphs[1].style.font.bold
+    assert result.paragraphs[1001].runs[0].style.name == 'BatchEmphasis'
+    assert [p.text for p in doc.paragraphs][-2:] == ['之后', '结尾']
+
+def test_add_to_end_with_registered_style():
+    doc = Document()
+    word_operator.register_style(doc, 'EndStyle')
+    assert word_operator.add_to_end(doc, 'content', styles='EndStyle') == 0
+    assert doc.paragraphs[-1].style.name == 'EndStyle'
+    assert word_operator.add_before_text(doc, 'content', 'before', styles='EndStyle') == 0
+    assert doc.paragraphs[-2].text == 'before' and doc.paragraphs[-2].style.name == 'EndStyle'
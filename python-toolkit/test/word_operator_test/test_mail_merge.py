@@ -0,0 +1,47 @@
+import sys
+sys.path.append('../src')
+from word import mail_merge
+from openpyxl import Workbook
+from docx import Document
+import shutil
+import os
+
+def test_mail_merge():
+    doc = Document()
+    doc.add_paragraph('合同编号 {{ id }}, 甲方 {{ name }}')
+    doc.save('merge_template.docx')
+    wb = Workbook()
+    wb.active.append(['id', 'name'])
+    for i in range(5):
+        wb.active.append([i, f'客户{i}'])
+    wb.active.append([None, None])
+    wb.save('merge_rows.xlsx')
+    try:
+        results = mail_merge.mail_merge('merge_template.docx', 'merge_rows.xlsx', 'merge_out/{index}_{name}.docx',
+                                        max_workers=2, max_in_flight=2, checkpoint='merge_checkpoint.csv',
+                                        report_path='merge_report.csv')
+        assert [r.status for r in results] == ['ok'] * 5
+        assert Document('merge_out/3_客户3.docx').paragraphs[0].text == '合同编号 3, 甲方 客户3'
+        assert os.path.exists('merge_report.csv')
+
+        # 用同一个检查点重新运行, 已生成的文档被跳过
+        os.remove('merge_out/1_客户1.docx')
+        rows = [{'id': i, 'name': f'客户{i}'} for i in range(5)]
+        results = mail_merge.mail_merge('merge_template.docx', rows, 'merge_out/{index}_{name}.docx',
+                                        max_workers=2, checkpoint='merge_checkpoint.csv')
+        assert [r.status for r in results] == ['skipped', 'ok', 'skipped', 'skipped', 'skipped']
+
+        results = mail_merge.mail_merge('merge_template.docx', [{'id': 1}], 'merge_out/{missing}.docx', max_workers=1)
+        assert results[0].status == 'error'
+
+        # 数据行中的 index 列不会使整批失败, {index} 始终是行号
+        rows = [{'index': 'x', 'name': '客户'}, {'id': 1, 'name': '客户'}]
+        results = mail_merge.mail_merge('merge_template.docx', rows, 'merge_out/index_{index}.docx', max_workers=1)
+        assert [(r.status, r.output) for r in results] == [('ok', 'merge_out/index_0.docx'), ('ok', 'merge_out/index_1.docx')]
+        results = mail_merge.mail_merge('merge_template.docx', [{'id': 1}], 'merge_out/{0}.docx', max_workers=1)
+        assert results[0].status == 'error'
+    finally:
+        shutil.rmtree('merge_out', ignore_errors=True)
+        for file in ['merge_template.docx', 'merge_rows.xlsx', 'merge_checkpoint.csv', 'merge_report.csv']:
+            if os.path.exists(file):
+                os.remove(file)
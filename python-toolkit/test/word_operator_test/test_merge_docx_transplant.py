@@ -0,0 +1,126 @@
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.opc.constants import RELATIONSHIP_TYPE as RT, CONTENT_TYPE as CT
+from docx.opc.packuri import PackURI
+from docx.opc.part import Part
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+import struct
+import zlib
+import os
+import sys
+sys.path.append('../src')
+from word.docx_merger import DocxContentMerger
+
+_C_NS = 'http://schemas.openxmlformats.org/drawingml/2006/chart'
+
+
+def _png_bytes():
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    header = struct.pack('>IIBBBBB', 1, 1, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(b'\x00\xff\x00\x00')) + chunk(b'IEND', b'')
+
+
+def test_merge_transplant():
+    with open('transplant.png', 'wb') as f:
+        f.write(_png_bytes())
+    source = Document()
+    style = source.styles.add_style('MySourceStyle', WD_STYLE_TYPE.PARAGRAPH)
+    style.font.bold = True
+    source.add_paragraph('第一段', style='MySourceStyle')
+    item = source.add_paragraph('列表项')
+    item._p.get_or_add_pPr().get_or_add_numPr().get_or_add_numId().val = 1
+    table = source.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = '表格'
+    source.add_paragraph('表格之后')
+    source.add_picture('transplant.png')
+    source.save('transplant_source.docx')
+
+    target = Document()
+    target.add_paragraph('开头')
+    target.add_paragraph('{{ place1 }}')
+    target.add_paragraph('结尾')
+    target.add_picture('transplant.png')
+    target.save('transplant_target.docx')
+
+    try:
+        merger = DocxContentMerger(transplant=True)
+        merger.merge_documents('transplant_source.docx', 'transplant_target.docx', 'transplant_result.docx')
+
+        result = Document('transplant_result.docx')
+        body = [child.tag.split('}')[1] for child in result.element.body.iterchildren()]
+        # 段落和表格保持源文档中的顺序
+        assert body[:6] == ['p', 'p', 'p', 'tbl', 'p', 'p']
+        assert [p.text for p in result.paragraphs[:4]] == ['开头', '第一段', '列表项', '表格之后']
+        assert result.paragraphs[1].style.name == 'MySourceStyle'
+        assert result.paragraphs[1].style.font.bold
+        assert result.tables[0].cell(0, 0).text == '表格'
+
+        # 编号定义复制为新的 numId, 不与目标文档已有的列表冲突
+        numbering = result.part.numbering_part.element
+        target_num_ids = Document().part.numbering_part.element.xpath('./w:num/@w:numId')
+        num_id = result.paragraphs[2]._p.xpath('./w:pPr/w:numPr/w:numId/@w:val')[0]
+        assert int(num_id) > max(int(i) for i in target_num_ids)
+        abstract_id = numbering.xpath(f'./w:num[@w:numId="{num_id}"]/w:abstractNumId/@w:val')[0]
+        assert numbering.xpath(f'./w:abstractNum[@w:abstractNumId="{abstract_id}"]')
+
+        images = [rel for rel in result.part.rels.values() if rel.reltype.endswith('/image')]
+        assert len(images) == 1
+        embeds = result.element.body.xpath('.//a:blip/@r:embed')
+        assert len(embeds) == 2 and set(embeds) == {images[0].rId}
+    finally:
+        for file in ['transplant.png', 'transplant_source.docx', 'transplant_target.docx', 'transplant_result.docx']:
+            if os.path.exists(file):
+                os.remove(file)
+
+
+def _add_chart(doc, paragraph):
+    # 只用于测试部件复制: 一个带有自身关系的图表部件
+    chart = Part(PackURI('/word/charts/chart1.xml'), CT.DML_CHART, b'<c:chartSpace xmlns:c="%s"/>' % _C_NS.encode(),
+                 doc.part.package)
+    chart.relate_to('http://example.com/data.xlsx', RT.OLE_OBJECT, is_external=True)
+    r_id = doc.part.relate_to(chart, RT.CHART)
+    paragraph._p.add_r().append(parse_xml(f'<c:chart xmlns:c="{_C_NS}" {nsdecls("r")} r:id="{r_id}"/>'))
+
+
+def test_merge_transplant_missing_numbering_and_parts():
+    source = Document()
+    for text, num_id in [('列表项', 1), ('没有抽象编号', 999)]:
+        item = source.add_paragraph(text)
+        item._p.get_or_add_pPr().get_or_add_numPr().get_or_add_numId().val = num_id
+    numbering = source.part.numbering_part.element
+    numbering.append(parse_xml(f'<w:num {nsdecls("w")} w:numId="999"><w:abstractNumId w:val="999"/></w:num>'))
+    _add_chart(source, source.add_paragraph('图表'))
+    source.save('transplant_source.docx')
+
+    target = Document()
+    target.add_paragraph('{{ place1 }}')
+    _add_chart(target, target.add_paragraph('目标图表'))
+    target.save('transplant_target.docx')
+
+    try:
+        merger = DocxContentMerger(transplant=True)
+        # numId=999 的 abstractNum 不存在
+        merger.merge_documents('transplant_source.docx', 'transplant_target.docx', 'transplant_result.docx')
+        result = Document('transplant_result.docx')
+        assert [p.text for p in result.paragraphs[:3]] == ['列表项', '没有抽象编号', '图表']
+        assert not result.paragraphs[1]._p.xpath('./w:pPr/w:numPr')
+
+        # 图表部件复制到新的部件名, 源文档的部件不变
+        charts = {p.partname: p for p in result.part.package.iter_parts() if p.content_type == CT.DML_CHART}
+        assert sorted(charts) == ['/word/charts/chart1.xml', '/word/charts/chart2.xml']
+        assert [r.target_ref for r in charts['/word/charts/chart2.xml'].rels.values()] == ['http://example.com/data.xlsx']
+
+        # 源文档没有 numbering.xml 时同样按普通段落处理
+        source = Document('transplant_source.docx')
+        numbering_rel = next(r for r in source.part.rels.values() if r.reltype == RT.NUMBERING)
+        del source.part.rels[numbering_rel.rId]
+        source.save('transplant_source.docx')
+        merger.merge_documents('transplant_source.docx', 'transplant_target.docx', 'transplant_result.docx')
+        result = Document('transplant_result.docx')
+        assert not result.element.body.xpath('.//w:numPr')
+    finally:
+        for file in ['transplant_source.docx', 'transplant_target.docx', 'transplant_result.docx']:
+            if os.path.exists(file):
+                os.remove(file)
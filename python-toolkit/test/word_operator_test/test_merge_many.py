@@ -0,0 +1,79 @@
+from docx import Document
+import os
+import sys
+sys.path.append('../src')
+from word.docx_merger import DocxContentMerger
+
+
+def _make_source(path, texts):
+    doc = Document()
+    for text in texts:
+        doc.add_paragraph(text)
+    doc.save(path)
+
+
+def test_merge_many():
+    _make_source('many_a.docx', ['A1', 'A2'])
+    _make_source('many_b.docx', ['B1'])
+    target = Document()
+    target.add_paragraph('开头')
+    target.add_paragraph('{{ place1 }}')
+    target.add_paragraph('中间 {{ place2 }} {{ place1 }}')
+    target.add_paragraph('{{ unknown }}')
+    table = target.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = '单元格'
+    table.cell(0, 1).text = '{{ place2 }}'
+    table.cell(0, 1).add_paragraph('保留')
+    # 横向合并的单元格和同一段落中重复的占位符只插入一次
+    merged = target.add_table(rows=1, cols=3)
+    merged.cell(0, 0).merge(merged.cell(0, 1)).text = '{{ place2 }} {{ place2 }}'
+    merged.cell(0, 2).text = '右'
+    target.save('many_target.docx')
+    try:
+        for transplant in (False, True):
+            merger = DocxContentMerger(transplant=transplant)
+            merger.merge_many({'place1': 'many_a.docx', 'place2': 'many_b.docx'}, 'many_target.docx', 'many_result.docx')
+            result = Document('many_result.docx')
+            assert [p.text for p in result.paragraphs] == ['开头', 'A1', 'A2', 'B1', 'A1', 'A2', '{{ unknown }}']
+            # 表格中的占位符替换为单元格中的段落, 表格结构不变
+            row = result.tables[0].rows[0]
+            assert [c.text for c in row.cells] == ['单元格', 'B1\n保留']
+            assert len(row._tr.xpath('./w:tc')) == 2 and not row._tr.xpath('./w:p')
+            merged_row = result.tables[1].rows[0]
+            assert [p.text for p in merged_row.cells[0].paragraphs] == ['B1']
+            assert merged_row.cells[2].text == '右'
+    finally:
+        for file in ['many_a.docx', 'many_b.docx', 'many_target.docx', 'many_result.docx']:
+            if os.path.exists(file):
+                os.remove(file)
+
+
+def test_replace_in_table_cell_detached_paragraph():
+    doc = Document()
+    paragraph = doc.add_paragraph('{{ place1 }}')
+    paragraph._p.getparent().remove(paragraph._p)
+    merger = DocxContentMerger()
+    assert merger.replace_in_table_cell(doc, {'paragraph': paragraph, 'placeholder': 'place1'}, []) is False
+
+
+def test_merge_many_table_into_cell():
+    source = Document()
+    table = source.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = '名称'
+    table.cell(0, 1).text = '金额'
+    table.cell(1, 0).text = '合同'
+    source.save('many_table.docx')
+    target = Document()
+    target.add_table(rows=1, cols=1).cell(0, 0).text = '{{ place1 }}'
+    target.save('many_target.docx')
+    try:
+        for transplant in (False, True):
+            merger = DocxContentMerger(transplant=transplant)
+            merger.merge_many({'place1': 'many_table.docx'}, 'many_target.docx', 'many_result.docx')
+            cell = Document('many_result.docx').tables[0].cell(0, 0)
+            # 单元格中的表格按行转成段落
+            assert [p.text for p in cell.paragraphs] == ['名称 | 金额', '合同']
+    finally:
+        for file in ['many_table.docx', 'many_target.docx', 'many_result.docx']:
+            if os.path.exists(file):
+                os.remove(file)
@@ -0,0 +1,50 @@
+import sys
+sys.path.append('../src')
+from word import word_operator
+from docx import Document
+import os
+
+def test_replace_many():
+    doc = Document()
+    p = doc.add_paragraph()
+    p.add_run('Dear {{na')
+    bold = p.add_run('me}}, your id is ')
+    bold.bold = True
+    p.add_run('{{id}}.')
+    table = doc.add_table(rows=1, cols=2)
+    table.cell(0, 1).text = 'total: {{amount}}'
+    doc.sections[0].header.paragraphs[0].text = '{{company}} report'
+    doc.sections[0].footer.paragraphs[0].text = 'page of {{company}}'
+
+    mapping = {'{{name}}': 'Alice', '{{id}}': 42, '{{amount}}': '1,000', '{{company}}': 'ACME', '{{unused}}': 'x'}
+    ret = word_operator.replace_many(doc, mapping, save_to="text.docx")
+    os.remove("text.docx")
+    assert ret == 0
+
+    assert p.text == 'Dear Alice, your id is 42.'
+    # 关键字拆分在多个 run 中时, 其它 run 的格式保持不变
+    assert [r.text for r in p.runs] == ['Dear Alice', ', your id is ', '42.']
+    assert p.runs[1].bold
+    assert table.cell(0, 1).text == 'total: 1,000'
+    assert doc.sections[0].header.paragraphs[0].text == 'ACME report'
+    assert doc.sections[0].footer.paragraphs[0].text == 'page of ACME'
+
+def test_replace_many_longest_keyword_and_no_change():
+    doc = Document()
+    p = doc.add_paragraph('{{a}} {{ab}}')
+    assert word_operator.replace_many(doc, {'{{a': '1', '{{ab}}': '2', '{{a}}': '3'}) == 0
+    assert p.text == '3 2'
+    assert word_operator.replace_many(doc, {'{{none}}': 'x'}) == word_operator.RETUENED_STATUS.NOT_CHANGED.value
+
+def test_replace_many_saves_without_change():
+    doc = Document()
+    doc.add_paragraph('nothing to replace')
+    try:
+        ret = word_operator.replace_many(doc, {'{{none}}': 'x'}, save_to="unchanged.docx")
+        assert ret == word_operator.RETUENED_STATUS.NOT_CHANGED.value
+        assert Document("unchanged.docx").paragraphs[0].text == 'nothing to replace'
+        assert word_operator.replace_many(doc, {}, save_to=os.path.join("no_such_dir", "x.docx")) == \
+            word_operator.RETUENED_STATUS.FAIL_TO_SAVE.value
+    finally:
+        if os.path.exists("unchanged.docx"):
+            os.remove("unchanged.docx")